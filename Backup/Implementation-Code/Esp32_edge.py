@@ -3,17 +3,57 @@ import os
 import time
 import cv2
 import mediapipe as mp
-import joblib
 import csv
+import sys
+import threading
+import atexit
+
+# Modul bersama engagement_core ada di root repo
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from engagement_core.inference import EngagementModel
+from engagement_core.ingest import AsyncFileWriter, decode_jpeg
+from engagement_core.session_log import SessionLogger
+from engagement_core.columnar import ResultColumns, load_columns, summarize, time_windows, export_csv
+from engagement_core.summary import SessionSummary
+from engagement_core.multiface import MultiFaceClassifier
 
 app = Flask(__name__)
 base_folder = '/home/elvindo/Documents/pi/engagement_data'
 csv_file_path = None
 
+# Per frame hanya results.cols (kolom biner) dan summary.json yang ditulis;
+# engagement_results.csv dibuat dari kolom saat sesi ditutup (sesi baru
+# atau server berhenti). RESULTS_CSV_LIVE=True menulis CSV per baris
+# selama sesi seperti dulu.
+RESULTS_CSV_LIVE = False
+RESULTS_CSV_HEADER = ["Timestamp (Unix)", "Time (HH:MM:SS)", "Frame Name", "Engagement Level", "Confidence Score", "Response Time", "FPS"]
+
+# CSV ditulis per kelompok baris; CSV_FSYNC=True juga fsync tiap
+# kelompok (hilang maks ~1 detik saat listrik padam)
+CSV_FSYNC = False
+result_log = None
+result_cols = None
+session_summary = None
+face_log = None  # faces.csv: satu baris per wajah (ID track)
+
 # Inisialisasi MediaPipe dan model klasifikasi
 mp_face_mesh = mp.solutions.face_mesh
 face_mesh = mp_face_mesh.FaceMesh(static_image_mode=False, max_num_faces=5)
-rf_model = joblib.load('random_forest_model_Full_Face.pkl')  # Ganti dengan path model Anda
+rf_model = EngagementModel.load('random_forest_model_Full_Face.pkl', compile_forest=True)  # Ganti dengan path model Anda
+
+# Semua wajah satu frame masuk satu predict_proba, dengan ID track tetap
+multi_face = MultiFaceClassifier(rf_model.predict_batch, max_faces=5)
+
+# Flask melayani request di beberapa thread; FaceMesh dan buffer fitur
+# hanya boleh dipakai satu thread dalam satu waktu. Request keluar dari
+# lock ini satu per satu, jadi micro-batching antar request tidak
+# menghasilkan batch > 1 dan hanya menambah waktu tunggu.
+face_mesh_lock = threading.Lock()
+
+# Skala decode JPEG untuk klasifikasi (1 = penuh, 2/4 = diperkecil).
+# Landmark ternormalisasi, jadi 936 fitur tetap sama.
+JPEG_DECODE_SCALE = 1
+frame_writer = AsyncFileWriter()  # simpan byte mentah di thread terpisah
 
 
 def format_timestamp(timestamp):
@@ -21,9 +61,30 @@ def format_timestamp(timestamp):
     return time.strftime('%H:%M:%S', time.localtime(timestamp))
 
 
+def result_row(timestamp, frame_name, level, confidence, response_time, fps):
+    """Satu baris engagement_results.csv (format lama)."""
+    return [int(timestamp), format_timestamp(timestamp), frame_name, level, confidence, response_time, fps]
+
+
+def close_session():
+    """Tutup file sesi aktif; tanpa RESULTS_CSV_LIVE, CSV dibuat dari kolom."""
+    if result_cols is None:
+        return
+    result_cols.close()
+    session_summary.close()
+    face_log.close()
+    if result_log is not None:
+        result_log.close()
+    else:
+        export_csv(result_cols.root, csv_file_path, RESULTS_CSV_HEADER, result_row)
+
+
+atexit.register(close_session)
+
+
 @app.route('/start_new_session', methods=['GET'])
 def start_new_session():
-    global csv_file_path
+    global csv_file_path, result_log, result_cols, session_summary, face_log
 
     # Mendapatkan ID responden dan nomor sesi dari parameter URL
     responden = request.args.get('responden')
@@ -45,11 +106,28 @@ def start_new_session():
     for level in ["0", "1", "2", "3"]:
         os.makedirs(os.path.join(engagement_folder, level), exist_ok=True)
 
-    # Tentukan path file CSV baru untuk sesi ini
+    # Tutup sesi sebelumnya (sisa baris ditulis dulu, CSV-nya dibuat)
+    close_session()
+
+    # Tentukan path file CSV untuk sesi ini
     csv_file_path = os.path.join(session_folder, "engagement_results.csv")
-    with open(csv_file_path, mode='w', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(["Timestamp (Unix)", "Time (HH:MM:SS)", "Frame Name", "Engagement Level", "Confidence Score", "Response Time", "FPS"])
+    result_log = None
+    if RESULTS_CSV_LIVE:
+        with open(csv_file_path, mode='w', newline='') as file:
+            csv.writer(file).writerow(RESULTS_CSV_HEADER)
+        result_log = SessionLogger(csv_file_path, fsync=CSV_FSYNC)
+
+    # Hasil per wajah (ID track) untuk mode kelas
+    face_csv_path = os.path.join(session_folder, "faces.csv")
+    with open(face_csv_path, mode='w', newline='') as file:
+        csv.writer(file).writerow(["Timestamp (Unix)", "Frame Name", "Track ID", "Engagement Level", "Confidence Score"])
+    face_log = SessionLogger(face_csv_path, fsync=CSV_FSYNC)
+
+    # Sumber data hasil per frame: kolom biner (juga untuk /check_results)
+    result_cols = ResultColumns(os.path.join(session_folder, "results.cols"), truncate=True)
+
+    # Ringkasan berjalan (jumlah, persentase, latensi), disimpan ke summary.json
+    session_summary = SessionSummary(os.path.join(session_folder, "summary.json"), fresh=True)
 
     return f"New session started for Responden {responden} Sesi {sesi}", 200
 
@@ -58,57 +136,62 @@ def start_new_session():
 def upload_file():
     start_time = time.time()
 
-    # Mendapatkan timestamp dan waktu format HH:MM:SS
-    timestamp = int(time.time())
-    formatted_time = format_timestamp(timestamp)
-    frame_name = f"frame_{timestamp}.jpg"
+    # Timestamp Unix (detik) untuk faces.csv; nama frame memakai milidetik
+    # seperti server V1/V2, supaya dua upload dalam satu detik tidak
+    # saling menimpa
+    timestamp = int(start_time)
+    frame_name = f"frame_{int(start_time * 1000)}.jpg"
     frame_path = os.path.join(os.path.dirname(csv_file_path), frame_name)
 
-    # Simpan gambar yang diterima dari ESP32-CAM
-    with open(frame_path, 'wb') as f:
-        f.write(request.data)
+    # Simpan gambar yang diterima dari ESP32-CAM (asinkron, tidak menahan request)
+    jpeg = request.get_data()
+    frame_writer.write(frame_path, jpeg)
 
-    # Lakukan klasifikasi pada gambar yang diterima
-    engagement_level, confidence = process_and_classify_image(frame_path, frame_name)
+    # Lakukan klasifikasi langsung dari memori, tanpa imread dari SD card
+    engagement_level, confidence = process_and_classify_image(jpeg, frame_name, timestamp)
 
     # Hitung waktu respons dan FPS
     response_time = time.time() - start_time
     fps = 1 / response_time if response_time > 0 else 0
 
-    # Simpan hasil klasifikasi dan metrik ke CSV
-    with open(csv_file_path, mode='a', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow([timestamp, formatted_time, frame_name, engagement_level, confidence, response_time, fps])
+    # Simpan hasil klasifikasi dan metrik ke kolom biner + ringkasan berjalan
+    result_cols.append(start_time, engagement_level, confidence, response_time, fps, frame_name)
+    session_summary.add(start_time, engagement_level, confidence, response_time)
+    if result_log is not None:
+        result_log.log(result_row(start_time, frame_name, engagement_level, confidence, response_time, fps))
 
     return "File received", 200
 
 
-def process_and_classify_image(image_path, frame_name):
-    frame = cv2.imread(image_path)
+def process_and_classify_image(jpeg, frame_name, timestamp):
+    frame = decode_jpeg(jpeg, JPEG_DECODE_SCALE)
     if frame is None:
         print("Failed to load image.")
         return -1, 0.0  # Default nilai confidence
 
     rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    result = face_mesh.process(rgb_frame)
-    engagement_level = -1
-    confidence = 0.0  # Default nilai confidence
 
-    if result.multi_face_landmarks:
-        for face_landmarks in result.multi_face_landmarks:
-            landmarks = [(lm.x, lm.y) for lm in face_landmarks.landmark]
-            flattened = [coord for point in landmarks for coord in point]
+    with face_mesh_lock:
+        result = face_mesh.process(rgb_frame)
+        # ID track juga diperbarui di dalam lock, agar urut sesuai frame
+        rows, boxes, ids = multi_face.extract(result)
+
+    # Semua wajah dalam satu batch predict_proba
+    faces = multi_face.label(rows, boxes, ids)
 
-            if len(flattened) == 468 * 2:
-                probabilities = rf_model.predict_proba([flattened])  # Mendapatkan probabilitas
-                engagement_level = rf_model.predict([flattened])[0]
-                confidence = max(probabilities[0])  # Confidence score tertinggi untuk kelas yang diprediksi
+    for face in faces:
+        face_log.log([timestamp, frame_name, face.track_id, face.level, face.confidence])
 
-                # Simpan gambar berdasarkan level engagement
-                engagement_folder = os.path.join(os.path.dirname(csv_file_path), "engagement", str(engagement_level))
-                cv2.imwrite(os.path.join(engagement_folder, frame_name), frame)
+        # Simpan gambar berdasarkan level engagement
+        engagement_folder = os.path.join(os.path.dirname(csv_file_path), "engagement", str(face.level))
+        frame_writer.write(os.path.join(engagement_folder, frame_name), jpeg)
+
+    if not faces:
+        return -1, 0.0  # Default nilai confidence
 
-    return engagement_level, confidence
+    # CSV per frame memakai wajah terbesar (paling dekat ke kamera)
+    main = max(faces, key=lambda f: (f.box[2] - f.box[0]) * (f.box[3] - f.box[1]))
+    return main.level, main.confidence
 
 
 @app.route('/check_results', methods=['GET'])
@@ -123,10 +206,44 @@ def check_results():
     # Tentukan path file CSV berdasarkan ID responden dan sesi
     session_folder = os.path.join(base_folder, f"responden_{responden}", f"sesi_{sesi}")
     csv_file_path = os.path.join(session_folder, "engagement_results.csv")
+    cols_dir = os.path.join(session_folder, "results.cols")
 
-    if not os.path.exists(csv_file_path):
+    # Sesi yang sedang berjalan belum punya CSV (dibuat saat sesi ditutup)
+    if not os.path.exists(csv_file_path) and not os.path.isdir(cols_dir):
         return "File not found", 404
 
+    # Ringkasan berjalan: O(1), tidak tergantung panjang sesi
+    window = request.args.get('window', type=float)
+    summary_path = os.path.join(session_folder, "summary.json")
+    if not window:
+        if session_summary is not None and session_summary.path == summary_path:
+            return jsonify(session_summary.snapshot())
+        if os.path.exists(summary_path):
+            return jsonify(SessionSummary.load(summary_path))
+
+    # Baris sesi yang sedang berjalan mungkin masih di buffer
+    if result_cols is not None and result_cols.root == cols_dir:
+        result_cols.flush()
+
+    # Sesi baru punya kolom biner: hitung langsung dengan NumPy tanpa parse CSV
+    if os.path.isdir(cols_dir):
+        cols = load_columns(cols_dir)
+        summary = summarize(cols)
+        result = {
+            key: summary[key]
+            for key in ("total_frames", "engagement_counts", "engagement_percentages")
+        }
+
+        # ?window=60 -> jumlah per level tiap 60 detik
+        if window:
+            starts, counts = time_windows(cols, window)
+            result["windows"] = [
+                {"start": float(start), "counts": [int(c) for c in row]}
+                for start, row in zip(starts, counts)
+            ]
+        return jsonify(result)
+
+    # Sesi lama (hanya CSV)
     # Inisialisasi penghitung untuk setiap level engagement
     engagement_counts = {"0": 0, "1": 0, "2": 0, "3": 0}
     total_frames = 0
@@ -3,6 +3,12 @@ import mediapipe as mp
 import joblib
 import numpy as np
 import time
+import os
+import sys
+
+# Modul bersama engagement_core ada di root repo
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from engagement_core.capture import LatestFrameGrabber
 
 # Inisialisasi Mediapipe dan load model yang sudah dilatih
 mp_face_mesh = mp.solutions.face_mesh
@@ -12,7 +18,9 @@ face_mesh = mp_face_mesh.FaceMesh(static_image_mode=False, max_num_faces=5)  # B
 rf_model = joblib.load('(Facial_Landmark)_random_forest_engagement_model_Bayesian_tunedd.pkl')
 
 # Menggunakan stream dari ESP32-CAM
-cap = cv2.VideoCapture('http://192.168.188.107:81/stream')  # Ganti dengan IP ESP32-CAM
+# Frame diambil terus di thread terpisah, jadi yang diklasifikasi selalu frame terbaru
+# (frame lama yang tidak sempat diproses dibuang dan dihitung sebagai "dropped")
+cap = LatestFrameGrabber('http://192.168.188.107:81/stream')  # Ganti dengan IP ESP32-CAM
 
 # Tambahkan pengecekan apakah stream berhasil dibuka    
 if not cap.isOpened():
@@ -25,7 +33,7 @@ new_frame_time = 0
 response_times = []  # List untuk menyimpan waktu response tiap frame
 
 while True:
-    ret, frame = cap.read()
+    ret, frame, captured_at = cap.read()
     if not ret:
         print("Tidak dapat membaca frame dari stream.")
         break
@@ -80,6 +88,9 @@ while True:
     response_time = end_time - start_time
     response_times.append(response_time)  # Tambahkan waktu response ke daftar
 
+    # Umur frame: dari frame diambil kamera sampai selesai diklasifikasi
+    frame_age = cap.note_classified(captured_at)
+
     # Menghitung FPS
     new_frame_time = time.time()
     fps = 1 / (new_frame_time - prev_frame_time)
@@ -87,6 +98,7 @@ while True:
 
     # Tampilkan FPS di frame
     cv2.putText(frame, f'FPS: {int(fps)}', (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+    cv2.putText(frame, f'Age: {int(frame_age * 1000)} ms', (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
 
     # Tampilkan frame dengan OpenCV
     cv2.imshow('Engagement Level Detection for Multiple Faces', frame)
@@ -98,6 +110,7 @@ while True:
 # Hitung response time rata-rata setelah selesai
 average_response_time = sum(response_times) / len(response_times)
 print("Average Response Time per Frame:", average_response_time, "seconds")
+print("Capture stats (dropped / umur frame):", cap.stats())
 
 # Bersihkan resource setelah selesai
 cap.release()
@@ -2,26 +2,45 @@ import os
 import time
 import cv2
 import mediapipe as mp
-import joblib
 import csv
 import tkinter as tk
 from tkinter import messagebox
+import sys
+
+# Modul bersama engagement_core ada di root repo
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from engagement_core.recorder import VideoRecorder
+from engagement_core.session_log import SessionLogger
+from engagement_core.inference import EngagementModel
+from engagement_core.multiface import MultiFaceClassifier, crop_face
+from engagement_core.summary import SessionSummary
 
 base_folder = '/home/elvindo/Documents/pi/Day2'
 csv_file_path = None
+result_log = None
 video_writer = None
+track_summaries = {}  # track id -> SessionSummary
+
+# CSV hasil tetap terbuka selama sesi dan ditulis per kelompok baris;
+# CSV_FSYNC=True juga fsync tiap kelompok (hilang maks ~1 detik saat listrik padam)
+CSV_FSYNC = False
 
 # Inisialisasi MediaPipe dan model klasifikasi
 mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp_face_mesh.FaceMesh(static_image_mode=False, max_num_faces=5)
-rf_model = joblib.load('Fix_kan.pkl')  # Ganti dengan path model Anda
+MAX_FACES = 5
+face_mesh = mp_face_mesh.FaceMesh(static_image_mode=False, max_num_faces=MAX_FACES)
+rf_model = EngagementModel.load('Fix_kan.pkl', compile_forest=True)  # Ganti dengan path model Anda
+
+# Mode kelas: semua wajah dalam satu frame diklasifikasi dengan satu
+# predict_proba, dan tiap wajah mendapat ID track yang tetap antar frame
+multi_face = MultiFaceClassifier(rf_model.predict_batch, max_faces=MAX_FACES)
 
 def format_timestamp(timestamp):
     """Fungsi untuk mengonversi timestamp ke format HH:MM:SS."""
     return time.strftime('%H:%M:%S', time.localtime(timestamp))
 
 def start_session(responden, sesi):
-    global csv_file_path, video_writer
+    global csv_file_path, result_log, video_writer, track_summaries
 
     # Buat folder untuk responden jika belum ada
     responden_folder = os.path.join(base_folder, f"responden_{responden}")
@@ -31,20 +50,18 @@ def start_session(responden, sesi):
     session_folder = os.path.join(responden_folder, f"sesi_{sesi}")
     os.makedirs(session_folder, exist_ok=True)
 
-    # Buat folder engagement (0, 1, 2, 3) di dalam folder sesi
-    engagement_folder = os.path.join(session_folder, "engagement")
-    for level in ["0", "1", "2", "3"]:
-        os.makedirs(os.path.join(engagement_folder, level), exist_ok=True)
-
     # Tentukan path file CSV baru untuk sesi ini
     csv_file_path = os.path.join(session_folder, "engagement_results.csv")
     with open(csv_file_path, mode='w', newline='') as file:
         writer = csv.writer(file)
-        writer.writerow(["Timestamp (Unix)", "Time (HH:MM:SS)", "Frame Name", "Engagement Level", "Confidence Score", "Response Time", "FPS"])
+        writer.writerow(["Timestamp (Unix)", "Time (HH:MM:SS)", "Frame Name", "Track ID", "Engagement Level", "Confidence Score", "Response Time", "FPS"])
+    result_log = SessionLogger(csv_file_path, fsync=CSV_FSYNC)
+    track_summaries = {}
 
     # Set up video writer untuk menyimpan video keseluruhan
+    # Encoding mp4v jalan di proses terpisah, jadi tidak berebut core dengan FaceMesh
     video_path = os.path.join(session_folder, "session_video.mp4")
-    video_writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'mp4v'), 10, (640, 480))  # Sesuaikan FPS dan resolusi jika perlu
+    video_writer = VideoRecorder(video_path, fps=10, size=(640, 480))  # Sesuaikan FPS dan resolusi jika perlu
 
     # Mulai pengambilan frame dari webcam
     capture_frames_from_webcam(session_folder)
@@ -63,51 +80,75 @@ def capture_frames_from_webcam(session_folder):
         formatted_time = format_timestamp(timestamp // 1000)  # Hanya format waktu HH:MM:SS (menggunakan detik dari milidetik)
         frame_name = f"frame_{timestamp}.jpg"  # Gunakan timestamp milidetik agar unik
 
-        # Lakukan klasifikasi pada frame yang diambil
-        engagement_level, confidence = process_and_classify_frame(frame, frame_name, session_folder)
+        # Lakukan klasifikasi semua wajah pada frame yang diambil
+        faces = process_and_classify_frame(frame, frame_name, session_folder)
 
         # Hitung waktu respons dan FPS
         response_time = time.time() - start_time
         fps = 1 / response_time if response_time > 0 else 0
 
-        # Tulis hasil klasifikasi ke CSV
-        with open(csv_file_path, mode='a', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow([timestamp, formatted_time, frame_name, engagement_level, confidence, response_time, fps])
+        # Tulis hasil klasifikasi ke CSV: satu baris per wajah (track),
+        # frame tanpa wajah tetap satu baris dengan Track ID -1
+        for face in faces:
+            result_log.log([timestamp, formatted_time, frame_name, face.track_id, face.level, face.confidence, response_time, fps])
+            track_summary(session_folder, face.track_id).add(timestamp / 1000, face.level, face.confidence, response_time)
+        if not faces:
+            result_log.log([timestamp, formatted_time, frame_name, -1, -1, 0.0, response_time, fps])
 
-        # Simpan frame ke video
-        video_writer.write(frame)
+
+        # Simpan frame ke video (timestamp dipakai agar durasi video sesuai waktu asli)
+        video_writer.write(frame, timestamp / 1000)
 
         # Tampilkan frame pada layar dan tekan 'q' untuk keluar
-        cv2.imshow("Webcam Feed", frame)
+        shown = frame.copy()
+        draw_faces(shown, faces)
+        cv2.imshow("Webcam Feed", shown)
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
 
     cap.release()
     video_writer.release()
+    result_log.close()
+    print("Video stats:", video_writer.stats())
+    for track_id, summary in sorted(track_summaries.items()):
+        summary.close()
+        print(f"Track {track_id}:", summary.snapshot()["engagement_counts"])
     cv2.destroyAllWindows()
 
 def process_and_classify_frame(frame, frame_name, session_folder):
     rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
     result = face_mesh.process(rgb_frame)
-    engagement_level = -1
-    confidence = 0.0  # Default nilai confidence
-
-    if result.multi_face_landmarks:
-        for face_landmarks in result.multi_face_landmarks:
-            landmarks = [(lm.x, lm.y) for lm in face_landmarks.landmark]
-            flattened = [coord for point in landmarks for coord in point]
-
-            if len(flattened) == 468 * 2:
-                probabilities = rf_model.predict_proba([flattened])  # Mendapatkan probabilitas
-                engagement_level = rf_model.predict([flattened])[0]
-                confidence = max(probabilities[0])  # Confidence score tertinggi untuk kelas yang diprediksi
-
-                # Simpan frame berdasarkan level engagement
-                engagement_folder = os.path.join(session_folder, "engagement", str(engagement_level))
-                cv2.imwrite(os.path.join(engagement_folder, frame_name), frame)
 
-    return engagement_level, confidence
+    # Satu predict_proba untuk semua wajah, hasil per ID track
+    faces = multi_face.classify(result)
+
+    # Simpan potongan wajah per track dan level engagement:
+    # tracks/track_<id>/<level>/<frame>
+    for face in faces:
+        crop = crop_face(frame, face.box)
+        if crop is not None:
+            track_folder = os.path.join(session_folder, "tracks", f"track_{face.track_id}", str(face.level))
+            os.makedirs(track_folder, exist_ok=True)
+            cv2.imwrite(os.path.join(track_folder, frame_name), crop)
+
+    return faces
+
+def draw_faces(frame, faces):
+    """Kotak dan ID track + level di atas tiap wajah (untuk preview)."""
+    h, w = frame.shape[:2]
+    for face in faces:
+        x0, y0, x1, y1 = face.box
+        cv2.rectangle(frame, (int(x0 * w), int(y0 * h)), (int(x1 * w), int(y1 * h)), (0, 255, 0), 2)
+        cv2.putText(frame, f"ID {face.track_id}: {face.level}", (int(x0 * w), int(y0 * h) - 8),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+
+def track_summary(session_folder, track_id):
+    """Ringkasan berjalan per track, disimpan di tracks/track_<id>/summary.json."""
+    if track_id not in track_summaries:
+        track_folder = os.path.join(session_folder, "tracks", f"track_{track_id}")
+        os.makedirs(track_folder, exist_ok=True)
+        track_summaries[track_id] = SessionSummary(os.path.join(track_folder, "summary.json"), fresh=True)
+    return track_summaries[track_id]
 
 # Fungsi untuk memulai sesi dari input UI
 def start_session_ui():
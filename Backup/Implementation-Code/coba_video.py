@@ -2,18 +2,28 @@ import os
 import time
 import cv2
 import mediapipe as mp
-import joblib
 import csv
+import sys
 import tkinter as tk
 from tkinter import filedialog, messagebox
 
+# Modul bersama engagement_core ada di root repo
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from engagement_core.inference import EngagementModel
+from engagement_core.multiface import MultiFaceClassifier, crop_face
+
 base_folder = '/home/elvindo/Documents/pi/Day2'
 csv_file_path = None
 
 # Inisialisasi MediaPipe dan model klasifikasi
 mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp.solutions.face_mesh.FaceMesh(static_image_mode=False, max_num_faces=5)
-rf_model = joblib.load('Fix_kan.pkl')  # Ganti dengan path model Anda
+MAX_FACES = 5
+face_mesh = mp.solutions.face_mesh.FaceMesh(static_image_mode=False, max_num_faces=MAX_FACES)
+rf_model = EngagementModel.load('Fix_kan.pkl', compile_forest=True)  # Ganti dengan path model Anda
+
+# Semua wajah dalam satu frame diklasifikasi dengan satu predict_proba,
+# tiap wajah mendapat ID track yang tetap antar frame
+multi_face = MultiFaceClassifier(rf_model.predict_batch, max_faces=MAX_FACES)
 
 def format_timestamp(timestamp):
     """Fungsi untuk mengonversi timestamp ke format HH:MM:SS."""
@@ -39,7 +49,7 @@ def start_session_from_video(responden, sesi, video_path):
     csv_file_path = os.path.join(session_folder, "engagement_results.csv")
     with open(csv_file_path, mode='w', newline='') as file:
         writer = csv.writer(file)
-        writer.writerow(["Timestamp (Unix)", "Time (HH:MM:SS)", "Frame Name", "Engagement Level", "Response Time"])
+        writer.writerow(["Timestamp (Unix)", "Time (HH:MM:SS)", "Frame Name", "Track ID", "Engagement Level", "Confidence Score", "Response Time"])
 
     # Proses video frame-by-frame
     process_video(video_path, session_folder)
@@ -65,27 +75,31 @@ def process_video(video_path, session_folder):
         formatted_time = format_timestamp(timestamp // 1000)  # Format waktu HH:MM:SS
         frame_name = f"frame_{timestamp}.jpg"  # Nama frame unik berdasarkan timestamp
 
-        # Lakukan klasifikasi pada frame yang diambil
-        engagement_level = process_and_classify_frame(frame, frame_name, session_folder)
+        # Lakukan klasifikasi semua wajah pada frame yang diambil
+        faces = process_and_classify_frame(frame, frame_name, session_folder)
 
         # Hitung response time
         response_time = time.time() - start_time  # Waktu selesai - waktu mulai
 
         # Tambahkan bounding box di wajah dan teks pada frame
-        annotated_frame = annotate_frame(frame, engagement_level)
+        annotated_frame = annotate_frame(frame, faces)
 
-        # Simpan frame dengan bounding box ke folder engagement yang sesuai
-        if engagement_level != -1:  # Hanya simpan frame dengan deteksi valid
-            engagement_folder = os.path.join(session_folder, "engagement", str(engagement_level))
+        # Simpan frame dengan bounding box ke folder engagement level wajah
+        # (satu salinan per level yang muncul di frame ini)
+        for level in {face.level for face in faces}:
+            engagement_folder = os.path.join(session_folder, "engagement", str(level))
             cv2.imwrite(os.path.join(engagement_folder, frame_name), annotated_frame)
 
         # Tampilkan frame pada jendela pop-out
         cv2.imshow("Preview", annotated_frame)
 
-        # Tulis hasil klasifikasi ke CSV
+        # Tulis hasil klasifikasi ke CSV: satu baris per wajah (track)
         with open(csv_file_path, mode='a', newline='') as file:
             writer = csv.writer(file)
-            writer.writerow([timestamp, formatted_time, frame_name, engagement_level, response_time])
+            for face in faces:
+                writer.writerow([timestamp, formatted_time, frame_name, face.track_id, face.level, face.confidence, response_time])
+            if not faces:
+                writer.writerow([timestamp, formatted_time, frame_name, -1, -1, 0.0, response_time])
 
         if cv2.waitKey(1) & 0xFF == ord('q'):  # Tekan 'q' untuk keluar
             break
@@ -96,34 +110,35 @@ def process_video(video_path, session_folder):
 def process_and_classify_frame(frame, frame_name, session_folder):
     rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
     result = face_mesh.process(rgb_frame)
-    engagement_level = -1  # Default nilai engagement jika tidak ada deteksi wajah
-
-    if result.multi_face_landmarks:
-        for face_landmarks in result.multi_face_landmarks:
-            # Ambil koordinat bounding box dari landmark wajah
-            h, w, _ = frame.shape
-            x_min = min([int(lm.x * w) for lm in face_landmarks.landmark])
-            x_max = max([int(lm.x * w) for lm in face_landmarks.landmark])
-            y_min = min([int(lm.y * h) for lm in face_landmarks.landmark])
-            y_max = max([int(lm.y * h) for lm in face_landmarks.landmark])
-
-            landmarks = [(lm.x, lm.y) for lm in face_landmarks.landmark]
-            flattened = [coord for point in landmarks for coord in point]
-
-            if len(flattened) == 468 * 2:
-                engagement_level = rf_model.predict([flattened])[0]  # Prediksi kelas engagement
-
-            # Gambar bounding box pada frame
-            cv2.rectangle(frame, (x_min, y_min), (x_max, y_max), (0, 255, 0), 2)
-
-            # Tampilkan teks di atas bounding box
-            text = f"Engagement: {engagement_level}"
-            cv2.putText(frame, text, (x_min, y_min - 10), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-
-    return engagement_level
 
-def annotate_frame(frame, engagement_level):
-    return frame.copy()
+    # Satu predict_proba untuk semua wajah, hasil per ID track
+    faces = multi_face.classify(result)
+
+    # Simpan potongan wajah per track dan level: tracks/track_<id>/<level>/<frame>
+    for face in faces:
+        crop = crop_face(frame, face.box)
+        if crop is not None:
+            track_folder = os.path.join(session_folder, "tracks", f"track_{face.track_id}", str(face.level))
+            os.makedirs(track_folder, exist_ok=True)
+            cv2.imwrite(os.path.join(track_folder, frame_name), crop)
+
+    return faces
+
+def annotate_frame(frame, faces):
+    """Bounding box dan teks ID track + engagement di atas tiap wajah."""
+    annotated = frame.copy()
+    h, w, _ = frame.shape
+    for face in faces:
+        x0, y0, x1, y1 = face.box
+        x_min, y_min, x_max, y_max = int(x0 * w), int(y0 * h), int(x1 * w), int(y1 * h)
+
+        # Gambar bounding box pada frame
+        cv2.rectangle(annotated, (x_min, y_min), (x_max, y_max), (0, 255, 0), 2)
+
+        # Tampilkan teks di atas bounding box
+        text = f"ID {face.track_id} Engagement: {face.level}"
+        cv2.putText(annotated, text, (x_min, y_min - 10), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+    return annotated
 
 # Fungsi untuk memulai sesi dari input UI
 def start_session_ui():
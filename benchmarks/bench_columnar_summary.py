@@ -0,0 +1,93 @@
+# ============================================================
+# Session report: csv.DictReader over the results CSV (current
+# show_report / check_results) vs columnar summarize()
+#   python benchmarks/bench_columnar_summary.py --hours 4 --fps 10
+# ============================================================
+
+import argparse
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from engagement_core.columnar import ResultColumns, load_columns, summarize, time_windows
+
+HEADER = ["Timestamp (Unix)", "Time (HH:MM:SS)", "Frame Name", "Engagement Level",
+          "Confidence Score", "Response Time", "FPS"]
+
+
+def write_session(root, n, fps):
+    rng = np.random.default_rng(0)
+    levels = rng.integers(-1, 4, n)
+    t0 = 1767225600.0
+
+    csv_path = os.path.join(root, "engagement_results.csv")
+    cols = ResultColumns(os.path.join(root, "results.cols"), flush_rows=500)
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for i in range(n):
+            ts = t0 + i / fps
+            name = f"frame_{int(ts * 1000)}.jpg"
+            writer.writerow([int(ts), time.strftime("%H:%M:%S", time.localtime(ts)),
+                             name, int(levels[i]), 0.87, 0.105, 9.5])
+            cols.append(ts, int(levels[i]), 0.87, 0.105, 9.5, name)
+    cols.close()
+    return csv_path, cols.root
+
+
+def summary_csv(csv_path):
+    counts = {"0": 0, "1": 0, "2": 0, "3": 0}
+    with open(csv_path) as f:
+        for row in csv.DictReader(f):
+            if row["Engagement Level"] in counts:
+                counts[row["Engagement Level"]] += 1
+    return counts
+
+
+def summary_columns(root):
+    return summarize(load_columns(root))["engagement_counts"]
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hours", type=float, default=4)
+    parser.add_argument("--fps", type=float, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    n = int(args.hours * 3600 * args.fps)
+    root = tempfile.mkdtemp(prefix="bench_columnar_")
+    try:
+        print(f"Writing {n} rows ({args.hours} h at {args.fps} fps) ...")
+        csv_path, cols_root = write_session(root, n, args.fps)
+
+        t_csv, by_csv = timed(lambda: summary_csv(csv_path), args.repeat)
+        t_col, by_col = timed(lambda: summary_columns(cols_root), args.repeat)
+        t_win, _ = timed(lambda: time_windows(load_columns(cols_root), 60), args.repeat)
+        assert by_csv == by_col, (by_csv, by_col)
+
+        print(f"CSV DictReader      : {t_csv * 1000:9.1f} ms")
+        print(f"columnar summarize  : {t_col * 1000:9.1f} ms  ({t_csv / t_col:.0f}x)")
+        print(f"per-minute windows  : {t_win * 1000:9.1f} ms")
+        print(f"counts: {by_col}")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# ============================================================
+# Landmark -> 936-feature row: per-landmark walk vs wire parse
+# Needs mediapipe (for the real NormalizedLandmarkList type):
+#   python benchmarks/bench_features.py --frames 5000
+# ============================================================
+
+import argparse
+import os
+import sys
+import time
+from itertools import chain, islice
+from operator import attrgetter
+
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from engagement_core.features import N_FEATURES, N_LANDMARKS, LandmarkFeatures, face_box
+
+_xy = attrgetter("x", "y")
+_x = attrgetter("x")
+_y = attrgetter("y")
+
+
+def make_face(rng, n=478):
+    """478 landmarks as FaceMesh(refine_landmarks=True) returns them."""
+    face = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z in rng.random((n, 3), dtype=np.float32):
+        lm = face.landmark.add()
+        lm.x, lm.y, lm.z = x, y, z - 0.5
+    return face
+
+
+def walk_fill(flat, face):
+    # previous LandmarkFeatures.fill: Python walk + temporary array
+    flat[:] = np.fromiter(
+        chain.from_iterable(map(_xy, islice(face.landmark, N_LANDMARKS))),
+        dtype=np.float32,
+        count=N_FEATURES
+    )
+
+
+def walk_box(face):
+    xs = np.fromiter(map(_x, face.landmark), dtype=np.float32)
+    ys = np.fromiter(map(_y, face.landmark), dtype=np.float32)
+    return float(xs.min()), float(ys.min()), float(xs.max()), float(ys.max())
+
+
+def per_call(fn, faces):
+    start = time.perf_counter()
+    for face in faces:
+        fn(face)
+    return (time.perf_counter() - start) / len(faces)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    faces = [make_face(rng) for _ in range(64)]
+    faces = [faces[i % len(faces)] for i in range(args.frames)]
+
+    features = LandmarkFeatures()
+    flat = np.empty(N_FEATURES, dtype=np.float32)
+    for face in faces[:64]:
+        walk_fill(flat, face)
+        assert np.array_equal(flat, features.fill(face)[0])
+        assert walk_box(face) == face_box(face)
+
+    cases = [
+        ("fill: landmark walk", lambda f: walk_fill(flat, f)),
+        ("fill: wire parse", features.fill),
+        ("face_box: landmark walk", walk_box),
+        ("face_box: wire parse", face_box),
+    ]
+    results = {name: per_call(fn, faces) for name, fn in cases}
+    for name, seconds in results.items():
+        print(f"{name:24s}: {seconds * 1e6:8.1f} us/frame")
+    print(f"fill speedup    : {results['fill: landmark walk'] / results['fill: wire parse']:.1f}x")
+    print(f"face_box speedup: {results['face_box: landmark walk'] / results['face_box: wire parse']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
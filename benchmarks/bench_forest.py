@@ -0,0 +1,55 @@
+# ============================================================
+# Benchmark: sklearn predict_proba vs CompiledForest
+# Run on the Pi next to the model file:
+#   python benchmarks/bench_forest.py Fix_kan.pkl
+# ============================================================
+
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from engagement_core.forest import CompiledForest
+
+
+def time_per_call(fn, rows, batch):
+    start = time.perf_counter()
+    for i in range(0, len(rows), batch):
+        fn(rows[i:i + batch])
+    return (time.perf_counter() - start) / (len(rows) / batch)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("model", nargs="?", default="Fix_kan.pkl")
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--batches", default="1,4,16")
+    args = parser.parse_args()
+
+    forest = joblib.load(args.model)
+    start = time.perf_counter()
+    compiled = CompiledForest.from_sklearn(forest)
+    print(f"[OK] {compiled.n_trees} trees, {len(compiled.feature)} nodes, "
+          f"max depth {compiled.max_depth}, compiled in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # normalized landmark coordinates live in [0, 1]
+    rng = np.random.default_rng(0)
+    rows = rng.random((args.rows, compiled.n_features_in_), dtype=np.float32)
+
+    exact = np.array_equal(forest.predict_proba(rows), compiled.predict_proba(rows))
+    print(f"identical probabilities: {exact}")
+
+    print(f"{'batch':>5} {'sklearn ms':>11} {'compiled ms':>12} {'speedup':>8}")
+    for batch in (int(b) for b in args.batches.split(",")):
+        sk = time_per_call(forest.predict_proba, rows, batch)
+        cf = time_per_call(compiled.predict_proba, rows, batch)
+        print(f"{batch:>5} {sk * 1000:>11.3f} {cf * 1000:>12.3f} {sk / cf:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# ============================================================
+# Serial after() loop vs FramePipeline, with simulated stage costs
+# (camera read, FaceMesh, imwrite + CSV + video) on real frames.
+#   python benchmarks/bench_pipeline.py --frames 200 --infer-ms 60
+# ============================================================
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from engagement_core.pipeline import FramePipeline
+
+
+def make_stages(root, args):
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    frame = cv2.GaussianBlur(frame, (9, 9), 0)  # compresses like a camera frame
+    counter = {"n": 0}
+
+    def read():
+        if counter["n"] >= args.frames:
+            return None
+        counter["n"] += 1
+        time.sleep(args.read_ms / 1000.0)  # camera delivers at its own rate
+        return counter["n"], frame
+
+    def infer(item):
+        time.sleep(args.infer_ms / 1000.0)  # FaceMesh releases the GIL too
+        return item
+
+    def persist(result):
+        i, img = result
+        cv2.imwrite(os.path.join(root, f"frame_{i}.jpg"), img)
+        with open(os.path.join(root, "results.csv"), "a") as f:
+            f.write(f"{i},2,0.9\n")
+        time.sleep(args.persist_ms / 1000.0)  # VideoWriter / slow SD card
+
+    return read, infer, persist
+
+
+def run_serial(root, args):
+    read, infer, persist = make_stages(root, args)
+    while True:
+        item = read()
+        if item is None:
+            break
+        persist(infer(item))
+
+
+def run_pipeline(root, args):
+    read, infer, persist = make_stages(root, args)
+    pipeline = FramePipeline(read, infer, persist, queue_size=args.queue_size).start()
+    while pipeline.running:
+        time.sleep(0.01)  # the Tk after() loop
+    pipeline.stop()
+    return pipeline.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--read-ms", type=float, default=10.0)
+    parser.add_argument("--infer-ms", type=float, default=60.0)
+    parser.add_argument("--persist-ms", type=float, default=15.0)
+    parser.add_argument("--queue-size", type=int, default=4)
+    args = parser.parse_args()
+
+    for name, run in [("serial", run_serial), ("pipeline", run_pipeline)]:
+        root = tempfile.mkdtemp(prefix="bench_pipeline_")
+        try:
+            start = time.perf_counter()
+            stats = run(root, args)
+            elapsed = time.perf_counter() - start
+            saved = len([f for f in os.listdir(root) if f.endswith(".jpg")])
+        finally:
+            shutil.rmtree(root)
+
+        print(f"{name:9s}: {args.frames / elapsed:6.1f} fps  "
+              f"({saved} frames saved)")
+        if stats:
+            print("           ", stats)
+
+    print(f"FaceMesh-bound limit: {1000.0 / args.infer_ms:6.1f} fps")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# ============================================================
+# Landmark input resolution ladder
+# Replays a recorded session through FaceMesh at several input
+# widths and reports, per width: landmarking latency, face
+# detection rate, and how often the model's level agrees with the
+# full-resolution run.
+#
+#   python benchmarks/bench_resolution_ladder.py \
+#       --video <session>/session_video.mp4 --model Fix_kan.pkl \
+#       --widths 640 480 320 240 160
+#   (or --frames <session>/frames for a SegmentFrameStore,
+#    or --images <folder of .jpg>)
+#
+# Needs mediapipe, so run it on the Pi / a dev machine.
+# ============================================================
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from engagement_core.features import LandmarkFeatures
+from engagement_core.inference import EngagementModel
+from engagement_core.roi import RoiFaceMesh
+from engagement_core.segments import SegmentFrameStore
+
+
+def iter_frames(args):
+    """BGR frames of the recorded session, at most args.max_frames."""
+    count = 0
+    if args.video:
+        cap = cv2.VideoCapture(args.video)
+        while count < args.max_frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            count += 1
+            yield frame
+        cap.release()
+        return
+
+    if args.frames:
+        store = SegmentFrameStore(args.frames)
+        blobs = (store.read(r) for r in store.frames())
+    else:
+        blobs = (open(p, "rb").read() for p in sorted(glob.glob(os.path.join(args.images, "*.jpg"))))
+
+    for data in blobs:
+        if count >= args.max_frames:
+            break
+        frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if frame is not None:
+            count += 1
+            yield frame
+
+
+def run_width(args, width, features):
+    mesh = RoiFaceMesh(
+        lambda: mp.solutions.face_mesh.FaceMesh(
+            static_image_mode=False,
+            max_num_faces=1,
+            refine_landmarks=args.refine
+        ),
+        enabled=args.roi,
+        input_width=width
+    )
+
+    latencies, rows, found = [], [], []
+    for frame in iter_frames(args):
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        start = time.perf_counter()
+        result = mesh.process(rgb)
+        latencies.append(time.perf_counter() - start)
+
+        vec = features.from_result(result)
+        found.append(vec is not None)
+        rows.append(vec[0].copy() if vec is not None else np.full(features.n_features, np.nan, np.float32))
+    mesh.close()
+
+    return np.array(latencies), np.array(found), np.vstack(rows) if rows else np.empty((0, features.n_features))
+
+
+def predict_levels(model, vectors, found):
+    levels = np.full(len(vectors), -1, dtype=np.int64)
+    if found.any():
+        probs = model.predict_proba(vectors[found])
+        levels[found] = model.classes[np.argmax(probs, axis=1)]
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--video")
+    source.add_argument("--frames", help="SegmentFrameStore directory")
+    source.add_argument("--images", help="folder of .jpg frames")
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--scaler")
+    parser.add_argument("--pca")
+    parser.add_argument("--widths", type=int, nargs="+", default=[480, 320, 240, 160])
+    parser.add_argument("--max-frames", type=int, default=600)
+    parser.add_argument("--refine", action="store_true", help="refine_landmarks=True (webcam apps)")
+    parser.add_argument("--roi", action="store_true", help="also enable ROI tracking")
+    args = parser.parse_args()
+
+    model = EngagementModel.load(args.model, scaler_path=args.scaler, pca_path=args.pca,
+                                 compile_forest=True)
+    features = LandmarkFeatures()
+
+    # the full-resolution run is the reference
+    ladder = [None] + [w for w in args.widths if w]
+    results = {}
+    for width in ladder:
+        latencies, found, vectors = run_width(args, width, features)
+        results[width] = (latencies, found, vectors, predict_levels(model, vectors, found))
+
+    _, ref_found, ref_vectors, ref_levels = results[None]
+    print(f"{len(ref_levels)} frames, ROI tracking {'on' if args.roi else 'off'}\n")
+    print(f"{'width':>6} {'mean ms':>8} {'p90 ms':>8} {'faces':>7} "
+          f"{'agree':>7} {'agree*':>7} {'lm err':>8}")
+
+    for width in ladder:
+        latencies, found, vectors, levels = results[width]
+        both = found & ref_found
+        lm_err = np.abs(vectors[both] - ref_vectors[both]).mean() if both.any() else float("nan")
+        print(f"{width or 'full':>6} "
+              f"{latencies.mean() * 1000:8.1f} "
+              f"{np.percentile(latencies, 90) * 1000:8.1f} "
+              f"{found.mean() * 100:6.1f}% "
+              f"{(levels == ref_levels).mean() * 100:6.1f}% "
+              f"{(levels[both] == ref_levels[both]).mean() * 100 if both.any() else 0:6.1f}% "
+              f"{lm_err:8.4f}")
+
+    print("\nagree  : same level as full resolution, no-face counted as a level")
+    print("agree* : same level on frames where both runs found a face")
+    print("lm err : mean |landmark difference| (normalized) vs full resolution")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# ============================================================
+# Per-row open/append/close (current scripts) vs SessionLogger
+#   python benchmarks/bench_session_log.py --rows 20000
+# ============================================================
+
+import argparse
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from engagement_core.session_log import SessionLogger
+
+HEADER = ["timestamp_unix", "frame", "engagement_level",
+          "confidence", "response_time", "fps"]
+
+
+def rows(n):
+    for i in range(n):
+        yield [1767225600000 + i * 100, f"frame_{i}.jpg", i % 4, 0.87, 0.105, 9.5]
+
+
+def run_per_row(path, n, fsync=False):
+    with open(path, "w", newline="") as f:
+        csv.writer(f).writerow(HEADER)
+    for row in rows(n):
+        with open(path, "a", newline="") as f:
+            csv.writer(f).writerow(row)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def run_logger(path, n, fsync=False, flush_rows=50):
+    log = SessionLogger(path, header=HEADER, flush_rows=flush_rows, fsync=fsync)
+    for row in rows(n):
+        log.log(row)
+    log.close()
+    return log.stats()
+
+
+def count_rows(path):
+    with open(path) as f:
+        return sum(1 for _ in f) - 1
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--flush-rows", type=int, default=50)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench_session_log_")
+    fsync_rows = max(args.rows // 20, 1)  # per-row fsync is slow, sample it
+    cases = [
+        ("per-row open/append", lambda p: run_per_row(p, args.rows), args.rows),
+        ("SessionLogger", lambda p: run_logger(p, args.rows, flush_rows=args.flush_rows), args.rows),
+        ("per-row + fsync", lambda p: run_per_row(p, fsync_rows, fsync=True), fsync_rows),
+        ("SessionLogger fsync", lambda p: run_logger(p, args.rows, True, args.flush_rows), args.rows),
+    ]
+
+    try:
+        for name, run, n in cases:
+            path = os.path.join(root, name.replace(" ", "_").replace("/", "_") + ".csv")
+            start = time.perf_counter()
+            stats = run(path)
+            elapsed = time.perf_counter() - start
+
+            assert count_rows(path) == n, name
+            print(f"{name:22s}: {n / elapsed:10.0f} rows/s  "
+                  f"({elapsed / n * 1e6:8.1f} us/row)"
+                  + (f"  {stats}" if stats else ""))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
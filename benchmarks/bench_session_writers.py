@@ -0,0 +1,91 @@
+# ============================================================
+# Load test: per-message open/append/close vs SessionWriterCache
+#   python benchmarks/bench_session_writers.py --rows 20000 --sessions 20
+# ============================================================
+
+import argparse
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from engagement_core.session_writers import SessionWriterCache
+
+HEADER = ["server_timestamp", "responden", "sesi", "frame",
+          "engagement_level", "fps", "response_time"]
+
+
+def make_prepare(root):
+    # same work as ensure_session_csv in the WS servers
+    def prepare(responden, sesi):
+        path = os.path.join(root, f"responden_{responden}", f"sesi_{sesi}")
+        os.makedirs(path, exist_ok=True)
+        csv_path = os.path.join(path, "engagement_metadata.csv")
+        if not os.path.exists(csv_path):
+            with open(csv_path, "w", newline="") as f:
+                csv.writer(f).writerow(HEADER)
+        return csv_path
+    return prepare
+
+
+def messages(n_rows, n_sessions):
+    for i in range(n_rows):
+        key = (f"r{i % n_sessions}", "1")
+        yield key, ["2026-01-01T00:00:00", key[0], key[1],
+                    f"frame_{i}.jpg", i % 4, 9.5, 0.105]
+
+
+def run_per_message(root, n_rows, n_sessions):
+    prepare = make_prepare(root)
+    for key, row in messages(n_rows, n_sessions):
+        with open(prepare(*key), "a", newline="") as f:
+            csv.writer(f).writerow(row)
+
+
+def run_cached(root, n_rows, n_sessions, max_open):
+    writers = SessionWriterCache(make_prepare(root), max_open=max_open)
+    for key, row in messages(n_rows, n_sessions):
+        writers.writerows(key, [row])
+    writers.close()
+
+
+def count_rows(root):
+    total = 0
+    for folder, _, files in os.walk(root):
+        for name in files:
+            with open(os.path.join(folder, name)) as f:
+                total += sum(1 for _ in f) - 1
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--max-open", type=int, default=32)
+    args = parser.parse_args()
+
+    results = {}
+    for name in ("per_message", "cached"):
+        root = tempfile.mkdtemp(prefix=f"bench_{name}_")
+        start = time.perf_counter()
+        if name == "per_message":
+            run_per_message(root, args.rows, args.sessions)
+        else:
+            run_cached(root, args.rows, args.sessions, args.max_open)
+        elapsed = time.perf_counter() - start
+
+        rows = count_rows(root)
+        shutil.rmtree(root)
+        results[name] = elapsed
+        print(f"{name:>12}: {args.rows / elapsed:>10.0f} rows/s "
+              f"({elapsed:.3f} s, {rows} rows on disk)")
+
+    print(f"speedup: {results['per_message'] / results['cached']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# ============================================================
+# Load test: ack latency of a WS ingest server under many Pi clients
+# Start a server (e.g. websocket-code/server_ws_new.py), then:
+#   python benchmarks/bench_ws_ack_latency.py ws://127.0.0.1:8000 --clients 20
+# ============================================================
+
+import argparse
+import asyncio
+import json
+import time
+
+import websockets
+
+
+async def client(url, idx, messages, interval, latencies):
+    async with websockets.connect(url) as ws:
+        for i in range(messages):
+            payload = {
+                "responden": f"load_{idx}",
+                "sesi": "bench",
+                "frame": f"frame_{i}.jpg",
+                "engagement_level": i % 4,
+                "fps": 10.0,
+                "response_time": 0.1
+            }
+            start = time.perf_counter()
+            await ws.send(json.dumps(payload))
+            await ws.recv()
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(interval)
+
+
+def percentile(sorted_values, p):
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url", nargs="?", default="ws://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--fps", type=float, default=10.0)
+    args = parser.parse_args()
+
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(args.url, i, args.messages, 1.0 / args.fps, latencies)
+        for i in range(args.clients)
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{len(latencies)} acks from {args.clients} clients in {elapsed:.1f} s")
+    for p in (50, 90, 99):
+        print(f"p{p}: {percentile(latencies, p) * 1000:.2f} ms")
+    print(f"max: {latencies[-1] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
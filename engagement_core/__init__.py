@@ -0,0 +1,4 @@
+# ============================================================
+# engagement_core
+# Shared building blocks for the Raspberry Pi / ESP32 / server scripts
+# ============================================================
@@ -0,0 +1,116 @@
+# ============================================================
+# Micro-batching inference queue
+# Concurrent Flask requests hand in one feature row each; a single
+# worker thread groups whatever arrives within a few milliseconds
+# (or up to max_batch rows) into one predict_proba call.
+# ============================================================
+
+import queue
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from engagement_core.inference import NO_FACE
+
+
+class _Pending:
+    __slots__ = ("row", "done", "result", "error")
+
+    def __init__(self, row):
+        self.row = row
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Wraps an EngagementModel. submit() blocks the calling request
+    thread until its row has been classified as part of a batch.
+
+    max_batch   : most rows per predict_proba call
+    max_wait_ms : how long the first row of a batch waits for company
+
+    Only worth it when rows really arrive concurrently, e.g. after a
+    FaceMesh per source (V2 ESP32 server). Behind a single FaceMesh
+    lock requests reach submit() one at a time, batches stay at size
+    1 and every request just pays max_wait_ms; call the model
+    directly there.
+    """
+
+    def __init__(self, model, max_batch=8, max_wait_ms=5.0):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._sizes = Counter()
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, features):
+        """(1, n_features) row (or None) -> Prediction."""
+        if features is None:
+            return NO_FACE
+
+        # the caller's buffer is reused for the next frame, keep our own copy
+        pending = _Pending(np.array(features[0], dtype=np.float32))
+        self._queue.put(pending)
+        pending.done.wait()
+
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+
+            try:
+                results = self.model.predict_batch(np.stack([p.row for p in batch]))
+                for pending, result in zip(batch, results):
+                    pending.result = result
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+
+            with self._lock:
+                self._sizes[len(batch)] += 1
+
+            for pending in batch:
+                pending.done.set()
+
+    def stats(self):
+        """Achieved batch sizes since start, for a stats endpoint."""
+        with self._lock:
+            sizes = {str(k): v for k, v in sorted(self._sizes.items())}
+
+        batches = sum(sizes.values())
+        rows = sum(int(size) * count for size, count in sizes.items())
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": batches,
+            "rows": rows,
+            "mean_batch_size": rows / batches if batches else 0.0,
+            "batch_size_histogram": sizes
+        }
@@ -0,0 +1,109 @@
+# ============================================================
+# Latest-frame capture
+# cv2.VideoCapture queues frames; when inference is slower than the
+# camera, every read() returns an older frame than the last one.
+# LatestFrameGrabber keeps grabbing on a background thread and only
+# ever hands out the newest frame, counting the ones it skipped.
+# ============================================================
+
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+class LatestFrameGrabber:
+    """
+    Drop-in for the cap.read() / cap.isOpened() / cap.release() calls
+    in the capture loops, for a webcam index or an ESP32 stream URL.
+
+    read(timeout) waits for a frame newer than the previous read and
+    returns (ok, frame, captured_at); captured_at is the time.time()
+    at which the frame came off the device. ok is False once the
+    source has ended (or nothing new arrived within timeout).
+
+    Every frame that is replaced before anybody read it counts as
+    dropped. Call note_classified(captured_at) after classifying a
+    frame: it returns that frame's capture-to-classify age in seconds
+    and adds it to the age stats in stats().
+    """
+
+    def __init__(self, source, age_window=300):
+        self.source = source
+        self.cap = cv2.VideoCapture(source)
+        # ask the backend not to queue frames either (not every backend honours it)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._captured_at = None
+        self._seq = 0
+        self._read_seq = 0
+        self._ended = False
+        self._counts = {"grabbed": 0, "delivered": 0, "dropped": 0}
+        self._ages = deque(maxlen=age_window)
+
+        self._thread = None
+        if self.cap.isOpened():
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self, timeout=2.0):
+        with self._cond:
+            if not self._cond.wait_for(
+                lambda: self._seq > self._read_seq or self._ended, timeout
+            ) or self._seq == self._read_seq:
+                return False, None, None
+
+            self._read_seq = self._seq
+            self._counts["delivered"] += 1
+            return True, self._frame, self._captured_at
+
+    def note_classified(self, captured_at):
+        age = time.time() - captured_at
+        with self._cond:
+            self._ages.append(age)
+        return age
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._counts)
+            ages = sorted(self._ages)
+
+        stats["drop_rate"] = stats["dropped"] / stats["grabbed"] if stats["grabbed"] else 0.0
+        if ages:
+            stats["age_ms_mean"] = 1000.0 * sum(ages) / len(ages)
+            stats["age_ms_p90"] = 1000.0 * ages[int(0.9 * (len(ages) - 1))]
+            stats["age_ms_max"] = 1000.0 * ages[-1]
+        return stats
+
+    def release(self):
+        with self._cond:
+            self._ended = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(2.0)
+        self.cap.release()
+
+    def _run(self):
+        while not self._ended:
+            ret, frame = self.cap.read()
+            captured_at = time.time()
+
+            with self._cond:
+                if not ret:
+                    self._ended = True
+                    self._cond.notify_all()
+                    return
+
+                if self._seq > self._read_seq:
+                    self._counts["dropped"] += 1  # previous frame never read
+                self._frame = frame
+                self._captured_at = captured_at
+                self._seq += 1
+                self._counts["grabbed"] += 1
+                self._cond.notify_all()
@@ -0,0 +1,256 @@
+# ============================================================
+# Columnar per-session results
+# One fixed-width binary file per column next to the session CSV,
+# appended in groups and read back with np.memmap, so reports are
+# a few vectorized NumPy calls instead of re-parsing the CSV.
+#
+#   python -m engagement_core.columnar summary <session>/results.cols
+#   python -m engagement_core.columnar export  <session>/results.cols out.csv
+# ============================================================
+
+import argparse
+import csv
+import os
+import threading
+
+import numpy as np
+
+COLUMNS = (
+    ("timestamp", "<f8"),       # unix seconds
+    ("level", "i1"),            # -1 = no face
+    ("confidence", "<f4"),
+    ("response_time", "<f4"),
+    ("fps", "<f4"),
+)
+NAMES_FILE = "frame.txt"        # frame names, one per line (CSV export only)
+N_LEVELS = 4
+
+
+def _column_path(root, name, dtype):
+    return os.path.join(root, f"{name}.{np.dtype(dtype).str.lstrip('<|')}")
+
+
+class ResultColumns:
+    """
+    append(timestamp, level, confidence, response_time, fps, frame)
+    buffers one row; every flush_rows rows (and on flush / close) the
+    buffered rows are appended to the column files as raw arrays.
+
+    arrays() flushes and returns the memory-mapped columns; use it
+    with summarize() / time_windows() while the session is running.
+    Reopening an existing directory continues appending unless
+    truncate=True (a session that restarts its CSV with "w").
+    """
+
+    def __init__(self, root, flush_rows=50, truncate=False):
+        self.root = root
+        self.flush_rows = flush_rows
+        os.makedirs(root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._rows = []
+        mode = "w" if truncate else "a"
+        self._files = {
+            name: open(_column_path(root, name, dtype), mode + "b")
+            for name, dtype in COLUMNS
+        }
+        self._names = open(os.path.join(root, NAMES_FILE), mode, encoding="utf-8")
+
+    def append(self, timestamp, level, confidence=0.0, response_time=0.0, fps=0.0, frame=""):
+        with self._lock:
+            self._rows.append((timestamp, level, confidence, response_time, fps, frame))
+            if len(self._rows) >= self.flush_rows:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            for f in self._files.values():
+                f.close()
+            self._names.close()
+
+    def arrays(self):
+        self.flush()
+        return load_columns(self.root)
+
+    def _flush(self):
+        if not self._rows:
+            return
+        values = list(zip(*self._rows))
+        for (name, dtype), column in zip(COLUMNS, values):
+            f = self._files[name]
+            f.write(np.asarray(column, dtype=dtype).tobytes())
+            f.flush()
+        self._names.write("".join(f"{name}\n" for name in values[-1]))
+        self._names.flush()
+        self._rows = []
+
+
+def write_columns(root, timestamp, level, confidence, response_time=None, fps=None, frames=None):
+    """Write whole arrays as a (new) column directory in one go."""
+    n = len(timestamp)
+    values = {
+        "timestamp": timestamp,
+        "level": level,
+        "confidence": confidence,
+        "response_time": np.zeros(n) if response_time is None else response_time,
+        "fps": np.zeros(n) if fps is None else fps,
+    }
+    os.makedirs(root, exist_ok=True)
+    for name, dtype in COLUMNS:
+        with open(_column_path(root, name, dtype), "wb") as f:
+            f.write(np.asarray(values[name], dtype=dtype).tobytes())
+    with open(os.path.join(root, NAMES_FILE), "w", encoding="utf-8") as f:
+        f.write("".join(f"{name}\n" for name in (frames if frames is not None else [""] * n)))
+
+
+def load_columns(root):
+    """Column name -> read-only array (memory-mapped), all the same length."""
+    raw = {}
+    for name, dtype in COLUMNS:
+        path = _column_path(root, name, dtype)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        n = size // np.dtype(dtype).itemsize
+        raw[name] = np.memmap(path, dtype=dtype, mode="r", shape=(n,)) if n else np.empty(0, dtype)
+
+    # a crash between column writes can leave one column a row ahead
+    n = min(len(a) for a in raw.values())
+    return {name: a[:n] for name, a in raw.items()}
+
+
+def _select(cols, start=None, end=None):
+    if start is None and end is None:
+        return cols
+    ts = cols["timestamp"]
+    mask = np.ones(len(ts), dtype=bool)
+    if start is not None:
+        mask &= ts >= start
+    if end is not None:
+        mask &= ts < end
+    return {name: a[mask] for name, a in cols.items()}
+
+
+def summarize(cols, start=None, end=None):
+    """
+    Counts / percentages per level over frames with a face, plus mean
+    confidence, response time and fps, optionally for [start, end).
+    """
+    cols = _select(cols, start, end)
+    level = cols["level"]
+    face = level >= 0
+
+    counts = np.bincount(level[face], minlength=N_LEVELS)
+    total = int(counts.sum())
+    ts = cols["timestamp"]
+
+    return {
+        "total_frames": total,
+        "no_face_frames": int(len(level) - total),
+        "engagement_counts": {str(i): int(c) for i, c in enumerate(counts)},
+        "engagement_percentages": {
+            str(i): float(c) / total * 100 if total else 0.0
+            for i, c in enumerate(counts)
+        },
+        "mean_confidence": float(cols["confidence"][face].mean()) if total else 0.0,
+        "mean_response_time": float(cols["response_time"].mean()) if len(level) else 0.0,
+        "mean_fps": float(cols["fps"].mean()) if len(level) else 0.0,
+        "start": float(ts.min()) if len(ts) else None,
+        "end": float(ts.max()) if len(ts) else None,
+    }
+
+
+def time_windows(cols, seconds=60.0):
+    """
+    (window_start_times, counts) with counts[w, level] = frames of that
+    level in window w, for per-minute style engagement timelines.
+    """
+    level = cols["level"]
+    face = level >= 0
+    ts = cols["timestamp"][face]
+    if not len(ts):
+        return np.empty(0), np.zeros((0, N_LEVELS), dtype=np.int64)
+
+    t0 = np.floor(ts.min() / seconds) * seconds
+    window = ((ts - t0) // seconds).astype(np.int64)
+    n_windows = int(window.max()) + 1
+
+    flat = np.bincount(
+        window * N_LEVELS + level[face].astype(np.int64),
+        minlength=n_windows * N_LEVELS
+    )
+    return t0 + seconds * np.arange(n_windows), flat.reshape(n_windows, N_LEVELS)
+
+
+CSV_HEADER = ["timestamp", "frame", "engagement_level", "confidence", "response_time", "fps"]
+
+
+def _csv_row(timestamp, frame, level, confidence, response_time, fps):
+    return [f"{timestamp:.3f}", frame, level, confidence, response_time, fps]
+
+
+def export_csv(root, csv_path, header=CSV_HEADER, make_row=_csv_row):
+    """
+    Write the columns as a CSV. make_row(timestamp, frame, level,
+    confidence, response_time, fps) -> row, so a script that only
+    keeps columns during the session can still produce the CSV
+    layout it used to write live.
+    """
+    cols = load_columns(root)
+    with open(os.path.join(root, NAMES_FILE), encoding="utf-8") as f:
+        names = f.read().splitlines()
+    n = len(cols["timestamp"])
+    names += [""] * (n - len(names))
+
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(
+            make_row(*row)
+            for row in zip(
+                cols["timestamp"].tolist(),
+                names[:n],
+                cols["level"].tolist(),
+                cols["confidence"].tolist(),
+                cols["response_time"].tolist(),
+                cols["fps"].tolist(),
+            )
+        )
+    return n
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar session results")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    s = sub.add_parser("summary", help="counts / percentages / per-window timeline")
+    s.add_argument("root")
+    s.add_argument("--window", type=float, default=0, help="also print counts per N seconds")
+
+    e = sub.add_parser("export", help="write the columns back out as CSV")
+    e.add_argument("root")
+    e.add_argument("csv_path")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        n = export_csv(args.root, args.csv_path)
+        print(f"Exported {n} rows to {args.csv_path}")
+        return
+
+    cols = load_columns(args.root)
+    print(summarize(cols))
+    if args.window:
+        starts, counts = time_windows(cols, args.window)
+        for start, row in zip(starts, counts):
+            print(f"{start:.0f}", " ".join(str(c) for c in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# ============================================================
+# Landmark -> feature vector (shared by every classify path)
+# ============================================================
+
+from itertools import chain, islice
+from operator import attrgetter
+
+import numpy as np
+
+# FaceMesh gives 468 landmarks, or 478 with refine_landmarks=True
+# (10 iris points appended at the end). The models are trained on
+# the first 468 (x, y) pairs only.
+N_LANDMARKS = 468
+N_FEATURES = N_LANDMARKS * 2  # 936
+
+# Wire format of one FaceMesh landmark inside a serialized
+# NormalizedLandmarkList (landmark.proto is proto2, so x/y/z are
+# written even when 0.0 and visibility/presence are absent):
+#   0x0a 0x0f | 0x0d <x f32> | 0x15 <y f32> | 0x1d <z f32>
+_RECORD = 17
+_X_OFFSET = 3
+_Y_OFFSET = 8
+_TAGS = ((0, 0x0a), (1, 0x0f), (2, 0x0d), (7, 0x15), (12, 0x1d))
+
+_xy = attrgetter("x", "y")
+
+
+def landmark_xy(face_landmarks, n_landmarks=None):
+    """
+    (n, 2) float32 view of the first n landmarks' (x, y), read from
+    the serialized protobuf in one C call instead of n Python
+    attribute lookups. None when the message does not have the
+    x/y/z-only layout (e.g. a stand-in object, or visibility set);
+    callers fall back to walking .landmark then.
+    """
+    serialize = getattr(face_landmarks, "SerializeToString", None)
+    if serialize is None:
+        return None
+    data = serialize()
+    n = n_landmarks if n_landmarks is not None else len(data) // _RECORD
+    if n == 0 or len(data) < n * _RECORD:
+        return None
+
+    records = np.frombuffer(data, dtype=np.uint8, count=n * _RECORD).reshape(n, _RECORD)
+    for column, tag in _TAGS:
+        if not (records[:, column] == tag).all():
+            return None
+
+    return np.ndarray(
+        (n, 2), dtype="<f4", buffer=data, offset=_X_OFFSET,
+        strides=(_RECORD, _Y_OFFSET - _X_OFFSET)
+    )
+
+
+def face_box(face_landmarks):
+    """(x0, y0, x1, y1) normalized bounding box of one FaceMesh face."""
+    xy = landmark_xy(face_landmarks)
+    if xy is None:
+        xy = np.array([_xy(p) for p in face_landmarks.landmark], dtype=np.float32)
+    x0, y0 = xy.min(axis=0)
+    x1, y1 = xy.max(axis=0)
+    return float(x0), float(y0), float(x1), float(y1)
+
+
+class LandmarkFeatures:
+    """
+    Turns one FaceMesh face into a (1, 936) float32 row.
+
+    The row lives in a buffer that is allocated once and overwritten on
+    every call, so it can go straight into predict_proba without a
+    list -> array conversion. Copy it if you need to keep it.
+    """
+
+    def __init__(self, n_landmarks=N_LANDMARKS):
+        self.n_landmarks = n_landmarks
+        self.n_features = n_landmarks * 2
+        self.buffer = np.empty((1, self.n_features), dtype=np.float32)
+        self._flat = self.buffer.reshape(-1)
+        self._pairs = self.buffer.reshape(n_landmarks, 2)
+
+    def fill(self, face_landmarks):
+        """Fill the buffer from a NormalizedLandmarkList, or return None."""
+        points = face_landmarks.landmark
+        if len(points) < self.n_landmarks:
+            return None
+
+        # protobuf floats are float32 already, so both paths are lossless
+        xy = landmark_xy(face_landmarks, self.n_landmarks)
+        if xy is not None:
+            np.copyto(self._pairs, xy)  # strided copy straight into the buffer
+        else:
+            self._flat[:] = np.fromiter(
+                chain.from_iterable(map(_xy, islice(points, self.n_landmarks))),
+                dtype=np.float32,
+                count=self.n_features
+            )
+        return self.buffer
+
+    def from_result(self, result, face_index=0):
+        """Shortcut for face_mesh.process() output; None when no face."""
+        faces = result.multi_face_landmarks
+        if not faces or len(faces) <= face_index:
+            return None
+        return self.fill(faces[face_index])
@@ -0,0 +1,136 @@
+# ============================================================
+# Compiled RandomForest evaluator
+# Flattens a fitted sklearn forest into plain NumPy arrays and walks
+# every tree in lock-step, avoiding sklearn's per-call overhead when
+# classifying one 936-feature row at a time.
+# ============================================================
+
+import joblib
+import numpy as np
+from sklearn import __version__ as _sklearn_version
+
+_LEAF = -1  # sklearn's TREE_LEAF marker in children_left / children_right
+
+# sklearn >= 1.4 stores class fractions in tree_.value and returns them
+# as-is; older versions store weighted counts and normalize per call
+_VALUE_IS_NORMALIZED = tuple(int(p) for p in _sklearn_version.split(".")[:2]) >= (1, 4)
+
+
+def is_forest(model):
+    """True for a fitted sklearn RandomForest / ExtraTrees classifier."""
+    estimators = getattr(model, "estimators_", None)
+    return bool(estimators) and hasattr(estimators[0], "tree_")
+
+
+class CompiledForest:
+    """
+    All trees of a forest packed into shared flat arrays:
+
+    feature[n]   : split feature of node n (0 for leaves)
+    threshold[n] : split threshold (+inf for leaves)
+    left[n]      : global index of the left child (leaves point to themselves)
+    right[n]     : global index of the right child (leaves point to themselves)
+    value[n]     : normalized class probabilities of node n
+    roots[t]     : global index of the root of tree t
+
+    Because leaves loop back to themselves, every row can take exactly
+    max_depth steps without checking for leaves, so all trees and all
+    rows advance together in a few vectorized NumPy operations.
+
+    predict_proba() reproduces RandomForestClassifier.predict_proba
+    bit-for-bit: X is compared as float32 like sklearn does, and the
+    per-tree probabilities are summed in tree order before dividing by
+    the number of trees.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots,
+                 max_depth, classes, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        if not is_forest(forest):
+            raise TypeError("expected a fitted RandomForestClassifier")
+        if getattr(forest, "n_outputs_", 1) != 1:
+            raise ValueError("multi-output forests are not supported")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for est in forest.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            own = np.arange(offset, offset + n, dtype=np.intp)
+            is_leaf = tree.children_left == _LEAF
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, own, tree.children_left + offset))
+            rights.append(np.where(is_leaf, own, tree.children_right + offset))
+
+            val = tree.value[:, 0, :].astype(np.float64)
+            if not _VALUE_IS_NORMALIZED:
+                # same normalization as DecisionTreeClassifier.predict_proba
+                norm = val.sum(axis=1, keepdims=True)
+                norm[norm == 0.0] = 1.0
+                val = val / norm
+            values.append(val)
+
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            classes=np.asarray(forest.classes_),
+            n_features=forest.n_features_in_
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def apply(self, X):
+        """(n, n_features) -> (n_trees, n) global leaf index per tree and row."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        rows = np.arange(X.shape[0])
+        node = np.repeat(self.roots[:, None], X.shape[0], axis=1)
+
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        return node
+
+    def predict_proba(self, X):
+        # (n_trees, n, n_classes) summed over axis 0 adds trees in order,
+        # matching sklearn's sequential accumulation
+        proba = self.value[self.apply(X)].sum(axis=0)
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def load_compiled_forest(path):
+    """joblib.load a fitted forest and compile it."""
+    return CompiledForest.from_sklearn(joblib.load(path))
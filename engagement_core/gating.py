@@ -0,0 +1,86 @@
+# ============================================================
+# Motion gating in front of FaceMesh
+# A tiny grayscale thumbnail of each frame is compared with the one
+# of the last frame that went through FaceMesh; while the picture
+# barely changes the previous classification is reused.
+# ============================================================
+
+import threading
+
+import cv2
+import numpy as np
+
+THUMB_SIZE = (32, 24)
+
+
+def thumbnail(frame, size=THUMB_SIZE):
+    """BGR (or gray) frame -> small int16 grayscale thumbnail."""
+    small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return small.astype(np.int16)
+
+
+def thumbnail_jpeg(jpeg, size=THUMB_SIZE):
+    """
+    Same from JPEG bytes, decoded at 1/8 scale in grayscale (only the
+    DC coefficients), which is far cheaper than a full decode.
+    """
+    small = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if small is None:
+        return None
+    return thumbnail(small, size)
+
+
+class MotionGate:
+    """
+    thumb = thumbnail(frame)
+    result = gate.reuse(thumb, timestamp)
+    if result is None:
+        result = classify(frame)
+        gate.update(thumb, timestamp, result)
+
+    reuse() returns the stored result while the mean absolute gray
+    difference to the last processed thumbnail stays below threshold
+    (0-255 scale) and that result is younger than max_age seconds;
+    otherwise None, and the caller runs FaceMesh. threshold=0 turns
+    the gate off. stats() gives processed / skipped counts.
+    """
+
+    def __init__(self, threshold=4.0, max_age=2.0):
+        self.threshold = threshold
+        self.max_age = max_age
+
+        self._lock = threading.Lock()
+        self._thumb = None
+        self._time = None
+        self._result = None
+        self._counts = {"processed": 0, "skipped": 0, "changed": 0, "expired": 0}
+
+    def reuse(self, thumb, timestamp):
+        with self._lock:
+            if not self.threshold or thumb is None or self._thumb is None:
+                return None
+            if timestamp - self._time >= self.max_age:
+                self._counts["expired"] += 1
+                return None
+            if np.abs(thumb - self._thumb).mean() > self.threshold:
+                self._counts["changed"] += 1
+                return None
+            self._counts["skipped"] += 1
+            return self._result
+
+    def update(self, thumb, timestamp, result):
+        with self._lock:
+            self._counts["processed"] += 1
+            if thumb is not None:
+                self._thumb = thumb
+                self._time = timestamp
+                self._result = result
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts)
+        total = stats["processed"] + stats["skipped"]
+        stats["skip_rate"] = stats["skipped"] / total if total else 0.0
+        return stats
@@ -0,0 +1,89 @@
+# ============================================================
+# Inference wrapper (RF / MLP / Logistic Regression)
+# One predict_proba pass per call, one result shape for all models
+# ============================================================
+
+from collections import namedtuple
+
+import joblib
+import numpy as np
+
+from engagement_core.forest import CompiledForest, is_forest
+
+# level      : predicted class (int), -1 when there is nothing to classify
+# confidence : probability of that class
+# probs      : full probability vector, ordered like model.classes_
+Prediction = namedtuple("Prediction", ["level", "confidence", "probs"])
+
+NO_FACE = Prediction(-1, 0.0, None)
+
+
+class EngagementModel:
+    """
+    Wraps a fitted classifier plus its optional preprocessing
+    (scaler, PCA) so every script gets level and confidence from a
+    single predict_proba call.
+
+    predict() is what RandomForest.predict() does internally
+    (argmax over predict_proba), so the level is identical to calling
+    predict and predict_proba back to back, at half the cost.
+    """
+
+    def __init__(self, model, scaler=None, pca=None):
+        self.model = model
+        self.scaler = scaler
+        self.pca = pca
+        self.classes = np.asarray(model.classes_)
+
+    @classmethod
+    def load(cls, model_path, scaler_path=None, pca_path=None,
+             compile_forest=False):
+        """
+        joblib.load the model (and preprocessing). With compile_forest=True
+        a RandomForest is swapped for the array-backed CompiledForest,
+        which gives the same probabilities at a fraction of the per-call
+        cost; other model types are left as they are.
+        """
+        model = joblib.load(model_path)
+        if compile_forest and is_forest(model):
+            model = CompiledForest.from_sklearn(model)
+
+        return cls(
+            model,
+            scaler=joblib.load(scaler_path) if scaler_path else None,
+            pca=joblib.load(pca_path) if pca_path else None
+        )
+
+    def _prepare(self, X):
+        if self.scaler is not None:
+            X = self.scaler.transform(X)
+        if self.pca is not None:
+            X = self.pca.transform(X)
+        return X
+
+    def predict_proba(self, X):
+        """(n, 936) features -> (n, n_classes) probabilities."""
+        return self.model.predict_proba(self._prepare(X))
+
+    def predict(self, features):
+        """One (1, 936) row (or None) -> Prediction."""
+        if features is None:
+            return NO_FACE
+
+        probs = self.predict_proba(features)[0]
+        best = int(np.argmax(probs))
+        return Prediction(int(self.classes[best]), float(probs[best]), probs)
+
+    def predict_batch(self, X):
+        """(n, 936) rows -> list of Prediction, one model call for all rows."""
+        if len(X) == 0:
+            return []
+
+        probs = self.predict_proba(X)
+        best = np.argmax(probs, axis=1)
+        levels = self.classes[best]
+        confs = probs[np.arange(len(best)), best]
+        return [
+            Prediction(int(lvl), float(c), p)
+            for lvl, c, p in zip(levels, confs, probs)
+        ]
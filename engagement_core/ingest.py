@@ -0,0 +1,118 @@
+# ============================================================
+# ESP32 upload ingest
+# Decode JPEG request bodies in memory and push the raw bytes to
+# disk from a background thread, so the request path never waits
+# on the SD card.
+# ============================================================
+
+import os
+import queue
+import threading
+
+import cv2
+import numpy as np
+
+# FaceMesh landmarks are normalized to [0, 1], so a frame decoded at
+# 1/2 or 1/4 scale still produces the same 936-feature contract
+_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+
+
+def decode_jpeg(data, scale=1):
+    """
+    JPEG bytes -> BGR frame (or None). np.frombuffer wraps the request
+    body without copying it; scale=2/4/8 lets libjpeg decode at reduced
+    size, which is much cheaper than decoding full size and resizing.
+    """
+    if scale not in _DECODE_FLAGS:
+        raise ValueError(f"scale must be one of {sorted(_DECODE_FLAGS)}")
+    if not data:
+        return None
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), _DECODE_FLAGS[scale])
+
+
+class AsyncFileWriter:
+    """
+    Writes (path, bytes) jobs on a background thread.
+
+    The queue is bounded: when the disk falls max_pending files behind,
+    write() blocks instead of silently dropping frames.
+
+    links are extra paths that should show the same file (e.g. the
+    engagement/<level>/ view). They are hard-linked to path once it is
+    written, so the bytes hit the disk only once; if the filesystem
+    refuses hard links the bytes are written again instead.
+    """
+
+    def __init__(self, max_pending=256):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._counts = {"files": 0, "bytes": 0, "links": 0, "copies": 0}
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        counts["pending"] = self.pending
+        return counts
+
+    def write(self, path, data, links=()):
+        self._queue.put((path, data, links))
+
+    def flush(self):
+        """Block until everything queued so far is on disk."""
+        self._queue.join()
+
+    def close(self):
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+
+            path, data, links = job
+            try:
+                self._write(path, data)
+                for link in links:
+                    self._link(path, link, data)
+            except OSError as e:
+                print("⚠️ Frame write error:", path, e)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, path, data):
+        with open(path, "wb") as f:
+            f.write(data)
+        with self._lock:
+            self._counts["files"] += 1
+            self._counts["bytes"] += len(data)
+
+    def _link(self, path, link, data):
+        try:
+            os.link(path, link)
+        except FileExistsError:
+            os.remove(link)
+            os.link(path, link)
+        except OSError:
+            # e.g. a FAT-formatted USB stick: fall back to a second copy
+            self._write(link, data)
+            with self._lock:
+                self._counts["copies"] += 1
+            return
+        with self._lock:
+            self._counts["links"] += 1
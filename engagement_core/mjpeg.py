@@ -0,0 +1,208 @@
+# ============================================================
+# MJPEG AVI muxer for frames that already arrive as JPEG
+# (ESP32-CAM uploads). The JPEG bytes are appended to the AVI as
+# they are: no decode, no re-encode, one sequential write per frame.
+# ============================================================
+
+import csv
+import os
+import struct
+import threading
+
+AVIF_HASINDEX = 0x10
+AVIIF_KEYFRAME = 0x10
+
+# RIFF AVI 1.0 keeps 32-bit offsets; start a new part well before that
+MAX_PART_BYTES = 1 << 30
+
+# where the avih / strh payloads start in the header written below:
+# RIFF(12) + LIST hdrl(12) + avih(8) | avih(56) + LIST strl(12) + strh(8)
+_AVIH_AT = 32
+_STRH_AT = _AVIH_AT + 56 + 12 + 8
+
+
+def jpeg_size(data):
+    """(width, height) from the SOF marker of a JPEG, or None."""
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        length = struct.unpack(">H", data[i + 2:i + 4])[0]
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        i += 2 + length
+    return None
+
+
+class MjpegAviWriter:
+    """
+    append(jpeg, timestamp) writes one frame; close() writes the idx1
+    index and patches the header sizes.
+
+    The AVI has a constant frame rate `fps`. Frames are placed by
+    their capture timestamp: gaps are filled with zero-length frames
+    (players repeat the previous picture, 8 bytes each), and a frame
+    that arrives before its slot is free is skipped, so the video
+    plays at wall-clock speed. <video>_timestamps.csv maps every
+    stored frame to its video frame index and capture time.
+
+    Width / height come from the first JPEG. Files that would grow
+    past max_part_bytes continue in <video>_1.avi, <video>_2.avi, ...
+    append() is safe to call from several request threads.
+    """
+
+    def __init__(self, path, fps=10, max_part_bytes=MAX_PART_BYTES):
+        self.path = path
+        self.fps = fps
+        self.max_part_bytes = max_part_bytes
+
+        self._lock = threading.Lock()
+        self._size = None
+        self._file = None
+        self._part = 0
+        self._start = None
+        self._written = 0  # video frames (incl. empty ones) in all parts
+        self._closed = False
+        self._counts = {"frames": 0, "skipped": 0, "filled": 0, "bytes": 0, "parts": 0}
+
+        base, _ = os.path.splitext(path)
+        self._ts_file = open(base + "_timestamps.csv", "w", newline="")
+        self._ts_writer = csv.writer(self._ts_file)
+        self._ts_writer.writerow(["video_frame", "capture_timestamp", "frame"])
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def append(self, jpeg, timestamp, name=""):
+        with self._lock:
+            if self._closed:
+                return False
+            if self._file is None:
+                self._size = self._size or jpeg_size(jpeg)
+                if self._size is None:
+                    self._counts["skipped"] += 1
+                    return False
+                self._open_part()
+            if self._start is None:
+                self._start = timestamp
+
+            target = int(round((timestamp - self._start) * self.fps))
+            if target < self._written:
+                self._counts["skipped"] += 1
+                return False
+
+            while self._written < target:
+                self._chunk(b"")
+                self._counts["filled"] += 1
+
+            if self._movi_bytes + len(jpeg) + 8 > self.max_part_bytes:
+                self._close_part()
+                self._open_part()
+
+            self._ts_writer.writerow([self._written, f"{timestamp:.3f}", name])
+            self._chunk(jpeg)
+            self._counts["frames"] += 1
+            self._counts["bytes"] += len(jpeg)
+            return True
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._file is not None:
+                self._close_part()
+            self._ts_file.close()
+
+    # ---------------- RIFF writing ----------------
+
+    def _part_path(self):
+        if self._part == 0:
+            return self.path
+        base, ext = os.path.splitext(self.path)
+        return f"{base}_{self._part}{ext}"
+
+    def _open_part(self):
+        width, height = self._size
+        f = open(self._part_path(), "wb", buffering=1 << 20)
+
+        avih = struct.pack(
+            "<14I",
+            int(1e6 / self.fps), 0, 0, AVIF_HASINDEX,
+            0, 0, 1, 0, width, height, 0, 0, 0, 0
+        )
+        strh = b"vidsMJPG" + struct.pack(
+            "<IHHIIIIIIiI4h",
+            0, 0, 0, 0, 1000, int(round(self.fps * 1000)), 0, 0, 0, -1, 0,
+            0, 0, width, height
+        )
+        strf = struct.pack(
+            "<IiiHH4sIiiII",
+            40, width, height, 1, 24, b"MJPG", width * height * 3, 0, 0, 0, 0
+        )
+        strl = (b"strl"
+                + b"strh" + struct.pack("<I", len(strh)) + strh
+                + b"strf" + struct.pack("<I", len(strf)) + strf)
+        hdrl = (b"hdrl"
+                + b"avih" + struct.pack("<I", len(avih)) + avih
+                + b"LIST" + struct.pack("<I", len(strl)) + strl)
+
+        f.write(b"RIFF" + struct.pack("<I", 0) + b"AVI ")
+        f.write(b"LIST" + struct.pack("<I", len(hdrl)) + hdrl)
+
+        self._movi_size_at = f.tell() + 4
+        f.write(b"LIST" + struct.pack("<I", 0) + b"movi")
+        self._movi_start = f.tell() - 4  # idx1 offsets count from "movi"
+        self._movi_bytes = 4
+
+        self._file = f
+        self._index = []
+        self._part_frames = 0
+        self._max_chunk = 0
+        self._counts["parts"] += 1
+
+    def _chunk(self, data):
+        size = len(data)
+        pad = size & 1
+        offset = self._file.tell() - self._movi_start
+        self._file.write(b"00dc" + struct.pack("<I", size))
+        if size:
+            self._file.write(data)
+        if pad:
+            self._file.write(b"\0")
+
+        self._index.append((offset, size))
+        self._movi_bytes += 8 + size + pad
+        self._part_frames += 1
+        self._max_chunk = max(self._max_chunk, size)
+        self._written += 1
+
+    def _close_part(self):
+        f = self._file
+        f.write(b"idx1" + struct.pack("<I", 16 * len(self._index)))
+        f.write(b"".join(
+            b"00dc" + struct.pack("<III", AVIIF_KEYFRAME if size else 0, offset, size)
+            for offset, size in self._index
+        ))
+        end = f.tell()
+
+        for pos, value in (
+            (4, end - 8),                         # RIFF size
+            (self._movi_size_at, self._movi_bytes),
+            (_AVIH_AT + 16, self._part_frames),   # dwTotalFrames
+            (_AVIH_AT + 28, self._max_chunk),     # dwSuggestedBufferSize
+            (_STRH_AT + 32, self._part_frames),   # dwLength
+            (_STRH_AT + 36, self._max_chunk),     # dwSuggestedBufferSize
+        ):
+            f.seek(pos)
+            f.write(struct.pack("<I", value))
+        f.close()
+
+        self._file = None
+        self._part += 1
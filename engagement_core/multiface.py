@@ -0,0 +1,159 @@
+# ============================================================
+# Multi-face (classroom) mode
+# Every face FaceMesh returns goes into one (n, 936) matrix and one
+# predict_proba call; faces keep a stable track id across frames
+# through IoU / centroid matching of their landmark boxes.
+# ============================================================
+
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from engagement_core.features import LandmarkFeatures, face_box
+
+# track_id : stable id of the face across frames
+# box      : (x0, y0, x1, y1) normalized landmark bounding box
+FaceResult = namedtuple("FaceResult", ["track_id", "level", "confidence", "box"])
+
+
+def _iou(a, b):
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    if w <= 0 or h <= 0:
+        return 0.0
+    inter = w * h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _centre_distance(a, b):
+    return np.hypot((a[0] + a[2] - b[0] - b[2]) / 2, (a[1] + a[3] - b[1] - b[3]) / 2)
+
+
+def crop_face(frame, box, margin=0.2):
+    """Pixels of one face (landmark box + margin per side), or None."""
+    h, w = frame.shape[:2]
+    x0, y0, x1, y1 = box
+    mx, my = (x1 - x0) * margin, (y1 - y0) * margin
+    x0, x1 = int(max(x0 - mx, 0) * w), int(min(x1 + mx, 1) * w)
+    y0, y1 = int(max(y0 - my, 0) * h), int(min(y1 + my, 1) * h)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return frame[y0:y1, x0:x1]
+
+
+class FaceTracker:
+    """
+    update(boxes) -> one track id per box.
+
+    Boxes are matched to the tracks of earlier frames greedily, best
+    IoU first (>= iou_threshold), then by centre distance (<=
+    max_distance, normalized) for faces that moved more than their
+    size. Unmatched boxes start a new id; a track that is not seen
+    for max_missed frames is dropped.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_distance=0.1, max_missed=10):
+        self.iou_threshold = iou_threshold
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+
+        self._lock = threading.Lock()
+        self._tracks = {}  # id -> [box, frames missed]
+        self._next_id = 0
+
+    def update(self, boxes):
+        with self._lock:
+            ids = [None] * len(boxes)
+            free = set(self._tracks)
+
+            pairs = sorted(
+                ((_iou(box, track[0]), i, tid)
+                 for i, box in enumerate(boxes) for tid, track in self._tracks.items()),
+                reverse=True
+            )
+            for score, i, tid in pairs:
+                if score < self.iou_threshold:
+                    break
+                if ids[i] is None and tid in free:
+                    ids[i] = tid
+                    free.discard(tid)
+
+            pairs = sorted(
+                (_centre_distance(boxes[i], self._tracks[tid][0]), i, tid)
+                for i in range(len(boxes)) if ids[i] is None for tid in free
+            )
+            for dist, i, tid in pairs:
+                if dist > self.max_distance:
+                    break
+                if ids[i] is None and tid in free:
+                    ids[i] = tid
+                    free.discard(tid)
+
+            for i, box in enumerate(boxes):
+                if ids[i] is None:
+                    ids[i] = self._next_id
+                    self._next_id += 1
+                self._tracks[ids[i]] = [box, 0]
+
+            for tid in free:
+                self._tracks[tid][1] += 1
+                if self._tracks[tid][1] > self.max_missed:
+                    del self._tracks[tid]
+
+            return ids
+
+    def active(self):
+        with self._lock:
+            return sorted(self._tracks)
+
+
+class MultiFaceClassifier:
+    """
+    faces = multi.classify(face_mesh.process(rgb))
+
+    predict_rows takes the (n, 936) matrix and returns one Prediction
+    per row, e.g. model.predict_batch.
+
+    For threaded servers, call extract() while holding the FaceMesh
+    lock (it copies the rows out of the shared buffer and updates the
+    tracker, so tracks follow frame order) and label() after
+    releasing it.
+    """
+
+    def __init__(self, predict_rows, max_faces=5, tracker=None):
+        self.predict_rows = predict_rows
+        self.tracker = tracker or FaceTracker()
+        self.features = LandmarkFeatures()
+        self._rows = np.empty((max_faces, self.features.n_features), dtype=np.float32)
+
+    def extract(self, result):
+        """FaceMesh result -> ((n, 936) rows, boxes, track ids) for every usable face."""
+        boxes = []
+        for face in (result.multi_face_landmarks or [])[:len(self._rows)]:
+            row = self.features.fill(face)
+            if row is not None:
+                self._rows[len(boxes)] = row[0]
+                boxes.append(face_box(face))
+        # empty frames age the tracks too
+        ids = self.tracker.update(boxes)
+        return self._rows[:len(boxes)].copy(), boxes, ids
+
+    def label(self, rows, boxes, ids=None):
+        """One model call for all rows -> [FaceResult].
+
+        ids=None asks the tracker here (single-threaded callers).
+        """
+        if ids is None:
+            ids = self.tracker.update(boxes)
+        if not boxes:
+            return []
+        predictions = self.predict_rows(rows)
+        return [
+            FaceResult(tid, p.level, p.confidence, box)
+            for tid, p, box in zip(ids, predictions, boxes)
+        ]
+
+    def classify(self, result):
+        return self.label(*self.extract(result))
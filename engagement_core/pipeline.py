@@ -0,0 +1,128 @@
+# ============================================================
+# Threaded capture -> inference -> persistence pipeline
+# Each stage runs on its own thread, connected by small bounded
+# queues, so the frame rate is limited by the slowest stage
+# (FaceMesh) instead of the sum of all of them. The Tk thread only
+# renders the latest result.
+# ============================================================
+
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class FramePipeline:
+    """
+    read()         -> item, or None when the source is finished
+                      (capture thread, e.g. cap.read() + timestamp)
+    infer(item)    -> result   (inference thread, FaceMesh + model)
+    persist(result)            (persistence thread, image / CSV /
+                                video / network)
+
+    Queues hold at most queue_size items; a full queue makes the
+    stage before it wait, so memory stays bounded when the disk is
+    slow. latest() returns the newest inference result (or None) and
+    is meant to be polled from the Tk after() loop.
+
+    stop() ends capture, then lets everything already captured pass
+    through inference and persistence before it returns, so files
+    can be closed right after it.
+    """
+
+    def __init__(self, read, infer, persist, queue_size=4):
+        self.read = read
+        self.infer = infer
+        self.persist = persist
+
+        self._infer_queue = queue.Queue(maxsize=queue_size)
+        self._persist_queue = queue.Queue(maxsize=queue_size)
+        self._stopping = threading.Event()
+
+        self._latest = None
+        self._lock = threading.Lock()
+        self._counts = {"captured": 0, "inferred": 0, "persisted": 0, "errors": 0}
+
+        self._threads = [
+            threading.Thread(target=self._capture_loop, daemon=True),
+            threading.Thread(target=self._infer_loop, daemon=True),
+            threading.Thread(target=self._persist_loop, daemon=True)
+        ]
+        self._started = time.monotonic()
+
+    def start(self):
+        self._started = time.monotonic()
+        for t in self._threads:
+            t.start()
+        return self
+
+    def latest(self):
+        return self._latest
+
+    @property
+    def running(self):
+        return self._threads[1].is_alive()
+
+    def stop(self, timeout=10.0):
+        self._stopping.set()
+        for t in self._threads:
+            if t.is_alive():
+                t.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts)
+        elapsed = time.monotonic() - self._started
+        stats["fps"] = stats["inferred"] / elapsed if elapsed > 0 else 0.0
+        stats["infer_queue"] = self._infer_queue.qsize()
+        stats["persist_queue"] = self._persist_queue.qsize()
+        return stats
+
+    # ---------------- stages ----------------
+
+    def _count(self, key):
+        with self._lock:
+            self._counts[key] += 1
+
+    def _capture_loop(self):
+        try:
+            while not self._stopping.is_set():
+                item = self.read()
+                if item is None:
+                    break
+                self._count("captured")
+                self._infer_queue.put(item)
+        finally:
+            # the downstream stages always drain, so these puts can't hang
+            self._infer_queue.put(_STOP)
+
+    def _infer_loop(self):
+        while True:
+            item = self._infer_queue.get()
+            if item is _STOP:
+                break
+            try:
+                result = self.infer(item)
+            except Exception as e:
+                print("⚠️ Inference error:", e)
+                self._count("errors")
+                continue
+
+            self._latest = result
+            self._count("inferred")
+            self._persist_queue.put(result)
+
+        self._persist_queue.put(_STOP)
+
+    def _persist_loop(self):
+        while True:
+            result = self._persist_queue.get()
+            if result is _STOP:
+                break
+            try:
+                self.persist(result)
+                self._count("persisted")
+            except Exception as e:
+                print("⚠️ Persist error:", e)
+                self._count("errors")
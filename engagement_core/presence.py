@@ -0,0 +1,54 @@
+# ============================================================
+# Face-presence pre-check
+# A Haar cascade on a small grayscale copy of the frame decides
+# whether FaceMesh is worth running at all (empty seat, respondent
+# turned away). Costs a few ms on the Pi instead of a full
+# landmark pass.
+# ============================================================
+
+import os
+from collections import namedtuple
+
+import cv2
+
+CASCADE = "haarcascade_frontalface_default.xml"
+
+# what face_mesh.process() returns when there is no face
+NoFaceResult = namedtuple("NoFaceResult", ["multi_face_landmarks"])
+NO_FACE_RESULT = NoFaceResult(None)
+
+
+class FacePresence:
+    """
+    presence(rgb) -> True when the cascade sees a face.
+
+    The frame is downscaled to `width` first; min_size is the smallest
+    face as a fraction of that width. The cascade only knows frontal
+    faces, so callers should still run FaceMesh now and then on a
+    "no" (RoiFaceMesh does that every verify_every frames).
+    """
+
+    def __init__(self, width=160, min_size=0.15, scale_factor=1.2, min_neighbors=3,
+                 cascade_path=None):
+        self.width = width
+        self.min_size = max(int(width * min_size), 12)
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+
+        path = cascade_path or os.path.join(cv2.data.haarcascades, CASCADE)
+        self.cascade = cv2.CascadeClassifier(path)
+        if self.cascade.empty():
+            raise IOError(f"Could not load face cascade {path}")
+
+    def __call__(self, rgb):
+        h, w = rgb.shape[:2]
+        small = cv2.resize(rgb, (self.width, round(h * self.width / w)),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.equalizeHist(cv2.cvtColor(small, cv2.COLOR_RGB2GRAY))
+        faces = self.cascade.detectMultiScale(
+            gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=(self.min_size, self.min_size)
+        )
+        return len(faces) > 0
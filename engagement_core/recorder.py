@@ -0,0 +1,205 @@
+# ============================================================
+# Session video recording in a separate process
+# mp4v encoding competes with FaceMesh for the same core when it
+# runs inside the capture loop. VideoRecorder hands frames to an
+# encoder process through a shared-memory ring and only does a
+# memcpy per frame itself.
+#
+# The encoder is this file run as a script, started with
+# subprocess, so the Tk apps are never re-imported or forked.
+# ============================================================
+
+import csv
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+
+
+class VideoRecorder:
+    """
+    Drop-in for cv2.VideoWriter(path, fourcc, fps, size) in the
+    session loops: write(frame, timestamp) + release().
+
+    The constructor waits (up to ready_timeout seconds) until the
+    encoder process has started and opened the file, so the first
+    frames of a session are not lost to interpreter / cv2 start-up.
+
+    The ring has `slots` frame buffers. When the encoder falls behind
+    and every slot is still waiting to be encoded, write() drops the
+    new frame and returns False; the video then holds the previous
+    frame a little longer instead of the capture loop waiting.
+    Drops are counted in stats() and the first one is printed.
+
+    timestamp is the capture time (time.time()) of the frame. The
+    encoder repeats or skips frames so the constant-fps file plays
+    at wall-clock speed however irregular the loop rate is, and
+    writes <video>_timestamps.csv (output frame index, capture time)
+    next to the video.
+    """
+
+    def __init__(self, path, fps=10, size=(640, 480), fourcc="mp4v", slots=8,
+                 ready_timeout=30.0):
+        self.path = path
+        self.fps = fps
+        self.size = size
+        self.slots = slots
+
+        width, height = size
+        frame_bytes = width * height * 3
+        self._shm = shared_memory.SharedMemory(create=True, size=frame_bytes * slots)
+        self._frames = np.ndarray((slots, height, width, 3), dtype=np.uint8, buffer=self._shm.buf)
+
+        self._free = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+        self._counts = {"frames": 0, "dropped": 0}
+        self._closed = False
+        self._ready = threading.Event()
+        self._started = False
+
+        self._proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__),
+             path, str(fps), str(width), str(height), fourcc,
+             self._shm.name, str(slots)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            text=True, bufsize=1
+        )
+        self._reader = threading.Thread(target=self._read_free_slots, daemon=True)
+        self._reader.start()
+
+        started = time.monotonic()
+        if not self._ready.wait(ready_timeout):
+            print(f"⚠️ Video encoder not ready after {ready_timeout:.0f} s, frames may be dropped")
+        elif not self._started:
+            self.release()
+            raise RuntimeError(f"Video encoder for {path} exited with code {self._proc.returncode}")
+        self.startup = time.monotonic() - started
+
+    @property
+    def pending(self):
+        return self.slots - self._free.qsize()
+
+    def stats(self):
+        stats = dict(self._counts)
+        offered = stats["frames"] + stats["dropped"]
+        stats["drop_rate"] = stats["dropped"] / offered if offered else 0.0
+        stats["pending"] = self.pending
+        stats["startup_s"] = self.startup
+        return stats
+
+    def write(self, frame, timestamp=None):
+        if self._closed:
+            return False
+        try:
+            slot = self._free.get_nowait()
+        except queue.Empty:
+            if not self._counts["dropped"]:
+                print("⚠️ Video encoder behind, dropping frames (see stats())")
+            self._counts["dropped"] += 1
+            return False
+
+        if (frame.shape[1], frame.shape[0]) != self.size:
+            frame = cv2.resize(frame, self.size)
+        np.copyto(self._frames[slot], frame)
+
+        if timestamp is None:
+            timestamp = time.time()
+        try:
+            self._proc.stdin.write(f"{slot} {timestamp!r}\n")
+        except (BrokenPipeError, ValueError):
+            print("⚠️ Video encoder stopped, frames are no longer recorded")
+            self._closed = True
+            return False
+
+        self._counts["frames"] += 1
+        return True
+
+    def release(self):
+        """Encode everything still queued, then close the file."""
+        if not self._closed:
+            self._closed = True
+            try:
+                self._proc.stdin.write(f"end {time.time()!r}\n")
+                self._proc.stdin.close()
+            except (BrokenPipeError, ValueError):
+                pass
+        self._proc.wait()
+        self._reader.join(1.0)
+
+        del self._frames
+        self._shm.close()
+        self._shm.unlink()
+
+    def _read_free_slots(self):
+        for line in self._proc.stdout:
+            if line.strip() == "ready":
+                self._started = True
+                self._ready.set()
+            else:
+                self._free.put(int(line))
+        self._ready.set()  # encoder gone; don't leave the constructor waiting
+
+
+# ============================================================
+# ENCODER PROCESS
+# ============================================================
+
+def _encode(path, fps, width, height, fourcc, shm_name, slots):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    # the recorder owns the segment; keep this process's tracker from unlinking it
+    resource_tracker.unregister(shm._name, "shared_memory")
+    frames = np.ndarray((slots, height, width, 3), dtype=np.uint8, buffer=shm.buf)
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+    ts_file = open(os.path.splitext(path)[0] + "_timestamps.csv", "w", newline="")
+    ts_writer = csv.writer(ts_file)
+    ts_writer.writerow(["video_frame", "capture_timestamp"])
+    print("ready", flush=True)
+
+    start = None     # capture time of the first frame = video time 0
+    written = 0      # frames in the file so far
+    held = None      # (slot, timestamp) shown until the next frame's time
+
+    def write_held(until):
+        # repeat the held frame up to the video frame that belongs to `until`
+        nonlocal written
+        slot, ts = held
+        target = int(round((until - start) * fps))
+        if target > written:
+            ts_writer.writerow([written, f"{ts:.3f}"])
+        while written < target:
+            writer.write(frames[slot])
+            written += 1
+
+    for line in sys.stdin:
+        tag, ts = line.split()
+        ts = float(ts)
+
+        if tag == "end":
+            if held is not None:
+                write_held(max(ts, held[1] + 1.0 / fps))
+            break
+
+        if start is None:
+            start = ts
+        if held is not None:
+            write_held(ts)
+            print(held[0], flush=True)  # slot can be reused
+        held = (int(tag), ts)
+
+    writer.release()
+    ts_file.close()
+    del frames
+    shm.close()
+
+
+if __name__ == "__main__":
+    _path, _fps, _w, _h, _fourcc, _shm_name, _slots = sys.argv[1:]
+    _encode(_path, float(_fps), int(_w), int(_h), _fourcc, _shm_name, int(_slots))
@@ -0,0 +1,130 @@
+# ============================================================
+# Bulk re-scoring from stored landmark vectors
+# Re-labels old sessions with another model (retuned forest, MLP,
+# logreg + scaler / PCA) straight from <session>/vectors/, without
+# FaceMesh. One process per session, large predict_proba batches.
+#
+#   python -m engagement_core.rescore <archive or session> \
+#       --model Fix_kan_v2.pkl [--scaler ...] [--pca ...] [--tag v2]
+#
+# Each session gets <session>/results_<tag>.cols next to the old
+# results (engagement_core.columnar format, one row per vector) plus
+# frame_id.i8: the vector store's frame key (the ms value in the
+# frame names and in V2's results.csv), for joining with the old rows.
+# ============================================================
+
+import argparse
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from engagement_core.columnar import summarize, write_columns
+from engagement_core.inference import EngagementModel
+from engagement_core.vectors import find_sessions, load_vectors
+
+BATCH_ROWS = 8192
+FRAME_ID_FILE = "frame_id.i8"
+
+_model = None  # one per worker process
+
+
+def _init_worker(model_path, scaler_path, pca_path):
+    global _model
+    _model = EngagementModel.load(
+        model_path, scaler_path=scaler_path, pca_path=pca_path, compile_forest=True
+    )
+
+
+def score(model, vectors, batch_rows=BATCH_ROWS):
+    """(n, 936) -> (levels, confidences), batch_rows rows per model call."""
+    levels = np.empty(len(vectors), dtype=np.int8)
+    confidences = np.empty(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), batch_rows):
+        probs = model.predict_proba(vectors[start:start + batch_rows])
+        best = np.argmax(probs, axis=1)
+        levels[start:start + len(best)] = model.classes[best]
+        confidences[start:start + len(best)] = probs[np.arange(len(best)), best]
+    return levels, confidences
+
+
+def rescore_session(vector_dir, tag, model, batch_rows=BATCH_ROWS):
+    """Score one vectors/ folder with model, write results_<tag>.cols."""
+    start = time.perf_counter()
+    data = load_vectors(vector_dir)
+    levels, confidences = score(model, data["vectors"], batch_rows)
+
+    out = os.path.join(os.path.dirname(vector_dir), f"results_{tag}.cols")
+    write_columns(
+        out, data["timestamp"], levels, confidences,
+        frames=[str(i) for i in data["frame_id"]]
+    )
+    with open(os.path.join(out, FRAME_ID_FILE), "wb") as f:
+        f.write(np.asarray(data["frame_id"], dtype="<i8").tobytes())
+
+    n = len(levels)
+    return {
+        "session": os.path.dirname(vector_dir),
+        "rows": n,
+        "agreement": float((levels == data["level"]).mean() * 100) if n else 0.0,
+        "counts": summarize({
+            "timestamp": data["timestamp"], "level": levels, "confidence": confidences,
+            "response_time": np.zeros(n), "fps": np.zeros(n),
+        })["engagement_counts"],
+        "seconds": time.perf_counter() - start,
+        "output": out,
+    }
+
+
+def load_frame_ids(root):
+    """frame_id per row of a results_<tag>.cols directory."""
+    return np.fromfile(os.path.join(root, FRAME_ID_FILE), dtype="<i8")
+
+
+def _rescore_job(args):
+    vector_dir, tag, batch_rows = args
+    return rescore_session(vector_dir, tag, _model, batch_rows)
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score sessions from stored landmark vectors")
+    parser.add_argument("root", help="a session, a vectors/ folder or a whole archive")
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--scaler")
+    parser.add_argument("--pca")
+    parser.add_argument("--tag", help="output name, default: model file name")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    args = parser.parse_args()
+
+    tag = args.tag or os.path.splitext(os.path.basename(args.model))[0]
+    sessions = find_sessions(args.root)
+    if not sessions:
+        print(f"No vector chunks under {args.root}")
+        return
+
+    start = time.perf_counter()
+    jobs = [(s, tag, args.batch_rows) for s in sessions]
+    with Pool(
+        min(args.workers, len(jobs)),
+        initializer=_init_worker,
+        initargs=(args.model, args.scaler, args.pca)
+    ) as pool:
+        total = 0
+        for result in pool.imap_unordered(_rescore_job, jobs):
+            total += result["rows"]
+            print(f"{result['session']}: {result['rows']} rows, "
+                  f"{result['agreement']:.1f}% same level, {result['counts']} "
+                  f"({result['seconds']:.2f} s)")
+
+    elapsed = time.perf_counter() - start
+    print(f"Re-scored {total} rows in {len(sessions)} sessions in {elapsed:.1f} s -> results_{tag}.cols")
+
+
+if __name__ == "__main__":
+    main()
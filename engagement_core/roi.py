@@ -0,0 +1,159 @@
+# ============================================================
+# ROI-cropped FaceMesh tracking
+# After a face was found, the next frame only passes a crop around
+# the previous landmarks (plus a margin) to FaceMesh, and the
+# landmarks are mapped back to full-frame normalized coordinates,
+# so LandmarkFeatures / the 936-feature models see the same values.
+# ============================================================
+
+import cv2
+import numpy as np
+
+from engagement_core.features import face_box
+from engagement_core.presence import NO_FACE_RESULT
+
+
+def resize_to_width(rgb, width):
+    """
+    Downscale to `width` pixels wide (aspect kept) before landmarking.
+    Landmarks are normalized, so features keep the same meaning; None
+    or a width >= the frame width returns the frame unchanged.
+    """
+    h, w = rgb.shape[:2]
+    if not width or width >= w:
+        return rgb
+    return cv2.resize(rgb, (width, round(h * width / w)), interpolation=cv2.INTER_AREA)
+
+
+class RoiFaceMesh:
+    """
+    Drop-in for face_mesh.process(rgb):
+
+        face_mesh = RoiFaceMesh(lambda: mp_face_mesh.FaceMesh(...))
+
+    make_mesh is called twice: one FaceMesh for full frames and one
+    for crops, so neither graph's internal tracking state gets mixed
+    up by the changing input geometry.
+
+    The crop is a square of the landmark box size * (1 + 2 * margin),
+    clipped to the frame. When the crop finds no face the same frame
+    goes through a full-frame pass; every refresh_every frames a full
+    pass runs anyway to pick up faces outside the crop. enabled=False
+    always runs full frames.
+
+    input_width downscales every full frame (and crop, relative to
+    it) before FaceMesh; see benchmarks/bench_resolution_ladder.py
+    for what each width costs in agreement.
+
+    presence (e.g. a FacePresence) is asked first whenever no face is
+    being tracked; on "no face" FaceMesh is skipped and the result has
+    no landmarks, except every verify_every-th frame in a row, which
+    runs FaceMesh anyway in case the cascade missed a turned face.
+    """
+
+    def __init__(self, make_mesh, margin=0.3, refresh_every=30, max_area=0.6, enabled=True,
+                 input_width=None, presence=None, verify_every=10):
+        self.full_mesh = make_mesh()
+        self.crop_mesh = make_mesh() if enabled else None
+        self.margin = margin
+        self.refresh_every = refresh_every
+        self.max_area = max_area
+        self.enabled = enabled
+        self.input_width = input_width
+        self.presence = presence
+        self.verify_every = verify_every
+
+        self._box = None  # (x0, y0, x1, y1) normalized, from the last landmarks
+        self._since_full = 0
+        self._absent = 0  # pre-check "no face" answers in a row
+        self._counts = {"roi": 0, "full": 0, "lost": 0}
+        self._presence = {"hit": 0, "miss": 0, "verified": 0, "missed_faces": 0}
+
+    def process(self, rgb):
+        rgb = resize_to_width(rgb, self.input_width)
+        h, w = rgb.shape[:2]
+        crop = self._crop_rect(w, h)
+
+        if crop is not None:
+            x0, y0, x1, y1 = crop
+            result = self.crop_mesh.process(np.ascontiguousarray(rgb[y0:y1, x0:x1]))
+            if result.multi_face_landmarks:
+                self._counts["roi"] += 1
+                self._since_full += 1
+                self._to_full_frame(result, crop, w, h)
+                self._box = self._landmark_box(result)
+                return result
+            self._counts["lost"] += 1
+
+        verifying = False
+        if self.presence is not None and self._box is None:
+            if self.presence(rgb):
+                self._presence["hit"] += 1
+                self._absent = 0
+            else:
+                self._absent += 1
+                if self._absent % self.verify_every:
+                    self._presence["miss"] += 1
+                    return NO_FACE_RESULT
+                self._presence["verified"] += 1
+                verifying = True
+
+        self._counts["full"] += 1
+        self._since_full = 0
+        result = self.full_mesh.process(rgb)
+        self._box = self._landmark_box(result) if result.multi_face_landmarks else None
+        if verifying and self._box is not None:
+            self._presence["missed_faces"] += 1
+        return result
+
+    def close(self):
+        self.full_mesh.close()
+        if self.crop_mesh is not None:
+            self.crop_mesh.close()
+
+    def stats(self):
+        stats = dict(self._counts)
+        total = stats["roi"] + stats["full"]
+        stats["roi_rate"] = stats["roi"] / total if total else 0.0
+        if self.presence is not None:
+            checks = self._presence["hit"] + self._presence["miss"] + self._presence["verified"]
+            stats["presence"] = dict(
+                self._presence,
+                hit_rate=self._presence["hit"] / checks if checks else 0.0
+            )
+        return stats
+
+    # ---------------- internal ----------------
+
+    def _crop_rect(self, w, h):
+        if not self.enabled or self._box is None or self._since_full >= self.refresh_every:
+            return None
+
+        bx0, by0, bx1, by1 = self._box
+        cx, cy = (bx0 + bx1) / 2 * w, (by0 + by1) / 2 * h
+        side = max((bx1 - bx0) * w, (by1 - by0) * h) * (1 + 2 * self.margin)
+
+        x0, x1 = int(max(cx - side / 2, 0)), int(min(cx + side / 2, w))
+        y0, y1 = int(max(cy - side / 2, 0)), int(min(cy + side / 2, h))
+        if x1 - x0 < 32 or y1 - y0 < 32:
+            return None
+        if (x1 - x0) * (y1 - y0) > self.max_area * w * h:
+            return None  # hardly smaller than the frame, not worth it
+        return x0, y0, x1, y1
+
+    @staticmethod
+    def _to_full_frame(result, crop, w, h):
+        x0, y0, x1, y1 = crop
+        sx, sy = (x1 - x0) / w, (y1 - y0) / h
+        ox, oy = x0 / w, y0 / h
+        for face in result.multi_face_landmarks:
+            for lm in face.landmark:
+                lm.x = ox + lm.x * sx
+                lm.y = oy + lm.y * sy
+                lm.z = lm.z * sx  # z uses the image width as scale
+
+    @staticmethod
+    def _landmark_box(result):
+        boxes = [face_box(face) for face in result.multi_face_landmarks]
+        x0, y0, x1, y1 = zip(*boxes)
+        return min(x0), min(y0), max(x1), max(y1)
@@ -0,0 +1,235 @@
+# ============================================================
+# Append-only segment frame store
+# Frames are appended to a few large rolling segment files instead
+# of one small JPEG file each, with a compact binary offset index.
+# Nothing is ever overwritten: every frame gets its own id, even
+# when two frames share a timestamp or a name.
+#
+# Export the old folder layout when somebody wants loose JPEGs:
+#   python -m engagement_core.segments export <store> <dest> [--layout ...]
+# ============================================================
+
+import argparse
+import os
+import struct
+import threading
+from collections import namedtuple
+
+# frame_id, segment, offset, size, level, timestamp, name length
+_RECORD = struct.Struct("<IHIIbdH")
+
+INDEX_FILE = "index.bin"
+SEGMENT_BYTES = 64 << 20
+
+FrameRecord = namedtuple(
+    "FrameRecord", ["frame_id", "segment", "offset", "size", "level", "timestamp", "name"]
+)
+
+
+def _segment_path(root, segment):
+    return os.path.join(root, f"segment_{segment:05d}.bin")
+
+
+class SegmentFrameStore:
+    """
+    append(data, level, timestamp, name) -> frame_id
+
+    Bytes go to segment_NNNNN.bin (a new segment starts once the
+    current one passes segment_bytes); index.bin gets one small
+    record per frame. Reopening a store continues after its last
+    frame; records whose bytes never made it to disk (power loss)
+    are ignored.
+
+    get(frame_id) and frames(level=...) give random access; export()
+    writes the old frames/ and engagement/<level>/ folders.
+    """
+
+    def __init__(self, root, segment_bytes=SEGMENT_BYTES):
+        self.root = root
+        self.segment_bytes = segment_bytes
+        os.makedirs(root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._records = []
+        self._load_index()
+
+        last = self._records[-1] if self._records else None
+        self._segment = last.segment if last else 0
+        self._seg_file = open(_segment_path(root, self._segment), "ab")
+        self._index_file = open(os.path.join(root, INDEX_FILE), "ab")
+        self._readers = {}
+
+    def __len__(self):
+        return len(self._records)
+
+    # ---------------- writing ----------------
+
+    def append(self, data, level=-1, timestamp=0.0, name=""):
+        name_bytes = name.encode("utf-8")
+        with self._lock:
+            offset = self._seg_file.tell()
+            if offset and offset + len(data) > self.segment_bytes:
+                self._seg_file.close()
+                self._segment += 1
+                self._seg_file = open(_segment_path(self.root, self._segment), "ab")
+                # not 0: a crash may have left unindexed bytes in it
+                offset = self._seg_file.tell()
+
+            self._seg_file.write(data)
+
+            record = FrameRecord(
+                len(self._records), self._segment, offset, len(data),
+                int(level), float(timestamp), name
+            )
+            self._index_file.write(_RECORD.pack(*record[:6], len(name_bytes)) + name_bytes)
+            self._records.append(record)
+            return record.frame_id
+
+    def flush(self):
+        with self._lock:
+            self._seg_file.flush()
+            self._index_file.flush()
+
+    def close(self):
+        with self._lock:
+            self._seg_file.close()
+            self._index_file.close()
+            for f in self._readers.values():
+                f.close()
+            self._readers.clear()
+
+    # ---------------- reading ----------------
+
+    def frames(self, level=None):
+        """Index records in append order, optionally for one level."""
+        records = list(self._records)
+        if level is None:
+            return records
+        return [r for r in records if r.level == level]
+
+    def get(self, frame_id):
+        return self.read(self._records[frame_id])
+
+    def read(self, record):
+        with self._lock:
+            if record.segment == self._segment:
+                self._seg_file.flush()
+            f = self._readers.get(record.segment)
+            if f is None:
+                f = open(_segment_path(self.root, record.segment), "rb")
+                self._readers[record.segment] = f
+            f.seek(record.offset)
+            return f.read(record.size)
+
+    def stats(self):
+        with self._lock:
+            levels = {}
+            for r in self._records:
+                levels[str(r.level)] = levels.get(str(r.level), 0) + 1
+            return {
+                "frames": len(self._records),
+                "segments": self._segment + 1 if self._records else 0,
+                "bytes": sum(r.size for r in self._records),
+                "levels": levels
+            }
+
+    def _load_index(self):
+        path = os.path.join(self.root, INDEX_FILE)
+        if not os.path.exists(path):
+            return
+
+        with open(path, "rb") as f:
+            data = f.read()
+
+        seg_sizes = {}
+        pos = valid_end = 0
+        while pos + _RECORD.size <= len(data):
+            fields = _RECORD.unpack_from(data, pos)
+            end = pos + _RECORD.size + fields[6]
+            if end > len(data):
+                break
+            name = data[pos + _RECORD.size:end].decode("utf-8")
+            record = FrameRecord(*fields[:6], name)
+
+            if record.segment not in seg_sizes:
+                seg_path = _segment_path(self.root, record.segment)
+                seg_sizes[record.segment] = os.path.getsize(seg_path) if os.path.exists(seg_path) else 0
+            if record.offset + record.size > seg_sizes[record.segment]:
+                break  # bytes never reached the disk
+
+            self._records.append(record._replace(frame_id=len(self._records)))
+            pos = valid_end = end
+
+        if valid_end < len(data):
+            # drop the torn tail so new records follow the last good one
+            with open(path, "r+b") as f:
+                f.truncate(valid_end)
+
+    # ---------------- export ----------------
+
+    def export(self, dest, layout="engagement", level=None):
+        """
+        Materialize loose JPEG files from the store:
+          "engagement" : dest/engagement/<level>/<name>  (webcam apps)
+          "frames"     : dest/frames/<name> + dest/engagement/<level>/<name>  (ESP32 session)
+          "flat"       : dest/<name>  (esp32_frames/)
+        Frames without a name are written as frame_<id>.jpg. Returns the
+        number of frames exported.
+        """
+        count = 0
+        seen = set()
+        for record in self.frames(level):
+            name = record.name or f"frame_{record.frame_id}.jpg"
+            if name in seen:
+                base, ext = os.path.splitext(name)
+                name = f"{base}_{record.frame_id}{ext}"
+            seen.add(name)
+
+            targets = []
+            if layout == "flat":
+                targets.append(dest)
+            if layout == "frames":
+                targets.append(os.path.join(dest, "frames"))
+            if layout in ("engagement", "frames") and record.level >= 0:
+                targets.append(os.path.join(dest, "engagement", str(record.level)))
+
+            data = self.read(record)
+            for folder in targets:
+                os.makedirs(folder, exist_ok=True)
+                with open(os.path.join(folder, name), "wb") as f:
+                    f.write(data)
+            count += 1
+        return count
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Segment frame store tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="write the old per-file folder layout")
+    exp.add_argument("store")
+    exp.add_argument("dest")
+    exp.add_argument("--layout", choices=["engagement", "frames", "flat"], default="engagement")
+    exp.add_argument("--level", type=int, default=None)
+
+    info = sub.add_parser("info", help="print frame / level counts")
+    info.add_argument("store")
+
+    args = parser.parse_args()
+    store = SegmentFrameStore(args.store)
+    try:
+        if args.command == "export":
+            n = store.export(args.dest, layout=args.layout, level=args.level)
+            print(f"Exported {n} frames to {args.dest}")
+        else:
+            print(store.stats())
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# ============================================================
+# Buffered session result logger
+# Keeps the session CSV open for the whole session instead of
+# open / append / close for every frame, and writes rows in groups.
+# ============================================================
+
+import csv
+import os
+import threading
+
+
+class SessionLogger:
+    """
+    log(row) only appends to an in-memory list. Rows are written and
+    flushed when flush_rows are pending or flush_interval seconds
+    passed; a background thread takes care of the interval, so rows
+    never sit in memory longer than that even if the loop stalls.
+
+    fsync=True adds one os.fsync per flush (group commit): a power
+    loss then costs at most flush_rows rows / flush_interval seconds.
+    Without it the OS page cache decides when rows reach the SD card.
+
+    header is written only when the file is new or empty. close()
+    writes everything that is left; call it when the session ends.
+    """
+
+    def __init__(self, path, header=None, flush_rows=50, flush_interval=1.0, fsync=False):
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+
+        self._rows = []
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._counts = {"rows": 0, "flushes": 0, "fsyncs": 0}
+
+        self._file = open(path, "a", newline="")
+        self._writer = csv.writer(self._file)
+        if header and self._file.tell() == 0:
+            self._writer.writerow(header)
+            self._sync()
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def log(self, row):
+        with self._lock:
+            if self._closed.is_set():
+                raise ValueError(f"{self.path} is closed")
+            self._rows.append(row)
+            if len(self._rows) >= self.flush_rows:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            if self._closed.is_set():
+                return
+            self._closed.set()
+            self._flush()
+            self._file.close()
+        self._thread.join()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts)
+            stats["pending"] = len(self._rows)
+        return stats
+
+    def _run(self):
+        while not self._closed.wait(self.flush_interval):
+            with self._lock:
+                if not self._closed.is_set():
+                    self._flush()
+
+    def _flush(self):
+        if not self._rows:
+            return
+        self._writer.writerows(self._rows)
+        self._counts["rows"] += len(self._rows)
+        self._counts["flushes"] += 1
+        self._rows = []
+        self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+            self._counts["fsyncs"] += 1
@@ -0,0 +1,192 @@
+# ============================================================
+# Cached per-session CSV writers
+# Keeps one buffered append handle per (responden, sesi) open instead
+# of makedirs + exists + open/append/close for every message, and
+# optionally runs it off the asyncio event loop.
+# ============================================================
+
+import asyncio
+import csv
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _Entry:
+    __slots__ = ("file", "writer", "pending", "last_flush", "last_used")
+
+    def __init__(self, path):
+        self.file = open(path, "a", newline="")
+        self.writer = csv.writer(self.file)
+        self.pending = 0
+        self.last_flush = self.last_used = time.monotonic()
+
+
+class SessionWriterCache:
+    """
+    prepare(key) is called only when a session is not cached yet. It must
+    create the folder / header and return the CSV path to append to
+    (ensure_session_csv in the servers does exactly that).
+
+    Rows are flushed when flush_rows are pending or flush_interval
+    seconds passed since the last flush. At most max_open files stay
+    open; the least recently used session is closed first, and
+    sessions idle for idle_timeout seconds are closed by maintain().
+    close() flushes and closes everything, call it on shutdown.
+
+    fsync=True makes every flush a group commit (one os.fsync for all
+    rows since the previous one), like SessionLogger.
+    """
+
+    def __init__(self, prepare, max_open=32, flush_rows=50,
+                 flush_interval=1.0, idle_timeout=60.0, fsync=False):
+        self.prepare = prepare
+        self.max_open = max_open
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.idle_timeout = idle_timeout
+        self.fsync = fsync
+
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+
+        while len(self._entries) >= self.max_open:
+            _, oldest = self._entries.popitem(last=False)
+            self._close(oldest)
+
+        entry = _Entry(self.prepare(*key))
+        self._entries[key] = entry
+        return entry
+
+    def writerows(self, key, rows):
+        rows = list(rows)
+        entry = self._get(key)
+        entry.writer.writerows(rows)
+        entry.pending += len(rows)
+
+        now = time.monotonic()
+        entry.last_used = now
+        if (entry.pending >= self.flush_rows
+                or now - entry.last_flush >= self.flush_interval):
+            self._flush(entry, now)
+
+    def _flush(self, entry, now):
+        entry.file.flush()
+        if self.fsync:
+            os.fsync(entry.file.fileno())
+        entry.pending = 0
+        entry.last_flush = now
+
+    def _close(self, entry):
+        if entry.pending:
+            self._flush(entry, time.monotonic())
+        entry.file.close()
+
+    def maintain(self):
+        """Time-based flush and idle eviction; call every ~flush_interval."""
+        now = time.monotonic()
+        for key in list(self._entries):
+            entry = self._entries[key]
+            if now - entry.last_used >= self.idle_timeout:
+                del self._entries[key]
+                self._close(entry)
+            elif entry.pending and now - entry.last_flush >= self.flush_interval:
+                self._flush(entry, now)
+
+    def close(self):
+        while self._entries:
+            _, entry = self._entries.popitem()
+            self._close(entry)
+
+
+class AsyncSessionWriter:
+    """
+    Runs a SessionWriterCache on one dedicated thread, fed from the
+    asyncio event loop, so a slow SD card never stalls the handlers.
+
+    Handlers only `await put(key, rows)`. The queue is bounded at
+    max_pending messages: when the disk falls that far behind, put()
+    waits, which slows the clients down instead of growing memory.
+    Everything queued at the moment the writer wakes up is written in
+    one go; maintain() runs every flush_interval seconds whether the
+    queue is busy or not.
+
+    start() inside the running loop, `await close()` on shutdown.
+    """
+
+    def __init__(self, cache, max_pending=1024):
+        self.cache = cache
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="csv-writer")
+        self._queue = None
+        self._task = None
+
+    @property
+    def pending(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._task = asyncio.ensure_future(self._run())
+
+    async def put(self, key, rows):
+        await self._queue.put((key, list(rows)))
+
+    async def close(self):
+        await self._queue.join()
+        self._task.cancel()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self.cache.close)
+        self._executor.shutdown(wait=True)
+
+    def _write(self, items):
+        for key, rows in items:
+            self.cache.writerows(key, rows)
+
+    async def _in_writer(self, fn, *args):
+        # a failing disk must not kill the task: put() / close() would
+        # then wait forever on a queue nobody drains
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, fn, *args)
+        except OSError as e:
+            print("⚠️ CSV write error:", e)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        interval = self.cache.flush_interval
+        next_maintain = loop.time() + interval
+
+        while True:
+            items = []
+            if self._queue.empty():
+                timeout = next_maintain - loop.time()
+                if timeout > 0:
+                    try:
+                        items.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        pass
+            while not self._queue.empty():
+                items.append(self._queue.get_nowait())
+
+            if items:
+                try:
+                    await self._in_writer(self._write, items)
+                finally:
+                    for _ in items:
+                        self._queue.task_done()
+
+            # on its own clock: one busy session must not keep the
+            # quiet ones from being time-flushed or evicted
+            if loop.time() >= next_maintain:
+                await self._in_writer(self.cache.maintain)
+                next_maintain = loop.time() + interval
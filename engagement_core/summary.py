@@ -0,0 +1,143 @@
+# ============================================================
+# Incremental session summary
+# Running per-session aggregates updated as each frame is logged,
+# so reports never rescan the results CSV. A small JSON sidecar
+# next to the CSV keeps them across a restart.
+# ============================================================
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+N_LEVELS = 4
+
+
+class SessionSummary:
+    """
+    add(timestamp, level, confidence, response_time) is O(1);
+    snapshot() returns counts / percentages per level (frames with a
+    face), mean confidence, latency mean / min / max and the level
+    counts of the last `window` seconds.
+
+    With a path the snapshot is written there (atomic replace) at most
+    every save_interval seconds and on close(); SessionSummary.load()
+    reads it back, and an existing sidecar is continued unless
+    fresh=True.
+    """
+
+    def __init__(self, path=None, window=60.0, save_interval=1.0, fresh=False):
+        self.path = path
+        self.window = window
+        self.save_interval = save_interval
+
+        self._lock = threading.Lock()
+        self._recent = deque()  # (timestamp, level) inside the window
+        self._window_counts = [0] * N_LEVELS
+        self._last_save = 0.0
+
+        self._counts = [0] * N_LEVELS
+        self._no_face = 0
+        self._confidence_sum = 0.0
+        self._latency = {"count": 0, "sum": 0.0, "min": None, "max": None}
+        self._start = self._end = None
+
+        if path and not fresh and os.path.exists(path):
+            self._restore(self.load(path))
+
+    def add(self, timestamp, level, confidence=0.0, response_time=None):
+        with self._lock:
+            if self._start is None:
+                self._start = timestamp
+            self._end = timestamp
+
+            if 0 <= level < N_LEVELS:
+                self._counts[level] += 1
+                self._confidence_sum += confidence
+                self._recent.append((timestamp, level))
+                self._window_counts[level] += 1
+            else:
+                self._no_face += 1
+
+            while self._recent and self._recent[0][0] <= timestamp - self.window:
+                _, old = self._recent.popleft()
+                self._window_counts[old] -= 1
+
+            if response_time is not None:
+                lat = self._latency
+                lat["count"] += 1
+                lat["sum"] += response_time
+                lat["min"] = response_time if lat["min"] is None else min(lat["min"], response_time)
+                lat["max"] = response_time if lat["max"] is None else max(lat["max"], response_time)
+
+            if self.path and time.monotonic() - self._last_save >= self.save_interval:
+                self._save()
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def close(self):
+        self.save()
+
+    @staticmethod
+    def load(path):
+        with open(path) as f:
+            return json.load(f)
+
+    # ---------------- internal ----------------
+
+    def _snapshot(self):
+        total = sum(self._counts)
+        lat = self._latency
+        return {
+            "total_frames": total,
+            "no_face_frames": self._no_face,
+            "engagement_counts": {str(i): c for i, c in enumerate(self._counts)},
+            "engagement_percentages": {
+                str(i): c / total * 100 if total else 0.0
+                for i, c in enumerate(self._counts)
+            },
+            "mean_confidence": self._confidence_sum / total if total else 0.0,
+            "latency": {
+                "count": lat["count"],
+                "mean": lat["sum"] / lat["count"] if lat["count"] else 0.0,
+                "min": lat["min"],
+                "max": lat["max"],
+            },
+            "window_seconds": self.window,
+            "window_counts": {str(i): c for i, c in enumerate(self._window_counts)},
+            "start": self._start,
+            "end": self._end,
+        }
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._snapshot(), f)
+        os.replace(tmp, self.path)
+        self._last_save = time.monotonic()
+
+    def _restore(self, data):
+        self._counts = [data["engagement_counts"].get(str(i), 0) for i in range(N_LEVELS)]
+        self._no_face = data.get("no_face_frames", 0)
+        self._confidence_sum = data.get("mean_confidence", 0.0) * sum(self._counts)
+
+        lat = data.get("latency", {})
+        count = lat.get("count", 0)
+        self._latency = {
+            "count": count,
+            "sum": lat.get("mean", 0.0) * count,
+            "min": lat.get("min"),
+            "max": lat.get("max"),
+        }
+        self._start = data.get("start")
+        self._end = data.get("end")
+        # the window restarts empty: frames before the restart are stale
@@ -0,0 +1,129 @@
+# ============================================================
+# Landmark vector store
+# Keeps the 936-float FaceMesh feature row of every classified
+# frame, so sessions can be re-scored or used for retraining
+# without running FaceMesh over the images again.
+#
+# One directory per session; rows are buffered and written as
+# chunk_NNNNN.npz files (frame_id, timestamp, level, vectors).
+# ============================================================
+
+import glob
+import os
+import threading
+
+import numpy as np
+
+from engagement_core.features import N_FEATURES
+
+CHUNK_ROWS = 256
+
+
+def _chunk_path(root, chunk):
+    return os.path.join(root, f"chunk_{chunk:05d}.npz")
+
+
+class LandmarkVectorStore:
+    """
+    append(vector, frame_id, timestamp, level) copies the row into a
+    preallocated chunk buffer; a full chunk (and whatever is left on
+    flush / close) is written as one .npz file, replaced atomically,
+    so a crash loses at most the rows of the open chunk.
+
+    dtype="float16" halves the size on disk; the default float32 keeps
+    the exact values the model saw. Reopening a directory continues
+    after its last chunk.
+    """
+
+    def __init__(self, root, dim=N_FEATURES, dtype="float32", chunk_rows=CHUNK_ROWS):
+        self.root = root
+        self.dim = dim
+        self.chunk_rows = chunk_rows
+        os.makedirs(root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._chunk = len(glob.glob(os.path.join(root, "chunk_*.npz")))
+        self._rows = 0
+        self._written = 0
+
+        self._vectors = np.empty((chunk_rows, dim), dtype=dtype)
+        self._frame_ids = np.empty(chunk_rows, dtype=np.int64)
+        self._timestamps = np.empty(chunk_rows, dtype=np.float64)
+        self._levels = np.empty(chunk_rows, dtype=np.int8)
+
+    def append(self, vector, frame_id, timestamp=0.0, level=-1):
+        with self._lock:
+            i = self._rows
+            self._vectors[i] = np.asarray(vector).reshape(-1)
+            self._frame_ids[i] = frame_id
+            self._timestamps[i] = timestamp
+            self._levels[i] = level
+            self._rows += 1
+            if self._rows == self.chunk_rows:
+                self._write()
+
+    def flush(self):
+        with self._lock:
+            self._write()
+
+    def close(self):
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rows": self._written + self._rows,
+                "pending": self._rows,
+                "chunks": self._chunk,
+            }
+
+    def _write(self):
+        n = self._rows
+        if not n:
+            return
+        path = _chunk_path(self.root, self._chunk)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                frame_id=self._frame_ids[:n],
+                timestamp=self._timestamps[:n],
+                level=self._levels[:n],
+                vectors=self._vectors[:n],
+            )
+        os.replace(tmp, path)
+        self._chunk += 1
+        self._written += n
+        self._rows = 0
+
+
+def load_vectors(root, dtype=np.float32):
+    """
+    All chunks of one session concatenated in append order:
+    {"frame_id", "timestamp", "level", "vectors" (n, dim)}.
+    """
+    parts = {"frame_id": [], "timestamp": [], "level": [], "vectors": []}
+    for path in sorted(glob.glob(os.path.join(root, "chunk_*.npz"))):
+        with np.load(path) as chunk:
+            for key in parts:
+                parts[key].append(chunk[key])
+
+    if not parts["vectors"]:
+        return {
+            "frame_id": np.empty(0, np.int64),
+            "timestamp": np.empty(0, np.float64),
+            "level": np.empty(0, np.int8),
+            "vectors": np.empty((0, N_FEATURES), dtype),
+        }
+
+    data = {key: np.concatenate(arrays) for key, arrays in parts.items()}
+    data["vectors"] = data["vectors"].astype(dtype, copy=False)
+    return data
+
+
+def find_sessions(root):
+    """Every directory under root that holds vector chunks."""
+    found = set()
+    for path in glob.glob(os.path.join(root, "**", "chunk_*.npz"), recursive=True):
+        found.add(os.path.dirname(path))
+    return sorted(found)
@@ -0,0 +1,58 @@
+# ============================================================
+# WebSocket metadata protocol (Pi -> server)
+#
+# A message is either one frame record (old clients):
+#     {"responden": .., "sesi": .., "frame": .., "engagement_level": ..,
+#      "fps": .., "response_time": .., ["seq": n]}
+# or a JSON array of such records (batching clients).
+#
+# Single records get one ack each, as before. A batch gets ONE
+# cumulative ack:
+#     {"status": "ok", "count": <rows accepted>,
+#      "ack_seq": <highest seq accepted>, "rejected": <invalid rows>}
+# Accepted rows are queued to the server's writer thread and flushed
+# to disk within its flush interval.
+# ============================================================
+
+import json
+
+REQUIRED_FIELDS = (
+    "responden", "sesi",
+    "frame", "engagement_level",
+    "fps", "response_time"
+)
+
+
+def is_valid_record(record):
+    return isinstance(record, dict) and all(k in record for k in REQUIRED_FIELDS)
+
+
+def parse_message(message):
+    """
+    Raw WS message -> (valid_records, rejected_count, is_batch).
+    Raises ValueError when the message is not JSON at all.
+    """
+    data = json.loads(message)
+    is_batch = isinstance(data, list)
+    records = data if is_batch else [data]
+
+    valid = [r for r in records if is_valid_record(r)]
+    return valid, len(records) - len(valid), is_batch
+
+
+def group_by_session(records):
+    """[(responden, sesi), [records...]] in first-seen order."""
+    groups = {}
+    for r in records:
+        groups.setdefault((r["responden"], r["sesi"]), []).append(r)
+    return groups.items()
+
+
+def batch_ack(records, rejected):
+    seqs = [r["seq"] for r in records if isinstance(r.get("seq"), int)]
+    return {
+        "status": "ok" if records or not rejected else "error",
+        "count": len(records),
+        "ack_seq": max(seqs) if seqs else None,
+        "rejected": rejected
+    }
@@ -0,0 +1,228 @@
+# ============================================================
+# Persistent WebSocket sender for the Raspberry Pi clients
+# One long-lived connection on its own thread + event loop, fed by a
+# bounded queue, so the capture/inference loop never waits on the
+# network.
+# ============================================================
+
+import asyncio
+import json
+import threading
+
+import websockets
+
+
+class WebSocketSender:
+    """
+    send(payload) only enqueues and returns immediately.
+
+    The background loop keeps one connection open and pipelines sends
+    without waiting for each {"status": "ok"}; acks are read by a
+    separate task and only counted. On any connection error it
+    reconnects with exponential backoff (retry_min .. retry_max
+    seconds) and resends the message that was in flight.
+
+    When the queue is full the oldest payload is dropped, so a long
+    outage costs old metadata instead of blocking the camera loop.
+    close(timeout) keeps retrying with the same backoff until the
+    queue is drained and answered, or timeout runs out; what is left
+    then is counted as "unsent" and discarded.
+
+    With max_batch > 1 everything already queued (up to max_batch
+    payloads) goes out as one JSON array, each record tagged with a
+    "seq" number; the server answers with one cumulative ack carrying
+    the highest seq it persisted (see ws_protocol). Keep max_batch=1
+    for servers that only understand single objects.
+    """
+
+    def __init__(self, url, max_queue=256, max_batch=1,
+                 retry_min=0.5, retry_max=10.0):
+        self.url = url
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+
+        self._counts = {
+            "sent": 0, "acked": 0, "acked_seq": None,
+            "dropped": 0, "unsent": 0, "reconnects": 0
+        }
+        self._seq = 0
+        self._replies = 0  # server messages read, any status
+        self._in_flight = None  # message being sent; resent after a reconnect
+        self.connected = False
+
+        self._loop = asyncio.new_event_loop()
+        self._queue = None
+        self._stopping = None
+        self._close_by = None  # loop time after which close() gives up
+        self._ready = threading.Event()
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    # ---------------- caller side (any thread) ----------------
+
+    def send(self, payload):
+        self._loop.call_soon_threadsafe(self._enqueue, payload)
+
+    @property
+    def queue_depth(self):
+        in_flight = self._in_flight
+        if in_flight is None:
+            pending = 0
+        elif isinstance(in_flight, list):
+            pending = len(in_flight)
+        else:
+            pending = 1
+        return self._queue.qsize() + pending
+
+    def stats(self):
+        stats = dict(self._counts)
+        stats["queue_depth"] = self.queue_depth
+        stats["connected"] = self.connected
+        return stats
+
+    def close(self, timeout=5.0):
+        """Try to drain the queue for up to timeout seconds, then stop."""
+        self._loop.call_soon_threadsafe(self._begin_close, timeout)
+        # the loop gives up on its own at the deadline; the margin covers
+        # a connection attempt that is still running then
+        self._thread.join(timeout + 1.0)
+
+    # ---------------- event loop side ----------------
+
+    def _begin_close(self, timeout):
+        self._close_by = self._loop.time() + timeout
+        self._stopping.set()
+
+    def _discard_pending(self):
+        self._counts["unsent"] += self.queue_depth
+        self._in_flight = None
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+    def _enqueue(self, payload):
+        if self._queue.full():
+            self._queue.get_nowait()
+            self._counts["dropped"] += 1
+        self._queue.put_nowait(payload)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._stopping = asyncio.Event()
+        self._ready.set()
+        self._loop.run_until_complete(self._main())
+
+    async def _main(self):
+        delay = self.retry_min
+
+        while not (self._stopping.is_set() and self.queue_depth == 0):
+            try:
+                async with websockets.connect(self.url) as ws:
+                    self.connected = True
+                    delay = self.retry_min
+                    await self._pump(ws)
+            except (OSError, websockets.exceptions.WebSocketException) as e:
+                print("⚠️ WS error:", e)
+            finally:
+                self.connected = False
+
+            if self._stopping.is_set() and self.queue_depth == 0:
+                break
+
+            if self._stopping.is_set():
+                # server still unreachable while closing: keep backing
+                # off (the stop event would no longer wait) until the
+                # close deadline
+                remaining = self._close_by - self._loop.time()
+                if remaining <= 0:
+                    self._discard_pending()
+                    break
+                self._counts["reconnects"] += 1
+                await asyncio.sleep(min(delay, remaining))
+            else:
+                self._counts["reconnects"] += 1
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+            delay = min(delay * 2, self.retry_max)
+
+    async def _pump(self, ws):
+        acks = asyncio.ensure_future(self._read_acks(ws))
+        try:
+            while True:
+                if self._in_flight is None:
+                    if self._stopping.is_set() and self._queue.empty():
+                        await self._wait_for_acks(acks)
+                        return
+                    self._in_flight = await self._next_message()
+                    if self._in_flight is None:
+                        continue
+
+                await ws.send(json.dumps(self._in_flight))
+                sent = self._in_flight
+                self._in_flight = None
+                self._counts["sent"] += len(sent) if isinstance(sent, list) else 1
+        finally:
+            acks.cancel()
+
+    def _unanswered(self):
+        if self.max_batch > 1:
+            return self._seq - (self._counts["acked_seq"] or 0)
+        return self._counts["sent"] - self._replies
+
+    async def _wait_for_acks(self, acks):
+        # closing right after the last send makes the server drop what
+        # it has not answered yet
+        while self._unanswered() > 0 and not acks.done():
+            remaining = self._close_by - self._loop.time()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(0.01, remaining))
+
+    async def _next_message(self):
+        # wake up either for a payload or for close()
+        get = asyncio.ensure_future(self._queue.get())
+        stop = asyncio.ensure_future(self._stopping.wait())
+        done, _ = await asyncio.wait({get, stop}, return_when=asyncio.FIRST_COMPLETED)
+        stop.cancel()
+
+        if get not in done:
+            get.cancel()
+            return None
+
+        if self.max_batch <= 1:
+            return get.result()
+
+        batch = [get.result()]
+        while len(batch) < self.max_batch and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+        records = []
+        for payload in batch:
+            self._seq += 1
+            records.append(dict(payload, seq=self._seq))
+        return records
+
+    async def _read_acks(self, ws):
+        try:
+            async for message in ws:
+                try:
+                    ack = json.loads(message)
+                except ValueError:
+                    ack = {}
+                if not isinstance(ack, dict):
+                    ack = {}
+                self._replies += 1
+
+                # batch acks are cumulative, single-object acks count one
+                ok = 1 if ack.get("status") == "ok" else 0
+                self._counts["acked"] += ack.get("count", ok)
+                if ack.get("ack_seq") is not None:
+                    self._counts["acked_seq"] = ack["ack_seq"]
+        except websockets.exceptions.ConnectionClosed:
+            pass  # the send side notices and reconnects
@@ -0,0 +1,130 @@
+# ============================================================
+# WebSocket ingest server (Pi -> server metadata)
+# The handler shared by websocket-code/server_ws_new.py,
+# websocket-code/server_ws-update.py and
+# pkl_code/V2 Code_ESP32/server.ws.py; each script only picks its
+# session CSV layout and its config.
+# ============================================================
+
+import asyncio
+import csv
+import json
+import os
+from collections import namedtuple
+from datetime import datetime
+
+import websockets
+
+from engagement_core.session_writers import AsyncSessionWriter, SessionWriterCache
+from engagement_core.ws_protocol import batch_ack, group_by_session, parse_message
+
+# csv_name   : file inside <session_dir>/responden_<r>/sesi_<s>/
+# header     : CSV header written when a session file is created
+# make_row   : (server_timestamp, record) -> CSV row
+# single_ack : record -> ack dict for old single-record clients
+SessionLayout = namedtuple("SessionLayout", ["csv_name", "header", "make_row", "single_ack"])
+
+# server_ws_new.py
+METADATA_LAYOUT = SessionLayout(
+    "engagement_metadata.csv",
+    ["server_timestamp", "responden", "sesi", "frame_name",
+     "engagement_level", "fps", "response_time"],
+    lambda ts, r: [ts, r["responden"], r["sesi"], r["frame"],
+                   r["engagement_level"], r["fps"], r["response_time"]],
+    lambda r: {"status": "ok"}
+)
+
+# server_ws-update.py / server.ws.py
+RESULTS_LAYOUT = SessionLayout(
+    "engagement_results.csv",
+    ["timestamp", "frame", "engagement_level", "fps", "response_time"],
+    lambda ts, r: [ts, r["frame"], r["engagement_level"], r["fps"], r["response_time"]],
+    lambda r: {"status": "ok", "session": r["sesi"]}
+)
+
+
+class IngestServer:
+    """
+    Accepts single records and batches (see ws_protocol), hands the
+    rows to an AsyncSessionWriter and acks.
+
+    layout is a SessionLayout; the writer options are passed on to
+    SessionWriterCache / AsyncSessionWriter unchanged.
+    """
+
+    def __init__(self, session_dir, layout, max_open=32, flush_rows=50, flush_interval=1.0,
+                 idle_timeout=60.0, fsync=False, max_pending=1024):
+        self.session_dir = session_dir
+        self.layout = layout
+
+        os.makedirs(session_dir, exist_ok=True)
+        self.writers = SessionWriterCache(
+            self.ensure_session_csv,
+            max_open=max_open,
+            flush_rows=flush_rows,
+            flush_interval=flush_interval,
+            idle_timeout=idle_timeout,
+            fsync=fsync
+        )
+        self.persister = AsyncSessionWriter(self.writers, max_pending=max_pending)
+
+    def ensure_session_csv(self, responden, sesi):
+        """Create the session folder and CSV header; return the CSV path."""
+        session_path = os.path.join(
+            self.session_dir,
+            f"responden_{responden}",
+            f"sesi_{sesi}"
+        )
+        os.makedirs(session_path, exist_ok=True)
+
+        csv_path = os.path.join(session_path, self.layout.csv_name)
+        if not os.path.exists(csv_path):
+            with open(csv_path, "w", newline="") as f:
+                csv.writer(f).writerow(self.layout.header)
+        return csv_path
+
+    async def handler(self, websocket):
+        print("✅ Client connected")
+
+        try:
+            async for message in websocket:
+                # one frame object (old clients) or an array of them
+                records, rejected, is_batch = parse_message(message)
+
+                if not is_batch and rejected:
+                    await websocket.send(json.dumps({
+                        "status": "error",
+                        "message": "Invalid payload structure"
+                    }))
+                    continue
+
+                server_ts = datetime.now().isoformat()
+                make_row = self.layout.make_row
+
+                # handed to the writer thread; the event loop never touches disk
+                for key, rows in group_by_session(records):
+                    await self.persister.put(key, (make_row(server_ts, r) for r in rows))
+
+                if is_batch:
+                    # one cumulative ack for the whole batch
+                    await websocket.send(json.dumps(batch_ack(records, rejected)))
+                else:
+                    await websocket.send(json.dumps(self.layout.single_ack(records[0])))
+
+        except websockets.exceptions.ConnectionClosed:
+            print("❌ Client disconnected")
+
+        except Exception as e:
+            print("⚠️ Server error:", e)
+
+    async def serve(self, host, port):
+        print(f"🚀 WebSocket Server running on {host}:{port}")
+        self.persister.start()
+        try:
+            async with websockets.serve(self.handler, host, port):
+                await asyncio.Future()  # run forever
+        finally:
+            await self.persister.close()  # flush buffered rows on shutdown
+
+    def run(self, host, port):
+        asyncio.run(self.serve(host, port))
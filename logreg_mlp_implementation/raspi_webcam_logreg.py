@@ -6,13 +6,28 @@ import os
 import time
 import cv2
 import csv
-import joblib
 import mediapipe as mp
 import tkinter as tk
 from tkinter import messagebox
 from tkcalendar import Calendar
 from PIL import Image, ImageTk
-import numpy as np
+import sys
+
+# shared helpers live in engagement_core/ at the repo root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from engagement_core.features import LandmarkFeatures
+from engagement_core.inference import EngagementModel
+from engagement_core.pipeline import FramePipeline
+from engagement_core.capture import LatestFrameGrabber
+from engagement_core.recorder import VideoRecorder
+from engagement_core.segments import SegmentFrameStore
+from engagement_core.session_log import SessionLogger
+from engagement_core.columnar import ResultColumns, export_csv
+from engagement_core.summary import SessionSummary
+from engagement_core.vectors import LandmarkVectorStore
+from engagement_core.gating import MotionGate, thumbnail
+from engagement_core.roi import RoiFaceMesh
+from engagement_core.presence import FacePresence
 
 # ============================================================
 # GLOBAL CONFIG
@@ -23,17 +38,58 @@ MODEL_PATH  = "v3_logreg_engagement.pkl"
 SCALER_PATH = "v3_scaler_engagement.pkl"
 PCA_PATH    = "v3_pca_engagement.pkl"
 
+# per frame only results.cols and summary.json are written;
+# engagement_results.csv is generated from the columns when the
+# session stops. RESULTS_CSV_LIVE=True writes the CSV row by row
+# during the session as before
+RESULTS_CSV_LIVE = False
+RESULTS_CSV_HEADER = ["Timestamp", "Time", "Frame", "Engagement", "Confidence", "FPS"]
+
+# live CSV is written in groups; CSV_FSYNC=True also fsyncs each
+# group, so a power cut loses at most ~1 s of rows
+CSV_FSYNC = False
+
+# 936-float landmark row of every classified frame, for re-scoring /
+# retraining without FaceMesh ("float16" halves the size on disk)
+VECTOR_DTYPE = "float32"
+
+# skip FaceMesh while the picture barely changes: reuse the last result
+# while the 32x24 gray thumbnail differs by < GATE_THRESHOLD (0-255,
+# 0 = off), at most GATE_MAX_AGE seconds
+GATE_THRESHOLD = 4.0
+GATE_MAX_AGE = 2.0
+
+# after a face is found, FaceMesh only gets a crop around the last
+# landmarks (+ ROI_MARGIN of the face size per side); full frame
+# again when the face is lost and every 30 frames
+ROI_TRACKING = True
+ROI_MARGIN = 0.3
+
+# width frames are downscaled to before FaceMesh (None = as captured);
+# pick it with benchmarks/bench_resolution_ladder.py
+LANDMARK_WIDTH = None
+
+# while no face is tracked, a Haar cascade on a 160 px gray copy decides
+# whether FaceMesh runs at all; empty frames go straight to level -1
+# (FaceMesh still checks every 10th "no face" frame)
+FACE_PRECHECK = True
+
 csv_file_path = None
+result_log = None
+result_cols = None
+session_summary = None
 video_writer = None
+frame_store = None
+vector_store = None
 stop_recording = False
 
 # ============================================================
 # LOAD MODEL COMPONENTS
 # ============================================================
 
-model  = joblib.load(MODEL_PATH)
-scaler = joblib.load(SCALER_PATH)
-pca    = joblib.load(PCA_PATH)
+model = EngagementModel.load(
+    MODEL_PATH, scaler_path=SCALER_PATH, pca_path=PCA_PATH
+)
 
 print("[OK] Logistic Regression, Scaler, PCA loaded")
 
@@ -42,14 +98,22 @@ print("[OK] Logistic Regression, Scaler, PCA loaded")
 # ============================================================
 
 mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp_face_mesh.FaceMesh(
-    static_image_mode=False,
-    max_num_faces=1,
-    refine_landmarks=True,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
+face_mesh = RoiFaceMesh(
+    lambda: mp_face_mesh.FaceMesh(
+        static_image_mode=False,
+        max_num_faces=1,
+        refine_landmarks=True,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    ),
+    margin=ROI_MARGIN,
+    enabled=ROI_TRACKING,
+    input_width=LANDMARK_WIDTH,
+    presence=FacePresence() if FACE_PRECHECK else None
 )
 
+landmark_features = LandmarkFeatures()
+
 # ============================================================
 # UTILITY
 # ============================================================
@@ -58,6 +122,11 @@ def format_timestamp(ts):
     return time.strftime("%H:%M:%S", time.localtime(ts))
 
 
+def result_row(captured_at, frame_name, level, conf, response_time, fps):
+    timestamp = int(captured_at)
+    return [timestamp, format_timestamp(timestamp), frame_name, level, conf, fps]
+
+
 def engagement_label(level):
     return {
         0: ("Very Low", (0, 0, 255)),
@@ -71,28 +140,35 @@ def engagement_label(level):
 # ============================================================
 
 def start_session(selected_date):
-    global csv_file_path, video_writer, stop_recording
+    global csv_file_path, result_log, result_cols, session_summary, video_writer, frame_store, vector_store, stop_recording
     stop_recording = False
 
     session_folder = os.path.join(BASE_FOLDER, f"session_{selected_date}")
     os.makedirs(session_folder, exist_ok=True)
 
-    engagement_dir = os.path.join(session_folder, "engagement")
-    for i in range(4):
-        os.makedirs(os.path.join(engagement_dir, str(i)), exist_ok=True)
+    # classified frames go to segment files; engagement/<level>/ on demand:
+    #   python -m engagement_core.segments export <session>/frames <session>
+    frame_store = SegmentFrameStore(os.path.join(session_folder, "frames"))
+    vector_store = LandmarkVectorStore(os.path.join(session_folder, "vectors"), dtype=VECTOR_DTYPE)
 
     csv_file_path = os.path.join(session_folder, "engagement_results.csv")
-    with open(csv_file_path, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "Timestamp", "Time", "Frame",
-            "Engagement", "Confidence", "FPS"
-        ])
-
-    video_writer = cv2.VideoWriter(
+    result_log = None
+    if RESULTS_CSV_LIVE:
+        with open(csv_file_path, "w", newline="") as f:
+            csv.writer(f).writerow(RESULTS_CSV_HEADER)
+        result_log = SessionLogger(csv_file_path, fsync=CSV_FSYNC)
+
+    # the per-frame results, also used for the report:
+    #   python -m engagement_core.columnar summary <session>/results.cols
+    result_cols = ResultColumns(os.path.join(session_folder, "results.cols"), truncate=True)
+
+    # running counts for the report, kept on disk as summary.json
+    session_summary = SessionSummary(os.path.join(session_folder, "summary.json"), fresh=True)
+
+    # encoded in a separate process, timed by capture timestamps
+    video_writer = VideoRecorder(
         os.path.join(session_folder, "session_video.mp4"),
-        cv2.VideoWriter_fourcc(*"mp4v"),
-        10, (640, 480)
+        fps=10, size=(640, 480)
     )
 
     capture_webcam(session_folder)
@@ -105,7 +181,9 @@ def start_session(selected_date):
 def capture_webcam(session_folder):
     global stop_recording
 
-    cap = cv2.VideoCapture(0)
+    # grabs continuously and always hands out the newest frame
+    cap = LatestFrameGrabber(0)
+    gate = MotionGate(GATE_THRESHOLD, GATE_MAX_AGE)
 
     win = tk.Toplevel()
     win.title("Engagement Detection - Logistic Regression")
@@ -118,108 +196,153 @@ def capture_webcam(session_folder):
         win, text="STOP SESSION",
         font=("Arial", 12, "bold"),
         bg="red", fg="white",
-        command=lambda: stop_camera(win)
+        command=lambda: stop_camera(win, finish)
     ).pack(pady=10)
 
-    def update_frame():
-        nonlocal cap
-
-        if stop_recording:
-            return
+    # capture, inference and logging run on their own threads;
+    # this (Tk) thread only shows the newest annotated frame
+    def read_frame():
+        ok, frame, captured_at = cap.read()
+        if not ok:
+            return None
+        return captured_at, frame
 
+    def infer_frame(item):
+        captured_at, frame = item
         start = time.time()
-        ret, frame = cap.read()
-        if not ret:
-            return
-
-        timestamp = int(time.time())
-        frame_name = f"frame_{timestamp}.jpg"
-
-        level, conf = classify_frame(frame, frame_name, session_folder)
-        fps = 1 / (time.time() - start)
+        thumb = thumbnail(frame)
+        cached = gate.reuse(thumb, captured_at)
+        if cached is None:
+            level, conf, vector = classify_frame(frame)
+            gate.update(thumb, captured_at, (level, conf))
+        else:
+            # unchanged picture: same class, nothing new for the vector store
+            (level, conf), vector = cached, None
+        rt = time.time() - start
+        fps = 1 / rt if rt > 0 else 0
+        cap.note_classified(captured_at)
 
         label_text, color = engagement_label(level)
 
         # Overlay UI
-        cv2.rectangle(frame, (0, 0), (640, 90), (30, 30, 30), -1)
-        cv2.putText(frame, f"Model : Logistic Regression",
+        shown = frame.copy()
+        cv2.rectangle(shown, (0, 0), (640, 90), (30, 30, 30), -1)
+        cv2.putText(shown, f"Model : Logistic Regression",
                     (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 2)
-        cv2.putText(frame, f"Engagement : {label_text}",
+        cv2.putText(shown, f"Engagement : {label_text}",
                     (10, 55), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
-        cv2.putText(frame, f"Confidence : {conf:.2f} | FPS : {fps:.1f}",
+        cv2.putText(shown, f"Confidence : {conf:.2f} | FPS : {fps:.1f}",
                     (10, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
 
-        with open(csv_file_path, "a", newline="") as f:
-            csv.writer(f).writerow([
-                timestamp, format_timestamp(timestamp),
-                frame_name, level, conf, fps
-            ])
+        return captured_at, frame, shown, level, conf, rt, fps, vector
+
+    def persist_frame(result):
+        captured_at, frame, shown, level, conf, rt, fps, vector = result
+        frame_name = f"frame_{int(captured_at * 1000)}.jpg"
+
+        if level >= 0:
+            ok, jpeg = cv2.imencode(".jpg", frame)
+            if ok:
+                frame_store.append(jpeg.tobytes(), level, captured_at, frame_name)
+            # keyed by the same ms value as frame_name
+            if vector is not None:
+                vector_store.append(vector, int(captured_at * 1000), captured_at, level)
+
+        result_cols.append(captured_at, level, conf, rt, fps, frame_name)
+        session_summary.add(captured_at, level, conf, rt)
+        if result_log is not None:
+            result_log.log(result_row(captured_at, frame_name, level, conf, rt, fps))
+
+        video_writer.write(shown, captured_at)
+
+    # a deeper capture queue would only hold older frames
+    pipeline = FramePipeline(read_frame, infer_frame, persist_frame, queue_size=1).start()
+    shown_result = None
+    closed = False
+
+    def finish():
+        # called from the Stop handler: win.destroy() also cancels the
+        # pending after() callback, and mainloop() only returns when
+        # the root window closes
+        nonlocal closed
+        if closed:
+            return
+        closed = True
+
+        pipeline.stop()
+        print("[PIPELINE]", pipeline.stats())
+        print("[CAPTURE]", cap.stats())
+        print("[GATE]", gate.stats())
+        print("[ROI]", face_mesh.stats())
+        print("[VIDEO]", video_writer.stats())
+        cap.release()
+        video_writer.release()
+        frame_store.close()
+        vector_store.close()
+        result_cols.close()
+        session_summary.close()
+        if result_log is not None:
+            result_log.close()
+        else:
+            export_csv(result_cols.root, csv_file_path, RESULTS_CSV_HEADER, result_row)
+        cv2.destroyAllWindows()
+
+    def update_frame():
+        nonlocal shown_result
 
-        video_writer.write(frame)
+        if stop_recording:
+            return
+        if not pipeline.running:
+            finish()  # camera gave out; the report comes with Stop
+            return
 
-        img = ImageTk.PhotoImage(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
-        video_label.configure(image=img)
-        video_label.image = img
+        result = pipeline.latest()
+        if result is not None and result is not shown_result:
+            shown_result = result
+            img = ImageTk.PhotoImage(Image.fromarray(cv2.cvtColor(result[2], cv2.COLOR_BGR2RGB)))
+            video_label.configure(image=img)
+            video_label.image = img
 
         win.after(10, update_frame)
 
     update_frame()
+    win.protocol("WM_DELETE_WINDOW", lambda: stop_camera(win, finish))
     win.mainloop()
 
-    cap.release()
-    video_writer.release()
-    cv2.destroyAllWindows()
-    show_report()
-
 
 # ============================================================
 # FRAME CLASSIFICATION
 # ============================================================
 
-def classify_frame(frame, frame_name, session_folder):
+def classify_frame(frame):
     rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
     result = face_mesh.process(rgb)
 
-    if not result.multi_face_landmarks:
-        return -1, 0.0
+    # refine_landmarks=True gives 478 points; only the first 468 are features
+    features = landmark_features.from_result(result)
+    if features is None:
+        return -1, 0.0, None
 
-    landmarks = result.multi_face_landmarks[0].landmark
-    features = np.array([[lm.x, lm.y] for lm in landmarks]).flatten()
-
-    if features.shape[0] != 936:
-        return -1, 0.0
-
-    features = scaler.transform([features])
-    features = pca.transform(features)
-
-    probs = model.predict_proba(features)[0]
-    level = int(np.argmax(probs))
-    conf = float(np.max(probs))
-
-    save_dir = os.path.join(session_folder, "engagement", str(level))
-    cv2.imwrite(os.path.join(save_dir, frame_name), frame)
-
-    return level, conf
+    level, conf, _ = model.predict(features)
+    # the feature buffer is reused by the next frame
+    return level, conf, features.copy()
 
 
 # ============================================================
 # STOP & REPORT
 # ============================================================
 
-def stop_camera(win):
+def stop_camera(win, finish):
     global stop_recording
     stop_recording = True
+    finish()
     win.destroy()
+    show_report()
 
 
 def show_report():
-    counts = {str(i): 0 for i in range(4)}
-
-    with open(csv_file_path) as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            if r["Engagement"] in counts:
-                counts[r["Engagement"]] += 1
+    # kept up to date while logging, nothing to rescan
+    counts = session_summary.snapshot()["engagement_counts"]
 
     low = counts["0"] + counts["1"]
     high = counts["2"] + counts["3"]
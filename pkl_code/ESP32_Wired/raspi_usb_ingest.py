@@ -1,13 +1,20 @@
 import serial
 import struct
 import os
+import sys
 import time
 
+# shared helpers live in engagement_core/ at the repo root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from engagement_core.segments import SegmentFrameStore
+
 SERIAL_PORT = "/dev/ttyUSB0"
 BAUDRATE = 115200
 
+# frames are appended to segment files + index.bin; loose JPEGs on demand:
+#   python -m engagement_core.segments export /home/elvindo/esp32_frames out --layout flat
 SAVE_DIR = "/home/elvindo/esp32_frames"
-os.makedirs(SAVE_DIR, exist_ok=True)
+store = SegmentFrameStore(SAVE_DIR)
 
 ser = serial.Serial(SERIAL_PORT, BAUDRATE, timeout=5)
 print("✅ Serial connected")
@@ -22,16 +29,15 @@ def read_frame():
 
 count = 0
 
-while True:
-    jpeg = read_frame()
-    count += 1
-
-    filename = os.path.join(
-        SAVE_DIR,
-        f"frame_{int(time.time())}.jpg"
-    )
+try:
+    while True:
+        jpeg = read_frame()
+        count += 1
 
-    with open(filename, "wb") as f:
-        f.write(jpeg)
+        now = time.time()
+        filename = f"frame_{int(now * 1000)}.jpg"
+        frame_id = store.append(jpeg, timestamp=now, name=filename)
 
-    print(f"📸 Saved {filename} ({len(jpeg)} bytes)")
\ No newline at end of file
+        print(f"📸 Saved #{frame_id} {filename} ({len(jpeg)} bytes)")
+finally:
+    store.close()
\ No newline at end of file
@@ -5,11 +5,17 @@ import os
 import time
 import cv2
 import mediapipe as mp
-import joblib
 import csv
-import asyncio
-import websockets
-import json
+import sys
+import threading
+
+# shared helpers live in engagement_core/ at the repo root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from engagement_core.features import LandmarkFeatures
+from engagement_core.inference import EngagementModel
+from engagement_core.ws_sender import WebSocketSender
+from engagement_core.ingest import AsyncFileWriter, decode_jpeg
+from engagement_core.session_log import SessionLogger
 
 # ============================================================
 # FLASK APP
@@ -21,6 +27,24 @@ app = Flask(__name__)
 # ============================================================
 BASE_FOLDER = "/home/elvindo/raspi-engagement/esp32_data"
 WS_SERVER = "ws://10.34.3.210:8000"
+WS_MAX_BATCH = 16  # frames per WS message (server acks each batch once)
+
+# JPEG decode scale for classification (1 = full, 2/4 = reduced).
+# Landmarks are normalized, so reduced decoding keeps the 936 features.
+JPEG_DECODE_SCALE = 1
+
+# results CSV stays open and is written in groups; CSV_FSYNC=True
+# also fsyncs each group, so a power cut loses at most ~1 s of rows
+CSV_FSYNC = False
+
+CSV_HEADER = [
+    "timestamp_unix",
+    "frame",
+    "engagement_level",
+    "confidence",
+    "response_time",
+    "fps"
+]
 
 os.makedirs(BASE_FOLDER, exist_ok=True)
 
@@ -30,6 +54,7 @@ os.makedirs(BASE_FOLDER, exist_ok=True)
 CURRENT_RESPONDEN = None
 CURRENT_SESI = None
 CSV_PATH = None
+RESULT_LOG = None
 SESSION_FOLDER = None
 
 # ============================================================
@@ -41,50 +66,44 @@ face_mesh = mp_face_mesh.FaceMesh(
     max_num_faces=1
 )
 
-model = joblib.load("Fix_kan.pkl")
+model = EngagementModel.load("Fix_kan.pkl", compile_forest=True)
+features = LandmarkFeatures()
+
+# Flask serves requests on several threads; FaceMesh and the shared
+# feature buffer must only be used by one of them at a time. Uploads
+# leave this lock one by one, so the classifier is called per frame
+# (a micro-batcher here would only add its wait to every request).
+face_mesh_lock = threading.Lock()
+
+# raw uploads are persisted off the request path
+frame_writer = AsyncFileWriter()
 
 # ============================================================
 # WEBSOCKET SEND (SAME AS WEBCAM VERSION)
 # ============================================================
-async def ws_send(payload):
-    try:
-        async with websockets.connect(WS_SERVER) as ws:
-            await ws.send(json.dumps(payload))
-            await ws.recv()
-    except Exception as e:
-        print("⚠️ WS error:", e)
+ws_sender = WebSocketSender(WS_SERVER, max_batch=WS_MAX_BATCH)
 
 # ============================================================
 # CLASSIFICATION
 # ============================================================
-def classify_frame(image_path):
-    frame = cv2.imread(image_path)
+def classify_frame(jpeg, filename):
+    frame = decode_jpeg(jpeg, JPEG_DECODE_SCALE)
     if frame is None:
         return -1, 0.0
 
     rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    result = face_mesh.process(rgb)
-
-    level, conf = -1, 0.0
+    with face_mesh_lock:
+        result = face_mesh.process(rgb)
+        vec = features.from_result(result)
+        vec = None if vec is None else vec.copy()
 
-    if result.multi_face_landmarks:
-        lm = result.multi_face_landmarks[0]
-        vec = []
-        for p in lm.landmark:
-            vec.extend([p.x, p.y])
+    level, conf, _ = model.predict(vec)
 
-        if len(vec) == 936:
-            probs = model.predict_proba([vec])[0]
-            level = int(model.predict([vec])[0])
-            conf = float(max(probs))
-
-            save_dir = os.path.join(
-                SESSION_FOLDER, "engagement", str(level)
-            )
-            cv2.imwrite(
-                os.path.join(save_dir, os.path.basename(image_path)),
-                frame
-            )
+    if level >= 0:
+        save_dir = os.path.join(
+            SESSION_FOLDER, "engagement", str(level)
+        )
+        frame_writer.write(os.path.join(save_dir, filename), jpeg)
 
     return level, conf
 
@@ -93,7 +112,7 @@ def classify_frame(image_path):
 # ============================================================
 @app.route("/start_new_session", methods=["GET"])
 def start_new_session():
-    global CURRENT_RESPONDEN, CURRENT_SESI, CSV_PATH, SESSION_FOLDER
+    global CURRENT_RESPONDEN, CURRENT_SESI, CSV_PATH, RESULT_LOG, SESSION_FOLDER
 
     CURRENT_RESPONDEN = request.args.get("responden")
     CURRENT_SESI = request.args.get("sesi")
@@ -111,15 +130,11 @@ def start_new_session():
 
     CSV_PATH = os.path.join(SESSION_FOLDER, "engagement_results.csv")
 
+    if RESULT_LOG is not None:
+        RESULT_LOG.close()
     with open(CSV_PATH, "w", newline="") as f:
-        csv.writer(f).writerow([
-            "timestamp_unix",
-            "frame",
-            "engagement_level",
-            "confidence",
-            "response_time",
-            "fps"
-        ])
+        csv.writer(f).writerow(CSV_HEADER)
+    RESULT_LOG = SessionLogger(CSV_PATH, fsync=CSV_FSYNC)
 
     return "Session initialized", 200
 
@@ -128,7 +143,7 @@ def start_new_session():
 # ============================================================
 @app.route("/upload_frame", methods=["POST"])
 def upload_frame():
-    global CURRENT_RESPONDEN, CURRENT_SESI, CSV_PATH, SESSION_FOLDER
+    global CURRENT_RESPONDEN, CURRENT_SESI, CSV_PATH, RESULT_LOG, SESSION_FOLDER
 
     if CURRENT_RESPONDEN is None or CURRENT_SESI is None:
         CURRENT_RESPONDEN = request.headers.get("X-Responden", "unknown")
@@ -142,16 +157,8 @@ def upload_frame():
             os.makedirs(os.path.join(SESSION_FOLDER, "engagement", lvl), exist_ok=True)
 
         CSV_PATH = os.path.join(SESSION_FOLDER, "engagement_results.csv")
-        if not os.path.exists(CSV_PATH):
-            with open(CSV_PATH, "w", newline="") as f:
-                csv.writer(f).writerow([
-                    "timestamp_unix",
-                    "frame",
-                    "engagement_level",
-                    "confidence",
-                    "response_time",
-                    "fps"
-                ])
+        # header only if the file is new (same as before)
+        RESULT_LOG = SessionLogger(CSV_PATH, header=CSV_HEADER, fsync=CSV_FSYNC)
 
     filename = request.headers.get(
         "X-Filename", f"frame_{int(time.time()*1000)}.jpg"
@@ -160,23 +167,22 @@ def upload_frame():
     frame_path = os.path.join(SESSION_FOLDER, filename)
 
     start = time.time()
-    with open(frame_path, "wb") as f:
-        f.write(request.data)
+    jpeg = request.get_data()
+    frame_writer.write(frame_path, jpeg)
 
-    level, conf = classify_frame(frame_path)
+    level, conf = classify_frame(jpeg, filename)
 
     rt = time.time() - start
     fps = 1 / rt if rt > 0 else 0
 
-    with open(CSV_PATH, "a", newline="") as f:
-        csv.writer(f).writerow([
-            int(time.time()*1000),
-            filename,
-            level,
-            conf,
-            rt,
-            fps
-        ])
+    RESULT_LOG.log([
+        int(time.time()*1000),
+        filename,
+        level,
+        conf,
+        rt,
+        fps
+    ])
 
     payload = {
         "responden": CURRENT_RESPONDEN,
@@ -187,7 +193,7 @@ def upload_frame():
         "response_time": rt
     }
 
-    asyncio.run(ws_send(payload))
+    ws_sender.send(payload)
 
     return "OK", 200
 
@@ -1,12 +1,11 @@
 #File name: server.ws.py
-# websocket-code/server_ws-update.py
-
-import asyncio
-import websockets
-import json
+# Same server as websocket-code/server_ws-update.py
 import os
-import csv
-from datetime import datetime
+import sys
+
+# shared helpers live in engagement_core/ at the repo root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from engagement_core.ws_server import IngestServer, RESULTS_LAYOUT
 
 # ============================================================
 # CONFIG
@@ -17,115 +16,30 @@ PORT = 8000
 BASE_DIR = "data"
 SESSION_DIR = os.path.join(BASE_DIR, "sessions")
 
-os.makedirs(SESSION_DIR, exist_ok=True)
-
-# ============================================================
-# WEBSOCKET HANDLER
-# ============================================================
-async def handler(websocket):
-    print("✅ Client connected")
-
-    try:
-        async for message in websocket:
-            data = json.loads(message)
-
-            # ----------------------------
-            # Required fields validation
-            # ----------------------------
-            if not all(k in data for k in [
-                "responden", "sesi",
-                "frame", "engagement_level",
-                "fps", "response_time"
-            ]):
-                await websocket.send(json.dumps({
-                    "status": "error",
-                    "message": "Invalid payload structure"
-                }))
-                continue
-
-            responden = data["responden"]
-            sesi = data["sesi"]
-
-            timestamp = datetime.now().isoformat()
-
-            # ----------------------------
-            # Session folder
-            # ----------------------------
-            session_path = os.path.join(
-                SESSION_DIR,
-                f"responden_{responden}",
-                f"sesi_{sesi}"
-            )
-            os.makedirs(session_path, exist_ok=True)
-
-            # ----------------------------
-            # Session CSV (1 session = 1 CSV)
-            # ----------------------------
-            session_csv = os.path.join(
-                session_path,
-                "engagement_results.csv"
-            )
+# Session CSV handles stay open and are flushed every
+# WRITER_FLUSH_ROWS rows or WRITER_FLUSH_INTERVAL seconds
+WRITER_MAX_OPEN = 32
+WRITER_FLUSH_ROWS = 50
+WRITER_FLUSH_INTERVAL = 1.0
+WRITER_IDLE_TIMEOUT = 60.0
+# fsync on every flush: a power loss costs at most one flush window
+WRITER_FSYNC = False
 
-            if not os.path.exists(session_csv):
-                with open(session_csv, "w", newline="") as f:
-                    csv.writer(f).writerow([
-                        "timestamp",
-                        "frame",
-                        "engagement_level",
-                        "fps",
-                        "response_time"
-                    ])
-
-            with open(session_csv, "a", newline="") as f:
-                csv.writer(f).writerow([
-                    timestamp,
-                    data["frame"],
-                    data["engagement_level"],
-                    data["fps"],
-                    data["response_time"]
-                ])
-
-            await websocket.send(json.dumps({
-                "status": "ok",
-                "session": sesi
-            }))
-
-    except websockets.exceptions.ConnectionClosed:
-        print("❌ Client disconnected")
-
-    except Exception as e:
-        print("🔥 Server error:", e)
+# All disk I/O runs on one writer thread; handlers wait only when more
+# than WRITER_MAX_PENDING messages are still waiting for the disk
+WRITER_MAX_PENDING = 1024
 
 # ============================================================
 # MAIN
 # ============================================================
-async def main():
-    print(f"🚀 WebSocket Server running on {HOST}:{PORT}")
-    async with websockets.serve(handler, HOST, PORT):
-        await asyncio.Future()  # run forever
-
 if __name__ == "__main__":
-    asyncio.run(main())
-
-    
-interface=wlan0
-driver=nl80211
-
-ssid=RASPI_ESP32_AP
-hw_mode=g
-channel=6
-
-ieee80211n=1
-wmm_enabled=0
-
-auth_algs=1
-ignore_broadcast_ssid=0
-
-wpa=2
-wpa_passphrase=raspi12345
-wpa_key_mgmt=WPA-PSK
-rsn_pairwise=CCMP
-
-[Service]
-ExecStart=
-ExecStart=/usr/sbin/hostapd -B -P /run/hostapd.pid $DAEMON_OPTS $DAEMON_CONF
\ No newline at end of file
+    IngestServer(
+        SESSION_DIR,
+        RESULTS_LAYOUT,  # 1 session = 1 engagement_results.csv
+        max_open=WRITER_MAX_OPEN,
+        flush_rows=WRITER_FLUSH_ROWS,
+        flush_interval=WRITER_FLUSH_INTERVAL,
+        idle_timeout=WRITER_IDLE_TIMEOUT,
+        fsync=WRITER_FSYNC,
+        max_pending=WRITER_MAX_PENDING
+    ).run(HOST, PORT)
@@ -1,15 +1,30 @@
 #File name: v2_raspi_esp32.py
 
-from flask import Flask, request, send_file
+from flask import Flask, request, send_file, jsonify
 import os
 import time
 import cv2
 import mediapipe as mp
-import joblib
 import csv
 import zipfile
 import requests
 import shutil
+import sys
+import threading
+
+# shared helpers live in engagement_core/ at the repo root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from engagement_core.features import LandmarkFeatures
+from engagement_core.inference import EngagementModel
+from engagement_core.batching import MicroBatcher
+from engagement_core.ingest import AsyncFileWriter, decode_jpeg
+from engagement_core.mjpeg import MjpegAviWriter
+from engagement_core.segments import SegmentFrameStore
+from engagement_core.session_log import SessionLogger
+from engagement_core.vectors import LandmarkVectorStore
+from engagement_core.gating import MotionGate, thumbnail_jpeg
+from engagement_core.roi import RoiFaceMesh
+from engagement_core.presence import FacePresence
 
 # ============================================================
 # FLASK
@@ -22,6 +37,68 @@ app = Flask(__name__)
 BASE_FOLDER = "/home/elvindo/raspi-engagement/esp32_data"
 UPLOAD_SERVER = "http://10.34.3.210:8000/upload_session"
 
+# JPEG decode scale for classification (1 = full, 2/4 = reduced).
+# Landmarks are normalized, so reduced decoding keeps the 936 features.
+JPEG_DECODE_SCALE = 1
+
+# How the engagement/<level>/ view is stored. Every mode writes the
+# uploaded JPEG bytes to frames/ exactly once:
+#   "hardlink" : engagement/<level>/<frame> is a hard link to frames/<frame>
+#   "index"    : levels only live in results.csv; the per-level folders
+#                are filled in when the session is zipped
+#   "copy"     : old behaviour, a second copy of the bytes per level
+#   "segments" : frames are appended to segment files + index.bin
+#                (engagement_core.segments); the zip gets the usual
+#                frames/ and engagement/<level>/ folders from the store
+FRAME_STORAGE = "hardlink"
+
+# session_video.avi: the uploaded JPEGs muxed as MJPEG without
+# re-encoding, timed by arrival (e.g. 10). Off by default: every frame's
+# bytes are written a second time (roughly doubles the session's disk
+# writes and size on top of FRAME_STORAGE), plus one more sequential
+# write on the upload path. 0 disables the session video.
+SESSION_VIDEO_FPS = 0
+
+# results.csv stays open and is written in groups; CSV_FSYNC=True
+# also fsyncs each group, so a power cut loses at most ~1 s of rows
+CSV_FSYNC = False
+
+# vectors/: the 936-float landmark row of every classified frame,
+# keyed by the results.csv timestamp, for re-scoring / retraining
+# without FaceMesh ("float16" halves the size, None disables)
+VECTOR_DTYPE = "float32"
+
+# skip decode + FaceMesh while the picture barely changes: reuse the
+# last result while the 32x24 gray thumbnail (1/8-scale JPEG decode)
+# differs by < GATE_THRESHOLD (0-255, 0 = off), at most GATE_MAX_AGE s.
+# One gate per source (X-Device header, else the client address), so
+# frames of different cameras are never compared with each other
+GATE_THRESHOLD = 4.0
+GATE_MAX_AGE = 2.0
+
+# after a face is found, FaceMesh only gets a crop around the last
+# landmarks (+ ROI_MARGIN of the face size per side); full frame
+# again when the face is lost and every 30 frames. Tracking state is
+# kept per source like the motion gate; each source costs two FaceMesh
+# graphs (full frame + crop)
+ROI_TRACKING = True
+ROI_MARGIN = 0.3
+
+# width frames are downscaled to before FaceMesh (None = as captured);
+# pick it with benchmarks/bench_resolution_ladder.py
+LANDMARK_WIDTH = None
+
+# while no face is tracked, a Haar cascade on a 160 px gray copy decides
+# whether FaceMesh runs at all; empty frames go straight to level -1
+# (FaceMesh still checks every 10th "no face" frame)
+FACE_PRECHECK = True
+
+# uploads of different sources reach the classifier at the same time
+# (one FaceMesh each); their rows share one predict_proba call of up
+# to BATCH_MAX_ROWS, the first row waiting at most BATCH_MAX_WAIT_MS
+BATCH_MAX_ROWS = 8
+BATCH_MAX_WAIT_MS = 5
+
 os.makedirs(BASE_FOLDER, exist_ok=True)
 
 # ============================================================
@@ -33,12 +110,52 @@ CURRENT_SESSION = None
 # MEDIAPIPE & MODEL
 # ============================================================
 mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp_face_mesh.FaceMesh(
-    static_image_mode=False,
-    max_num_faces=1
+
+model = EngagementModel.load("Fix_kan.pkl", compile_forest=True)
+batcher = MicroBatcher(
+    model, max_batch=BATCH_MAX_ROWS, max_wait_ms=BATCH_MAX_WAIT_MS
 )
 
-model = joblib.load("Fix_kan.pkl")
+
+class SourceMesh:
+    """
+    FaceMesh tracking state + feature buffer of one source. Flask
+    serves requests on several threads; both may only be used by one
+    of them at a time, so uploads of one source take the lock in turn.
+    Different sources run in parallel and meet in the micro-batcher.
+    """
+
+    def __init__(self):
+        self.face_mesh = RoiFaceMesh(
+            lambda: mp_face_mesh.FaceMesh(
+                static_image_mode=False,
+                max_num_faces=1
+            ),
+            margin=ROI_MARGIN,
+            enabled=ROI_TRACKING,
+            input_width=LANDMARK_WIDTH,
+            presence=FacePresence() if FACE_PRECHECK else None
+        )
+        self.features = LandmarkFeatures()
+        self.lock = threading.Lock()
+
+    def landmarks(self, rgb):
+        """RGB frame -> own copy of the (1, 936) feature row, or None."""
+        with self.lock:
+            result = self.face_mesh.process(rgb)
+            vec = self.features.from_result(result)
+            return None if vec is None else vec.copy()
+
+    def stats(self):
+        with self.lock:
+            return self.face_mesh.stats()
+
+    def close(self):
+        with self.lock:
+            self.face_mesh.close()
+
+# raw uploads are persisted off the request path
+frame_writer = AsyncFileWriter()
 
 # ============================================================
 # SESSION CLASS
@@ -70,62 +187,164 @@ class Session:
                 "response_time",
                 "fps"
             ])
+        self.results = SessionLogger(self.csv_path, fsync=CSV_FSYNC)
 
-    def classify(self, image_path):
-        start = time.time()
+        # frame -> level, used to build the per-level view in "index" mode
+        self.frame_levels = {}
 
-        frame = cv2.imread(image_path)
-        if frame is None:
-            return -1, 0.0, 0, 0
+        self.store_dir = os.path.join(self.root, "segments")
+        self.frame_store = None
+        if FRAME_STORAGE == "segments":
+            self.frame_store = SegmentFrameStore(self.store_dir)
 
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        result = face_mesh.process(rgb)
+        # source id -> MotionGate / SourceMesh
+        self.gates = {}
+        self.meshes = {}
+        self.sources_lock = threading.Lock()
+
+        self.vectors = None
+        if VECTOR_DTYPE:
+            self.vectors = LandmarkVectorStore(
+                os.path.join(self.root, "vectors"), dtype=VECTOR_DTYPE
+            )
+
+        self.video = None
+        if SESSION_VIDEO_FPS:
+            self.video = MjpegAviWriter(
+                os.path.join(self.root, "session_video.avi"),
+                fps=SESSION_VIDEO_FPS
+            )
 
-        level, conf = -1, 0.0
+    def gate_for(self, source):
+        with self.sources_lock:
+            gate = self.gates.get(source)
+            if gate is None:
+                gate = self.gates[source] = MotionGate(GATE_THRESHOLD, GATE_MAX_AGE)
+            return gate
+
+    def mesh_for(self, source):
+        with self.sources_lock:
+            mesh = self.meshes.get(source)
+            if mesh is None:
+                mesh = self.meshes[source] = SourceMesh()
+            return mesh
+
+    def gate_stats(self):
+        with self.sources_lock:
+            return {source: gate.stats() for source, gate in self.gates.items()}
+
+    def roi_stats(self):
+        with self.sources_lock:
+            meshes = dict(self.meshes)
+        return {source: mesh.stats() for source, mesh in meshes.items()}
+
+    def classify(self, jpeg, source):
+        start = time.time()
+        gate = self.gate_for(source)
+
+        thumb = thumbnail_jpeg(jpeg)
+        cached = gate.reuse(thumb, start)
+        if cached is not None:
+            level, conf = cached
+            rt = time.time() - start
+            return level, conf, rt, 1 / rt if rt > 0 else 0, None
 
-        if result.multi_face_landmarks:
-            lm = result.multi_face_landmarks[0]
-            vec = []
-            for p in lm.landmark:
-                vec.extend([p.x, p.y])
+        frame = decode_jpeg(jpeg, JPEG_DECODE_SCALE)
+        if frame is None:
+            return -1, 0.0, 0, 0, None
 
-            if len(vec) == 936:
-                probs = model.predict_proba([vec])[0]
-                level = int(model.predict([vec])[0])
-                conf = float(max(probs))
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        vec = self.mesh_for(source).landmarks(rgb)
 
-                cv2.imwrite(
-                    os.path.join(
-                        self.engagement_dir, str(level),
-                        os.path.basename(image_path)
-                    ),
-                    frame
-                )
+        level, conf, _ = batcher.submit(vec)
+        gate.update(thumb, start, (level, conf))
 
         rt = time.time() - start
         fps = 1 / rt if rt > 0 else 0
-        return level, conf, rt, fps
-
-    def log(self, filename, level, conf, rt, fps):
-        with open(self.csv_path, "a", newline="") as f:
-            csv.writer(f).writerow([
-                int(time.time() * 1000),
-                filename,
-                level,
-                conf,
-                rt,
-                fps
-            ])
+        return level, conf, rt, fps, vec
+
+    def store_frame(self, filename, jpeg, level):
+        """Write the original JPEG bytes once, plus the per-level view."""
+        if self.frame_store is not None:
+            self.frame_store.append(jpeg, level, time.time(), filename)
+            return
+
+        frame_path = os.path.join(self.frame_dir, filename)
+        if level < 0:
+            frame_writer.write(frame_path, jpeg)
+            return
+
+        level_path = os.path.join(self.engagement_dir, str(level), filename)
+        self.frame_levels[filename] = level
+
+        if FRAME_STORAGE == "hardlink":
+            frame_writer.write(frame_path, jpeg, links=(level_path,))
+        elif FRAME_STORAGE == "copy":
+            frame_writer.write(frame_path, jpeg)
+            frame_writer.write(level_path, jpeg)
+        else:
+            frame_writer.write(frame_path, jpeg)
+
+    def record(self, filename, jpeg, timestamp):
+        """Append the JPEG bytes to the session video (no codec work)."""
+        if self.video is not None:
+            self.video.append(jpeg, timestamp, filename)
+
+    def store_vector(self, vec, timestamp, level):
+        if self.vectors is not None and vec is not None:
+            self.vectors.append(vec, int(timestamp * 1000), timestamp, level)
+
+    def log(self, filename, level, conf, rt, fps, timestamp):
+        self.results.log([
+            int(timestamp * 1000),
+            filename,
+            level,
+            conf,
+            rt,
+            fps
+        ])
 
     def zip_and_upload(self):
         zip_path = self.root + ".zip"
 
+        # make sure every queued frame is on disk before zipping
+        frame_writer.flush()
+        self.results.close()
+        print("[GATE]", self.gate_stats())
+        print("[ROI]", self.roi_stats())
+        for mesh in self.meshes.values():
+            mesh.close()
+        if self.vectors is not None:
+            self.vectors.close()
+        if self.video is not None:
+            self.video.close()
+
         with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as z:
             for folder, _, files in os.walk(self.root):
+                if folder.startswith(self.store_dir):
+                    continue
                 for file in files:
                     full = os.path.join(folder, file)
                     z.write(full, arcname=os.path.relpath(full, self.root))
 
+            if FRAME_STORAGE == "index":
+                # same layout as the other modes, built from the level index
+                for filename, level in self.frame_levels.items():
+                    z.write(
+                        os.path.join(self.frame_dir, filename),
+                        arcname=os.path.join("engagement", str(level), filename)
+                    )
+
+            if self.frame_store is not None:
+                for record in self.frame_store.frames():
+                    data = self.frame_store.read(record)
+                    z.writestr(os.path.join("frames", record.name), data)
+                    if record.level >= 0:
+                        z.writestr(
+                            os.path.join("engagement", str(record.level), record.name), data
+                        )
+                self.frame_store.close()
+
         with open(zip_path, "rb") as f:
             requests.post(
                 UPLOAD_SERVER,
@@ -151,19 +370,50 @@ def upload_frame():
     filename = request.headers.get(
         "X-Filename", f"{int(time.time()*1000)}.jpg"
     )
+    source = request.headers.get("X-Device") or request.remote_addr
 
     if CURRENT_SESSION is None:
         CURRENT_SESSION = Session(responden, sesi)
 
-    frame_path = os.path.join(CURRENT_SESSION.frame_dir, filename)
-    with open(frame_path, "wb") as f:
-        f.write(request.data)
+    received_at = time.time()
+    jpeg = request.get_data()
 
-    level, conf, rt, fps = CURRENT_SESSION.classify(frame_path)
-    CURRENT_SESSION.log(filename, level, conf, rt, fps)
+    level, conf, rt, fps, vec = CURRENT_SESSION.classify(jpeg, source)
+    CURRENT_SESSION.store_frame(filename, jpeg, level)
+    CURRENT_SESSION.store_vector(vec, received_at, level)
+    CURRENT_SESSION.record(filename, jpeg, received_at)
+    CURRENT_SESSION.log(filename, level, conf, rt, fps, received_at)
 
     return "OK", 200
 
+# ============================================================
+# API: PIPELINE STATS
+# ============================================================
+@app.route("/pipeline_stats", methods=["GET"])
+def pipeline_stats():
+    # achieved predict_proba batch sizes across sources
+    stats = {"batch": batcher.stats()}
+    if CURRENT_SESSION is not None:
+        stats["roi"] = CURRENT_SESSION.roi_stats()
+        # FaceMesh runs vs. frames answered by the motion gate, per source
+        stats["gate"] = CURRENT_SESSION.gate_stats()
+    return jsonify(stats)
+
+# ============================================================
+# API: STORAGE STATS
+# ============================================================
+@app.route("/storage_stats", methods=["GET"])
+def storage_stats():
+    stats = frame_writer.stats()
+    stats["mode"] = FRAME_STORAGE
+    if CURRENT_SESSION is not None and CURRENT_SESSION.frame_store is not None:
+        stats["segments"] = CURRENT_SESSION.frame_store.stats()
+    if CURRENT_SESSION is not None and CURRENT_SESSION.video is not None:
+        stats["video"] = CURRENT_SESSION.video.stats()
+    if CURRENT_SESSION is not None and CURRENT_SESSION.vectors is not None:
+        stats["vectors"] = CURRENT_SESSION.vectors.stats()
+    return jsonify(stats)
+
 # ============================================================
 # API: STOP SESSION
 # ============================================================
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# engagement_core lives at the repo root, like the scripts import it
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -0,0 +1,46 @@
+import threading
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from engagement_core.batching import MicroBatcher
+from engagement_core.features import N_FEATURES
+from engagement_core.inference import NO_FACE, EngagementModel
+
+
+def make_model():
+    rng = np.random.default_rng(0)
+    X = rng.random((40, N_FEATURES), dtype=np.float32)
+    return EngagementModel(LogisticRegression(max_iter=200).fit(X, np.arange(40) % 4)), X
+
+
+def test_submit_matches_direct_predict():
+    model, X = make_model()
+    batcher = MicroBatcher(model, max_batch=4, max_wait_ms=1)
+    for row in X[:5]:
+        got = batcher.submit(row[None, :])
+        want = model.predict(row[None, :])
+        assert (got.level, got.confidence) == (want.level, want.confidence)
+    assert batcher.submit(None) is NO_FACE
+
+
+def test_concurrent_sources_share_batches():
+    model, X = make_model()
+    batcher = MicroBatcher(model, max_batch=8, max_wait_ms=20)
+    results = {}
+    start = threading.Barrier(4)
+
+    def source(i):
+        start.wait()
+        results[i] = batcher.submit(X[i:i + 1]).level
+
+    threads = [threading.Thread(target=source, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {i: model.predict(X[i:i + 1]).level for i in range(4)}
+    stats = batcher.stats()
+    assert stats["rows"] == 4
+    assert stats["mean_batch_size"] > 1
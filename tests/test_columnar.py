@@ -0,0 +1,60 @@
+import csv
+import os
+
+from engagement_core.columnar import ResultColumns, export_csv, load_columns, summarize
+from engagement_core.summary import SessionSummary
+
+
+def fill(root, n):
+    cols = ResultColumns(root, flush_rows=4, truncate=True)
+    summary = SessionSummary(os.path.join(root, "summary.json"), fresh=True)
+    for i in range(n):
+        level = i % 5 - 1
+        cols.append(1000.25 + i, level, 0.5, 0.1, 10.0, f"frame_{i}.jpg")
+        summary.add(1000.25 + i, level, 0.5, 0.1)
+    cols.close()
+    summary.close()
+
+
+def read_csv(path):
+    with open(path, newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_export_default_layout(tmp_path):
+    root = str(tmp_path / "results.cols")
+    fill(root, 10)
+
+    out = str(tmp_path / "results.csv")
+    assert export_csv(root, out) == 10
+    rows = read_csv(out)
+    assert rows[0] == ["timestamp", "frame", "engagement_level", "confidence", "response_time", "fps"]
+    assert rows[1][:3] == ["1000.250", "frame_0.jpg", "-1"]
+    assert len(rows) == 11
+
+
+def test_export_custom_layout(tmp_path):
+    root = str(tmp_path / "results.cols")
+    fill(root, 3)
+
+    def row(timestamp, frame, level, confidence, response_time, fps):
+        return [int(timestamp * 1000), frame, level]
+
+    out = str(tmp_path / "results.csv")
+    export_csv(root, out, ["ms", "frame", "level"], row)
+    assert read_csv(out) == [
+        ["ms", "frame", "level"],
+        ["1000250", "frame_0.jpg", "-1"],
+        ["1001250", "frame_1.jpg", "0"],
+        ["1002250", "frame_2.jpg", "1"],
+    ]
+
+
+def test_summary_matches_columns(tmp_path):
+    root = str(tmp_path / "results.cols")
+    fill(root, 23)
+
+    from_cols = summarize(load_columns(root))
+    saved = SessionSummary.load(os.path.join(root, "summary.json"))
+    assert saved["total_frames"] == from_cols["total_frames"]
+    assert saved["engagement_counts"] == from_cols["engagement_counts"]
@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from engagement_core.features import N_FEATURES, LandmarkFeatures, face_box, landmark_xy
+
+
+def points(n=478, seed=0):
+    return np.random.default_rng(seed).random((n, 3), dtype=np.float32)
+
+
+def stand_in(pts):
+    return SimpleNamespace(landmark=[SimpleNamespace(x=float(x), y=float(y), z=float(z))
+                                     for x, y, z in pts])
+
+
+def protobuf(pts):
+    landmark_pb2 = pytest.importorskip("mediapipe.framework.formats.landmark_pb2")
+    face = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z in pts:
+        lm = face.landmark.add()
+        lm.x, lm.y, lm.z = x, y, z
+    return face
+
+
+def test_fill_stand_in_is_first_468_xy_pairs():
+    pts = points()
+    row = LandmarkFeatures().fill(stand_in(pts))
+    assert row.shape == (1, N_FEATURES)
+    assert np.array_equal(row[0], pts[:468, :2].reshape(-1))
+
+
+def test_fill_reuses_one_buffer():
+    features = LandmarkFeatures()
+    first = features.fill(stand_in(points(seed=1)))
+    second = features.fill(stand_in(points(seed=2)))
+    assert first is second
+
+
+def test_fill_too_few_landmarks():
+    assert LandmarkFeatures().fill(stand_in(points(100))) is None
+
+
+def test_wire_parse_matches_landmark_walk():
+    pts = points()
+    face = protobuf(pts)
+    assert landmark_xy(face) is not None
+    assert np.array_equal(LandmarkFeatures().fill(face), LandmarkFeatures().fill(stand_in(pts)))
+    assert face_box(face) == face_box(stand_in(pts))
+
+
+def test_wire_parse_zero_coordinates():
+    pts = points()
+    pts[0] = 0.0
+    assert np.array_equal(LandmarkFeatures().fill(protobuf(pts))[0], pts[:468, :2].reshape(-1))
+
+
+def test_unexpected_layout_falls_back_to_walk():
+    pts = points()
+    face = protobuf(pts)
+    face.landmark[3].visibility = 0.5
+    assert landmark_xy(face) is None
+    assert np.array_equal(LandmarkFeatures().fill(face)[0], pts[:468, :2].reshape(-1))
+
+
+def test_from_result_without_face():
+    assert LandmarkFeatures().from_result(SimpleNamespace(multi_face_landmarks=None)) is None
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+
+from engagement_core.forest import CompiledForest, is_forest
+from engagement_core.inference import EngagementModel
+
+
+def landmark_like(n, seed):
+    # normalized landmark coordinates live in [0, 1]
+    rng = np.random.default_rng(seed)
+    X = rng.random((n, 936), dtype=np.float32)
+    y = (X[:, 10] + X[:, 500] > 1).astype(int) + 2 * (X[:, 7] > 0.6)
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def data():
+    return landmark_like(400, 0), landmark_like(300, 1)[0]
+
+
+@pytest.mark.parametrize("make", [
+    lambda: RandomForestClassifier(n_estimators=25, random_state=0),
+    lambda: RandomForestClassifier(n_estimators=10, max_depth=4, random_state=1),
+    lambda: ExtraTreesClassifier(n_estimators=10, random_state=2),
+])
+def test_predict_proba_matches_sklearn_exactly(data, make):
+    (X, y), X_test = data
+    forest = make().fit(X, y)
+    compiled = CompiledForest.from_sklearn(forest)
+
+    assert np.array_equal(compiled.predict_proba(X_test), forest.predict_proba(X_test))
+    assert np.array_equal(compiled.predict(X_test), forest.predict(X_test))
+    assert np.array_equal(compiled.classes_, forest.classes_)
+
+
+def test_single_row_and_float64_input(data):
+    (X, y), X_test = data
+    forest = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    compiled = CompiledForest.from_sklearn(forest)
+
+    row = X_test[:1].astype(np.float64)
+    assert np.array_equal(compiled.predict_proba(row), forest.predict_proba(row))
+    assert np.array_equal(compiled.predict_proba(X_test[0]), forest.predict_proba(X_test[:1]))
+
+
+def test_string_classes(data):
+    (X, y), X_test = data
+    labels = np.array(["low", "mid", "high", "very high"])[y]
+    forest = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, labels)
+    compiled = CompiledForest.from_sklearn(forest)
+    assert np.array_equal(compiled.predict(X_test), forest.predict(X_test))
+
+
+def test_rejects_non_forest(data):
+    (X, y), _ = data
+    assert not is_forest(object())
+    with pytest.raises(TypeError):
+        CompiledForest.from_sklearn(object())
+
+
+def test_engagement_model_levels_match_predict(data):
+    (X, y), X_test = data
+    forest = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    model = EngagementModel(CompiledForest.from_sklearn(forest))
+
+    predictions = model.predict_batch(X_test)
+    assert [p.level for p in predictions] == list(forest.predict(X_test))
+    single = model.predict(X_test[:1])
+    assert single.level == predictions[0].level
+    assert single.confidence == pytest.approx(forest.predict_proba(X_test[:1]).max())
@@ -0,0 +1,76 @@
+import numpy as np
+
+from engagement_core.gating import MotionGate, thumbnail
+
+
+def flat(value):
+    return np.full((24, 32), value, dtype=np.int16)
+
+
+def primed(threshold=4.0, max_age=2.0):
+    gate = MotionGate(threshold, max_age)
+    assert gate.reuse(flat(100), 0.0) is None  # nothing processed yet
+    gate.update(flat(100), 0.0, (2, 0.9))
+    return gate
+
+
+def test_reuses_below_threshold():
+    gate = primed()
+    assert gate.reuse(flat(103), 0.5) == (2, 0.9)
+    assert gate.reuse(flat(104), 0.5) == (2, 0.9)  # equal to threshold still counts as unchanged
+
+
+def test_change_above_threshold_reprocesses():
+    gate = primed()
+    assert gate.reuse(flat(105), 0.5) is None
+    assert gate.stats()["changed"] == 1
+
+
+def test_mean_not_max_difference():
+    gate = primed()
+    thumb = flat(100)
+    thumb[0, :10] = 255  # a small bright patch, mean change ~2
+    assert gate.reuse(thumb, 0.5) == (2, 0.9)
+
+
+def test_result_expires_after_max_age():
+    gate = primed(max_age=2.0)
+    assert gate.reuse(flat(100), 1.99) == (2, 0.9)
+    assert gate.reuse(flat(100), 2.0) is None
+    assert gate.stats()["expired"] == 1
+
+
+def test_update_moves_the_reference():
+    gate = primed()
+    gate.update(flat(150), 1.0, (0, 0.6))
+    assert gate.reuse(flat(100), 1.5) is None
+    assert gate.reuse(flat(152), 1.5) == (0, 0.6)
+
+
+def test_threshold_zero_disables():
+    gate = primed(threshold=0)
+    assert gate.reuse(flat(100), 0.1) is None
+
+
+def test_missing_thumbnail_never_reuses():
+    gate = primed()
+    assert gate.reuse(None, 0.1) is None
+    gate.update(None, 0.2, (3, 1.0))  # undecodable frame keeps the old reference
+    assert gate.reuse(flat(100), 0.3) == (2, 0.9)
+
+
+def test_stats_skip_rate():
+    gate = primed()
+    for t in (0.1, 0.2, 0.3):
+        gate.reuse(flat(100), t)
+    stats = gate.stats()
+    assert (stats["processed"], stats["skipped"]) == (1, 3)
+    assert stats["skip_rate"] == 0.75
+
+
+def test_thumbnail_of_bgr_frame():
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    frame[:, 320:] = 200
+    thumb = thumbnail(frame)
+    assert thumb.shape == (24, 32) and thumb.dtype == np.int16
+    assert thumb[:, :15].max() == 0 and thumb[:, 17:].min() > 0
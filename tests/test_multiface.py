@@ -0,0 +1,102 @@
+from collections import namedtuple
+from types import SimpleNamespace
+
+import numpy as np
+
+from engagement_core.multiface import FaceTracker, MultiFaceClassifier
+
+
+def box(cx, cy, size=0.1):
+    return (cx - size / 2, cy - size / 2, cx + size / 2, cy + size / 2)
+
+
+def test_ids_stable_under_small_motion():
+    tracker = FaceTracker()
+    first = tracker.update([box(0.2, 0.5), box(0.5, 0.5), box(0.8, 0.5)])
+    assert first == [0, 1, 2]
+    for step in range(1, 20):
+        dx = 0.005 * step
+        assert tracker.update([box(0.2 + dx, 0.5), box(0.5, 0.5 + dx), box(0.8 - dx, 0.5)]) == first
+
+
+def test_ids_follow_boxes_not_order():
+    tracker = FaceTracker()
+    tracker.update([box(0.2, 0.5), box(0.8, 0.5)])
+    assert tracker.update([box(0.81, 0.5), box(0.21, 0.5)]) == [1, 0]
+
+
+def test_new_face_gets_new_id():
+    tracker = FaceTracker()
+    tracker.update([box(0.2, 0.5)])
+    assert tracker.update([box(0.2, 0.5), box(0.7, 0.3)]) == [0, 1]
+
+
+def test_fast_move_matched_by_centre_distance():
+    tracker = FaceTracker(max_distance=0.1)
+    tracker.update([box(0.2, 0.5, size=0.05)])
+    # no overlap with the old box, but within max_distance
+    assert tracker.update([box(0.28, 0.5, size=0.05)]) == [0]
+    # too far: a different face
+    assert tracker.update([box(0.6, 0.5, size=0.05)]) == [1]
+
+
+def test_missed_frames_keep_then_drop_track():
+    tracker = FaceTracker(max_missed=3)
+    tracker.update([box(0.5, 0.5)])
+    for _ in range(3):
+        tracker.update([])
+    assert tracker.active() == [0]
+    assert tracker.update([box(0.5, 0.5)]) == [0]  # came back in time
+
+    for _ in range(4):
+        tracker.update([])
+    assert tracker.active() == []
+    assert tracker.update([box(0.5, 0.5)]) == [1]  # ids are never reused
+
+
+def test_one_track_per_box():
+    tracker = FaceTracker()
+    tracker.update([box(0.5, 0.5)])
+    # two boxes both overlap the only track: one keeps it, one is new
+    assert sorted(tracker.update([box(0.5, 0.5), box(0.52, 0.5)])) == [0, 1]
+
+
+def test_classifier_labels_faces_with_track_ids():
+    Prediction = namedtuple("Prediction", ["level", "confidence", "probs"])
+    calls = []
+
+    def predict_rows(rows):
+        calls.append(len(rows))
+        return [Prediction(i % 4, 0.5, None) for i in range(len(rows))]
+
+    multi = MultiFaceClassifier(predict_rows, max_faces=3)
+    rows = np.zeros((2, multi.features.n_features), dtype=np.float32)
+    boxes = [box(0.2, 0.5), box(0.7, 0.5)]
+    faces = multi.label(rows, boxes)
+    assert calls == [2]  # one model call per frame
+    assert [(f.track_id, f.level) for f in faces] == [(0, 0), (1, 1)]
+
+    assert multi.label(rows[:0], []) == []
+    faces = multi.label(rows, boxes[::-1])
+    assert [f.track_id for f in faces] == [1, 0]
+
+
+def face_at(cx, cy, size=0.1, seed=0):
+    pts = np.random.default_rng(seed).random((478, 2)) * size + (cx - size / 2, cy - size / 2)
+    return SimpleNamespace(landmark=[SimpleNamespace(x=float(x), y=float(y), z=0.0) for x, y in pts])
+
+
+def test_extract_updates_tracks_in_frame_order():
+    multi = MultiFaceClassifier(lambda rows: [], max_faces=3)
+    frame = SimpleNamespace(multi_face_landmarks=[face_at(0.2, 0.5), face_at(0.7, 0.5)])
+    rows, boxes, ids = multi.extract(frame)
+    assert rows.shape == (2, multi.features.n_features) and ids == [0, 1]
+
+    # the next frame's ids are already known before any model call
+    frame = SimpleNamespace(multi_face_landmarks=[face_at(0.71, 0.5), face_at(0.21, 0.5)])
+    assert multi.extract(frame)[2] == [1, 0]
+
+    # frames without faces age the tracks as well
+    multi.tracker.max_missed = 0
+    assert multi.extract(SimpleNamespace(multi_face_landmarks=None))[2] == []
+    assert multi.tracker.active() == []
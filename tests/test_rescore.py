@@ -0,0 +1,38 @@
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from engagement_core.columnar import load_columns
+from engagement_core.features import N_FEATURES
+from engagement_core.inference import EngagementModel
+from engagement_core.rescore import load_frame_ids, rescore_session
+from engagement_core.vectors import LandmarkVectorStore
+
+
+def make_model(rng):
+    X = rng.random((80, N_FEATURES), dtype=np.float32)
+    y = np.arange(80) % 4
+    return EngagementModel(LogisticRegression(max_iter=200).fit(X, y))
+
+
+def test_rescore_writes_frame_key(tmp_path):
+    rng = np.random.default_rng(0)
+    model = make_model(rng)
+
+    vector_dir = str(tmp_path / "vectors")
+    store = LandmarkVectorStore(vector_dir, chunk_rows=8)
+    vectors = rng.random((20, N_FEATURES), dtype=np.float32)
+    frame_ids = 1_700_000_000_000 + 137 * np.arange(20)
+    for vec, frame_id in zip(vectors, frame_ids):
+        store.append(vec, int(frame_id), frame_id / 1000, 1)
+    store.close()
+
+    # model passed in, no worker initializer needed
+    result = rescore_session(vector_dir, "v2", model, batch_rows=6)
+    assert result["rows"] == 20
+
+    cols = load_columns(result["output"])
+    assert load_frame_ids(result["output"]).tolist() == frame_ids.tolist()
+    np.testing.assert_allclose(cols["timestamp"], frame_ids / 1000)
+
+    expected = [p.level for p in model.predict_batch(vectors)]
+    assert cols["level"].tolist() == expected
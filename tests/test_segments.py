@@ -0,0 +1,118 @@
+import os
+
+from engagement_core.segments import INDEX_FILE, SegmentFrameStore, _segment_path
+
+
+def jpeg(i, size=100):
+    return bytes([0xFF, 0xD8]) + bytes([i % 256]) * size + bytes([0xFF, 0xD9])
+
+
+def fill(store, n, start=0):
+    return [store.append(jpeg(i), level=i % 4, timestamp=1000.0 + i, name=f"frame_{i}.jpg")
+            for i in range(start, start + n)]
+
+
+def test_append_and_read_back(tmp_path):
+    store = SegmentFrameStore(str(tmp_path))
+    ids = fill(store, 10)
+    assert ids == list(range(10))
+    assert store.get(3) == jpeg(3)
+    assert [r.name for r in store.frames(level=2)] == ["frame_2.jpg", "frame_6.jpg"]
+    store.close()
+
+
+def test_same_name_twice_keeps_both(tmp_path):
+    store = SegmentFrameStore(str(tmp_path))
+    a = store.append(b"first", 1, 1.0, "frame_1.jpg")
+    b = store.append(b"second", 1, 1.0, "frame_1.jpg")
+    assert (store.get(a), store.get(b)) == (b"first", b"second")
+    store.close()
+
+
+def test_reopen_continues(tmp_path):
+    store = SegmentFrameStore(str(tmp_path))
+    fill(store, 5)
+    store.close()
+
+    store = SegmentFrameStore(str(tmp_path))
+    assert len(store) == 5
+    assert fill(store, 3, start=5) == [5, 6, 7]
+    assert [store.get(i) for i in range(8)] == [jpeg(i) for i in range(8)]
+    store.close()
+
+
+def test_torn_index_tail_is_dropped(tmp_path):
+    store = SegmentFrameStore(str(tmp_path))
+    fill(store, 4)
+    store.close()
+
+    index = os.path.join(str(tmp_path), INDEX_FILE)
+    good = os.path.getsize(index)
+    with open(index, "ab") as f:
+        f.write(b"\x07\x00\x00")  # half a record, power cut mid-write
+
+    store = SegmentFrameStore(str(tmp_path))
+    assert len(store) == 4
+    assert os.path.getsize(index) == good
+    assert store.append(b"next", 1, 2.0, "next.jpg") == 4
+    store.close()
+
+    store = SegmentFrameStore(str(tmp_path))
+    assert len(store) == 5
+    assert store.get(4) == b"next"
+    store.close()
+
+
+def test_index_record_without_bytes_is_dropped(tmp_path):
+    store = SegmentFrameStore(str(tmp_path))
+    fill(store, 4)
+    store.close()
+
+    # index reached the disk, the last frame's bytes only partly
+    segment = _segment_path(str(tmp_path), 0)
+    with open(segment, "r+b") as f:
+        f.truncate(os.path.getsize(segment) - 10)
+
+    store = SegmentFrameStore(str(tmp_path))
+    assert len(store) == 3
+    assert [store.get(i) for i in range(3)] == [jpeg(i) for i in range(3)]
+    assert store.append(jpeg(9), 1, 9.0, "frame_9.jpg") == 3
+    assert store.get(3) == jpeg(9)
+    store.close()
+
+
+def test_rollover_after_orphan_segment_bytes(tmp_path):
+    store = SegmentFrameStore(str(tmp_path), segment_bytes=250)
+    fill(store, 2)
+    store.close()
+
+    # crash after bytes went to a new segment but before its index record
+    with open(_segment_path(str(tmp_path), 1), "wb") as f:
+        f.write(b"orphan bytes")
+
+    store = SegmentFrameStore(str(tmp_path), segment_bytes=250)
+    fill(store, 3, start=2)
+    assert [store.get(i) for i in range(5)] == [jpeg(i) for i in range(5)]
+    store.close()
+
+    store = SegmentFrameStore(str(tmp_path), segment_bytes=250)
+    assert [store.get(i) for i in range(5)] == [jpeg(i) for i in range(5)]
+    assert store.stats()["segments"] >= 2
+    store.close()
+
+
+def test_export_layouts(tmp_path):
+    store = SegmentFrameStore(str(tmp_path / "store"))
+    fill(store, 4)
+    store.append(b"no face", -1, 5.0, "frame_x.jpg")
+
+    assert store.export(str(tmp_path / "a")) == 5
+    assert sorted(os.listdir(tmp_path / "a" / "engagement")) == ["0", "1", "2", "3"]
+    assert (tmp_path / "a" / "engagement" / "2" / "frame_2.jpg").read_bytes() == jpeg(2)
+
+    store.export(str(tmp_path / "b"), layout="frames")
+    assert len(os.listdir(tmp_path / "b" / "frames")) == 5
+
+    assert store.export(str(tmp_path / "c"), layout="flat", level=1) == 1
+    assert os.listdir(tmp_path / "c") == ["frame_1.jpg"]
+    store.close()
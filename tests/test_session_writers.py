@@ -0,0 +1,144 @@
+import asyncio
+import os
+
+import pytest
+
+from engagement_core import session_writers
+from engagement_core.session_writers import AsyncSessionWriter, SessionWriterCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(session_writers.time, "monotonic", clock)
+    return clock
+
+
+def make_cache(root, **kwargs):
+    def prepare(responden, sesi):
+        path = os.path.join(root, f"{responden}_{sesi}.csv")
+        if not os.path.exists(path):
+            with open(path, "w") as f:
+                f.write("h\n")
+        return path
+    return SessionWriterCache(prepare, **kwargs)
+
+
+def lines(root, key):
+    path = os.path.join(root, f"{key[0]}_{key[1]}.csv")
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return f.read().splitlines()
+
+
+def test_flush_after_flush_rows(tmp_path, clock):
+    cache = make_cache(str(tmp_path), flush_rows=3, flush_interval=60)
+    cache.writerows(("1", "a"), [["r1"], ["r2"]])
+    assert lines(tmp_path, ("1", "a")) == ["h"]
+    cache.writerows(("1", "a"), [["r3"]])
+    assert lines(tmp_path, ("1", "a")) == ["h", "r1", "r2", "r3"]
+    cache.close()
+
+
+def test_maintain_flushes_after_interval(tmp_path, clock):
+    cache = make_cache(str(tmp_path), flush_rows=100, flush_interval=1.0, idle_timeout=60)
+    cache.writerows(("1", "a"), [["r1"]])
+
+    clock.now += 0.5
+    cache.maintain()
+    assert lines(tmp_path, ("1", "a")) == ["h"]
+
+    clock.now += 0.6
+    cache.maintain()
+    assert lines(tmp_path, ("1", "a")) == ["h", "r1"]
+    assert len(cache) == 1
+    cache.close()
+
+
+def test_maintain_evicts_idle_sessions(tmp_path, clock):
+    cache = make_cache(str(tmp_path), flush_rows=100, flush_interval=1.0, idle_timeout=5.0)
+    cache.writerows(("1", "a"), [["r1"]])
+    clock.now += 3
+    cache.writerows(("2", "b"), [["r2"]])
+
+    clock.now += 2.5
+    cache.maintain()
+    assert len(cache) == 1  # ("1", "a") idle for 5.5 s
+    assert lines(tmp_path, ("1", "a")) == ["h", "r1"]
+
+    # an evicted session reopens and appends on its next row
+    cache.writerows(("1", "a"), [["r3"]])
+    cache.close()
+    assert lines(tmp_path, ("1", "a")) == ["h", "r1", "r3"]
+    assert len(cache) == 0
+
+
+def test_lru_close_at_max_open(tmp_path, clock):
+    cache = make_cache(str(tmp_path), max_open=2, flush_rows=100)
+    cache.writerows(("1", "a"), [["a"]])
+    cache.writerows(("2", "b"), [["b"]])
+    cache.writerows(("1", "a"), [["a2"]])
+    cache.writerows(("3", "c"), [["c"]])  # closes ("2", "b"), the least recently used
+    assert len(cache) == 2
+    assert lines(tmp_path, ("2", "b")) == ["h", "b"]
+    cache.close()
+
+
+def test_busy_session_does_not_starve_maintain(tmp_path):
+    cache = make_cache(str(tmp_path), flush_rows=1000, flush_interval=0.2, idle_timeout=0.5)
+    quiet = ("quiet", "1")
+
+    async def go():
+        writer = AsyncSessionWriter(cache)
+        writer.start()
+        await writer.put(quiet, [["q"]])
+
+        seen = None
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        while loop.time() - start < 1.5:
+            await writer.put(("busy", "1"), [["b"]])
+            if seen is None and lines(tmp_path, quiet) == ["h", "q"]:
+                seen = loop.time() - start
+            await asyncio.sleep(0.01)
+
+        open_keys = list(cache._entries)
+        await writer.close()
+        return seen, open_keys
+
+    seen, open_keys = asyncio.run(go())
+    assert seen is not None and seen < 0.6  # time-flushed while another session sends
+    assert quiet not in open_keys           # and evicted once idle
+    assert ("busy", "1") in open_keys
+
+
+def test_maintain_error_does_not_kill_writer(tmp_path, capsys):
+    cache = make_cache(str(tmp_path), flush_interval=0.05)
+    calls = []
+
+    def failing_maintain():
+        calls.append(1)
+        raise OSError("disk gone")
+
+    cache.maintain = failing_maintain
+
+    async def go():
+        writer = AsyncSessionWriter(cache)
+        writer.start()
+        await asyncio.sleep(0.2)
+        await writer.put(("1", "a"), [["r1"]])
+        await asyncio.wait_for(writer.close(), 2)
+
+    asyncio.run(go())
+    assert calls
+    assert lines(tmp_path, ("1", "a")) == ["h", "r1"]
+    assert "disk gone" in capsys.readouterr().out
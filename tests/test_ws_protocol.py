@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from engagement_core.ws_protocol import batch_ack, group_by_session, is_valid_record, parse_message
+
+
+def record(frame, responden="1", sesi="a", **extra):
+    return dict(responden=responden, sesi=sesi, frame=frame, engagement_level=2,
+                fps=9.0, response_time=0.1, **extra)
+
+
+def test_single_record():
+    records, rejected, is_batch = parse_message(json.dumps(record("f.jpg")))
+    assert records == [record("f.jpg")]
+    assert rejected == 0
+    assert not is_batch
+
+
+def test_single_invalid_record():
+    records, rejected, is_batch = parse_message(json.dumps({"frame": "f.jpg"}))
+    assert records == []
+    assert rejected == 1
+    assert not is_batch
+
+
+def test_batch_keeps_valid_rows_and_counts_rejects():
+    message = json.dumps([record("a.jpg", seq=1), {"responden": "1"}, "junk", record("b.jpg", seq=2)])
+    records, rejected, is_batch = parse_message(message)
+    assert [r["frame"] for r in records] == ["a.jpg", "b.jpg"]
+    assert rejected == 2
+    assert is_batch
+
+
+def test_not_json():
+    with pytest.raises(ValueError):
+        parse_message("not json")
+
+
+def test_is_valid_record():
+    assert is_valid_record(record("f.jpg"))
+    assert not is_valid_record([record("f.jpg")])
+    bad = record("f.jpg")
+    del bad["fps"]
+    assert not is_valid_record(bad)
+
+
+def test_batch_ack_is_cumulative():
+    records = [record("a.jpg", seq=3), record("b.jpg", seq=7), record("c.jpg", seq=5)]
+    assert batch_ack(records, 1) == {"status": "ok", "count": 3, "ack_seq": 7, "rejected": 1}
+
+
+def test_batch_ack_without_seq():
+    assert batch_ack([record("a.jpg")], 0)["ack_seq"] is None
+    assert batch_ack([record("a.jpg", seq="7")], 0)["ack_seq"] is None
+
+
+def test_batch_ack_all_rejected():
+    assert batch_ack([], 3) == {"status": "error", "count": 0, "ack_seq": None, "rejected": 3}
+    assert batch_ack([], 0)["status"] == "ok"
+
+
+def test_group_by_session_first_seen_order():
+    records = [record("1", sesi="b"), record("2", sesi="a"), record("3", sesi="b")]
+    groups = [(key, [r["frame"] for r in rows]) for key, rows in group_by_session(records)]
+    assert groups == [(("1", "b"), ["1", "3"]), (("1", "a"), ["2"])]
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+websockets = pytest.importorskip("websockets")
+
+from engagement_core.ws_sender import WebSocketSender
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_close_while_server_down_backs_off_and_gives_up():
+    sender = WebSocketSender(f"ws://127.0.0.1:{free_port()}", max_batch=4,
+                             retry_min=0.05, retry_max=0.2)
+    for i in range(3):
+        sender.send({"frame": i})
+    time.sleep(0.1)
+
+    start = time.monotonic()
+    sender.close(timeout=0.6)
+    elapsed = time.monotonic() - start
+
+    stats = sender.stats()
+    assert not sender._thread.is_alive()
+    assert 0.5 < elapsed < 1.5
+    # backoff keeps going during close instead of spinning
+    assert stats["reconnects"] < 15
+    assert stats["unsent"] == 3
+    assert stats["queue_depth"] == 0
+
+
+def test_close_drains_to_a_running_server():
+    port = free_port()
+    received = []
+    started = threading.Event()
+    stop = None
+
+    async def handler(ws):
+        async for message in ws:
+            records = json.loads(message)
+            received.extend(records)
+            await ws.send(json.dumps({"status": "ok", "count": len(records),
+                                      "ack_seq": records[-1]["seq"]}))
+
+    def serve():
+        nonlocal stop
+        loop = asyncio.new_event_loop()
+        stop = loop.create_future()
+
+        async def main():
+            async with websockets.serve(handler, "127.0.0.1", port):
+                started.set()
+                await stop
+
+        loop.run_until_complete(main())
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    started.wait(5)
+
+    sender = WebSocketSender(f"ws://127.0.0.1:{port}", max_batch=4, retry_min=0.05)
+    for i in range(10):
+        sender.send({"frame": i})
+    sender.close(timeout=3.0)
+
+    stats = sender.stats()
+    assert (stats["sent"], stats["unsent"]) == (10, 0)
+
+    # sends are pipelined, close() does not wait for the server's acks
+    deadline = time.monotonic() + 5
+    while len(received) < 10 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [r["frame"] for r in received] == list(range(10))
+    stop.get_loop().call_soon_threadsafe(stop.set_result, None)
+    thread.join(5)
@@ -0,0 +1,72 @@
+import asyncio
+import csv
+import json
+import os
+
+import pytest
+
+pytest.importorskip("websockets")
+
+from engagement_core.ws_server import METADATA_LAYOUT, RESULTS_LAYOUT, IngestServer
+
+
+class FakeSocket:
+    def __init__(self, messages):
+        self.messages = [json.dumps(m) for m in messages]
+        self.sent = []
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for m in self.messages:
+            yield m
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+
+def record(frame, **extra):
+    return dict(responden="7", sesi="2", frame=frame, engagement_level=1,
+                fps=9.5, response_time=0.1, **extra)
+
+
+def run(server, messages):
+    async def go():
+        server.persister.start()
+        ws = FakeSocket(messages)
+        await server.handler(ws)
+        await server.persister.close()
+        return ws.sent
+    return asyncio.run(go())
+
+
+def read_csv(root, name):
+    with open(os.path.join(root, "responden_7", "sesi_2", name), newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_single_batch_and_invalid(tmp_path):
+    server = IngestServer(str(tmp_path), RESULTS_LAYOUT)
+    acks = run(server, [
+        record("a.jpg"),
+        {"frame": "missing fields"},
+        [record("b.jpg", seq=4), record("c.jpg", seq=5), {"bad": 1}],
+    ])
+
+    assert acks == [
+        {"status": "ok", "session": "2"},
+        {"status": "error", "message": "Invalid payload structure"},
+        {"status": "ok", "count": 2, "ack_seq": 5, "rejected": 1},
+    ]
+    rows = read_csv(str(tmp_path), "engagement_results.csv")
+    assert rows[0] == RESULTS_LAYOUT.header
+    assert [r[1] for r in rows[1:]] == ["a.jpg", "b.jpg", "c.jpg"]
+
+
+def test_metadata_layout(tmp_path):
+    server = IngestServer(str(tmp_path), METADATA_LAYOUT)
+    assert run(server, [record("a.jpg")]) == [{"status": "ok"}]
+    rows = read_csv(str(tmp_path), "engagement_metadata.csv")
+    assert rows[0] == METADATA_LAYOUT.header
+    assert rows[1][1:] == ["7", "2", "a.jpg", "1", "9.5", "0.1"]
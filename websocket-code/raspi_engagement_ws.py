@@ -1,28 +1,38 @@
 # Deploy WebSocket Client on Raspberry Pi to capture webcam video, classify engagement levels using a pre-trained model, and send data to the server while saving locally.
 
-import asyncio
-import websockets
-import json
 import os
 import time
 import cv2
 import csv
-import joblib
 import mediapipe as mp
 import tkinter as tk
 from tkinter import messagebox
 from tkcalendar import Calendar
 from PIL import Image, ImageTk
+import sys
+
+# shared helpers live in engagement_core/ at the repo root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from engagement_core.features import LandmarkFeatures
+from engagement_core.inference import EngagementModel
+from engagement_core.ws_sender import WebSocketSender
+from engagement_core.capture import LatestFrameGrabber
+from engagement_core.session_log import SessionLogger
 
 # ============================================================
 # CONFIG
 # ============================================================
 BASE_FOLDER = "/home/elvindo/raspi-engagement/data"
 WS_SERVER = "ws://10.34.3.209:8000"
+WS_MAX_BATCH = 16  # frames per WS message (server acks each batch once)
 
 RESPONDEN = "webcam_user"
 CURRENT_SESI = None
 
+# results CSV stays open and is written in groups; CSV_FSYNC=True
+# also fsyncs each group, so a power cut loses at most ~1 s of rows
+CSV_FSYNC = False
+
 os.makedirs(BASE_FOLDER, exist_ok=True)
 
 # ============================================================
@@ -30,15 +40,13 @@ os.makedirs(BASE_FOLDER, exist_ok=True)
 # ============================================================
 mp_face_mesh = mp.solutions.face_mesh
 face_mesh = mp_face_mesh.FaceMesh(max_num_faces=1)
-model = joblib.load("Fix_kan.pkl")
+model = EngagementModel.load("Fix_kan.pkl", compile_forest=True)
+features = LandmarkFeatures()
 
 # ============================================================
-# WEBSOCKET (ASYNC SAFE)
+# WEBSOCKET (ONE PERSISTENT CONNECTION, BACKGROUND THREAD)
 # ============================================================
-async def ws_send(payload):
-    async with websockets.connect(WS_SERVER) as ws:
-        await ws.send(json.dumps(payload))
-        await ws.recv()   # tunggu "ok" dari server
+ws_sender = WebSocketSender(WS_SERVER, max_batch=WS_MAX_BATCH)
 
 # ============================================================
 # CLASSIFICATION
@@ -47,59 +55,63 @@ def classify(frame):
     rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
     res = face_mesh.process(rgb)
 
-    level, conf = -1, 0.0
-
-    if res.multi_face_landmarks:
-        lm = res.multi_face_landmarks[0]
-        vec = []
-        for p in lm.landmark:
-            vec.extend([p.x, p.y])
-
-        if len(vec) == 936:
-            probs = model.predict_proba([vec])[0]
-            level = int(model.predict([vec])[0])
-            conf = max(probs)
-
+    level, conf, _ = model.predict(features.from_result(res))
     return level, conf
 
 # ============================================================
 # CAMERA LOOP
 # ============================================================
 def start_capture(session_folder, csv_path):
-    cap = cv2.VideoCapture(0)
+    # grabs continuously, so update() always gets the newest frame
+    cap = LatestFrameGrabber(0)
+    result_log = SessionLogger(csv_path, fsync=CSV_FSYNC)
 
     win = tk.Toplevel()
     label = tk.Label(win)
     label.pack()
 
     stop_flag = {"stop": False}
+    closed = {"done": False}
+
+    def finish():
+        # runs in the Stop handler itself: win.destroy() also drops the
+        # pending after() callback, so update() never gets another turn
+        if closed["done"]:
+            return
+        closed["done"] = True
+
+        print("[CAPTURE]", cap.stats())
+        cap.release()
+        result_log.close()
 
     def stop():
         stop_flag["stop"] = True
+        finish()
         win.destroy()
 
     tk.Button(win, text="Stop Session", command=stop).pack()
+    win.protocol("WM_DELETE_WINDOW", stop)
 
     def update():
         if stop_flag["stop"]:
-            cap.release()
             return
 
-        ret, frame = cap.read()
+        ret, frame, captured_at = cap.read()
         if not ret:
+            finish()  # camera gave out
             return
 
         start = time.time()
-        ts = int(time.time())
+        ts = int(captured_at)
         fname = f"frame_{ts}.jpg"
 
         level, conf = classify(frame)
         rt = time.time() - start
+        cap.note_classified(captured_at)
         fps = 1 / rt if rt > 0 else 0
 
         # save CSV lokal
-        with open(csv_path, "a", newline="") as f:
-            csv.writer(f).writerow([ts, fname, level, conf, fps, rt])
+        result_log.log([ts, fname, level, conf, fps, rt])
 
         # send to server (ASYNC BUT SAFE)
         payload = {
@@ -110,7 +122,7 @@ def start_capture(session_folder, csv_path):
             "fps": fps,
             "response_time": rt
         }
-        asyncio.run(ws_send(payload))
+        ws_sender.send(payload)
 
         img = ImageTk.PhotoImage(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
         label.config(image=img)
@@ -151,4 +163,7 @@ cal.pack(pady=10)
 tk.Button(root, text="Start Session",
           command=lambda: start_session(cal.get_date())).pack(pady=20)
 
-root.mainloop()
\ No newline at end of file
+root.mainloop()
+
+# deliver whatever metadata is still queued before exiting
+ws_sender.close()
\ No newline at end of file
@@ -5,52 +5,95 @@
 # Server: WebSocket Metadata Only
 # ============================================================
 
-import asyncio
-import websockets
-import json
 import os
 import time
 import cv2
 import csv
-import joblib
 import mediapipe as mp
 import tkinter as tk
 from tkinter import simpledialog, messagebox
 from tkcalendar import Calendar
 from PIL import Image, ImageTk
+import sys
+
+# shared helpers live in engagement_core/ at the repo root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from engagement_core.features import LandmarkFeatures
+from engagement_core.inference import EngagementModel
+from engagement_core.ws_sender import WebSocketSender
+from engagement_core.pipeline import FramePipeline
+from engagement_core.capture import LatestFrameGrabber
+from engagement_core.recorder import VideoRecorder
+from engagement_core.segments import SegmentFrameStore
+from engagement_core.session_log import SessionLogger
+from engagement_core.vectors import LandmarkVectorStore
+from engagement_core.gating import MotionGate, thumbnail
+from engagement_core.roi import RoiFaceMesh
+from engagement_core.presence import FacePresence
 
 # ============================================================
 # CONFIG
 # ============================================================
 BASE_FOLDER = "/home/elvindo/raspi-engagement/data"
 WS_SERVER = "ws://10.34.3.209:8000"
+WS_MAX_BATCH = 16  # frames per WS message (server acks each batch once)
 
 CAMERA_INDEX = 0  # Logitech C270
 FPS_VIDEO = 10
 
+# results CSV stays open and is written in groups; CSV_FSYNC=True
+# also fsyncs each group, so a power cut loses at most ~1 s of rows
+CSV_FSYNC = False
+
+# 936-float landmark row of every classified frame, for re-scoring /
+# retraining without FaceMesh ("float16" halves the size on disk)
+VECTOR_DTYPE = "float32"
+
+# skip FaceMesh while the picture barely changes: reuse the last result
+# while the 32x24 gray thumbnail differs by < GATE_THRESHOLD (0-255,
+# 0 = off), at most GATE_MAX_AGE seconds
+GATE_THRESHOLD = 4.0
+GATE_MAX_AGE = 2.0
+
+# after a face is found, FaceMesh only gets a crop around the last
+# landmarks (+ ROI_MARGIN of the face size per side); full frame
+# again when the face is lost and every 30 frames
+ROI_TRACKING = True
+ROI_MARGIN = 0.3
+
+# width frames are downscaled to before FaceMesh (None = as captured);
+# pick it with benchmarks/bench_resolution_ladder.py
+LANDMARK_WIDTH = None
+
+# while no face is tracked, a Haar cascade on a 160 px gray copy decides
+# whether FaceMesh runs at all; empty frames go straight to level -1
+# (FaceMesh still checks every 10th "no face" frame)
+FACE_PRECHECK = True
+
 os.makedirs(BASE_FOLDER, exist_ok=True)
 
 # ============================================================
 # MODEL
 # ============================================================
 mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp_face_mesh.FaceMesh(
-    static_image_mode=False,
-    max_num_faces=1
+face_mesh = RoiFaceMesh(
+    lambda: mp_face_mesh.FaceMesh(
+        static_image_mode=False,
+        max_num_faces=1
+    ),
+    margin=ROI_MARGIN,
+    enabled=ROI_TRACKING,
+    input_width=LANDMARK_WIDTH,
+    presence=FacePresence() if FACE_PRECHECK else None
 )
 
-model = joblib.load("Fix_kan.pkl")
+model = EngagementModel.load("Fix_kan.pkl", compile_forest=True)
+features = LandmarkFeatures()
 
 # ============================================================
-# WEBSOCKET (SAFE PER MESSAGE)
+# WEBSOCKET (ONE PERSISTENT CONNECTION, BACKGROUND THREAD)
 # ============================================================
-async def ws_send(payload):
-    try:
-        async with websockets.connect(WS_SERVER) as ws:
-            await ws.send(json.dumps(payload))
-            await ws.recv()  # expect {"status":"ok"}
-    except Exception as e:
-        print("⚠️ WS error:", e)
+ws_sender = WebSocketSender(WS_SERVER, max_batch=WS_MAX_BATCH)
 
 # ============================================================
 # CLASSIFICATION
@@ -59,37 +102,35 @@ def classify_frame(frame):
     rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
     result = face_mesh.process(rgb)
 
-    level, conf = -1, 0.0
-
-    if result.multi_face_landmarks:
-        lm = result.multi_face_landmarks[0]
-        vec = []
-        for p in lm.landmark:
-            vec.extend([p.x, p.y])
-
-        if len(vec) == 936:
-            probs = model.predict_proba([vec])[0]
-            level = int(model.predict([vec])[0])
-            conf = float(max(probs))
-
-    return level, conf
+    vector = features.from_result(result)
+    level, conf, _ = model.predict(vector)
+    # the feature buffer is reused by the next frame
+    return level, conf, None if vector is None else vector.copy()
 
 # ============================================================
 # CAMERA LOOP
 # ============================================================
 def start_capture(session_folder, csv_path, responden, sesi_id):
-    cap = cv2.VideoCapture(CAMERA_INDEX)
+    # grabs continuously and always hands out the newest frame
+    cap = LatestFrameGrabber(CAMERA_INDEX)
+    gate = MotionGate(GATE_THRESHOLD, GATE_MAX_AGE)
 
     if not cap.isOpened():
         messagebox.showerror("Camera Error", "Webcam tidak terdeteksi.")
         return
 
+    # classified frames go to segment files; engagement/<level>/ on demand:
+    #   python -m engagement_core.segments export <session>/frames <session>
+    frame_store = SegmentFrameStore(os.path.join(session_folder, "frames"))
+    vector_store = LandmarkVectorStore(os.path.join(session_folder, "vectors"), dtype=VECTOR_DTYPE)
+    result_log = SessionLogger(csv_path, fsync=CSV_FSYNC)
+
+    # encoded in a separate process, timed by capture timestamps
     video_path = os.path.join(session_folder, "session_video.mp4")
-    video_writer = cv2.VideoWriter(
+    video_writer = VideoRecorder(
         video_path,
-        cv2.VideoWriter_fourcc(*"mp4v"),
-        FPS_VIDEO,
-        (640, 480)
+        fps=FPS_VIDEO,
+        size=(640, 480)
     )
 
     win = tk.Toplevel()
@@ -100,49 +141,56 @@ def start_capture(session_folder, csv_path, responden, sesi_id):
 
     stop_flag = {"stop": False}
 
-    def stop():
-        stop_flag["stop"] = True
-        win.destroy()
-
-    tk.Button(win, text="Stop Session", command=stop).pack(pady=10)
-
-    def update():
-        if stop_flag["stop"]:
-            cap.release()
-            video_writer.release()
-            return
-
-        ret, frame = cap.read()
-        if not ret:
-            return
-
+    # capture, inference and saving run on their own threads;
+    # this (Tk) thread only shows the newest frame
+    def read_frame():
+        ok, frame, captured_at = cap.read()
+        if not ok:
+            return None
+        return captured_at, frame
+
+    def infer_frame(item):
+        captured_at, frame = item
+        ts = int(captured_at * 1000)
         start = time.time()
-        ts = int(time.time() * 1000)
-        frame_name = f"frame_{ts}.jpg"
-
-        level, conf = classify_frame(frame)
+        thumb = thumbnail(frame)
+        cached = gate.reuse(thumb, captured_at)
+        if cached is None:
+            level, conf, vector = classify_frame(frame)
+            gate.update(thumb, captured_at, (level, conf))
+        else:
+            # unchanged picture: same class, nothing new for the vector store
+            (level, conf), vector = cached, None
         rt = time.time() - start
+        cap.note_classified(captured_at)
         fps = 1 / rt if rt > 0 else 0
+        return ts, frame, level, conf, rt, fps, vector
+
+    def persist_frame(result):
+        ts, frame, level, conf, rt, fps, vector = result
+        frame_name = f"frame_{ts}.jpg"
 
         # Save image per engagement level
         if level >= 0:
-            save_dir = os.path.join(session_folder, "engagement", str(level))
-            cv2.imwrite(os.path.join(save_dir, frame_name), frame)
+            ok, jpeg = cv2.imencode(".jpg", frame)
+            if ok:
+                frame_store.append(jpeg.tobytes(), level, ts / 1000, frame_name)
+            if vector is not None:
+                vector_store.append(vector, ts, ts / 1000, level)
 
         # Save CSV locally
-        with open(csv_path, "a", newline="") as f:
-            csv.writer(f).writerow([
-                ts,
-                time.strftime("%H:%M:%S", time.localtime(ts / 1000)),
-                frame_name,
-                level,
-                conf,
-                rt,
-                fps
-            ])
+        result_log.log([
+            ts,
+            time.strftime("%H:%M:%S", time.localtime(ts / 1000)),
+            frame_name,
+            level,
+            conf,
+            rt,
+            fps
+        ])
 
         # Save video
-        video_writer.write(frame)
+        video_writer.write(frame, ts / 1000)
 
         # Send metadata to server
         payload = {
@@ -153,16 +201,58 @@ def start_capture(session_folder, csv_path, responden, sesi_id):
             "fps": fps,
             "response_time": rt
         }
-        asyncio.run(ws_send(payload))
+        ws_sender.send(payload)
+
+    # a deeper capture queue would only hold older frames
+    pipeline = FramePipeline(read_frame, infer_frame, persist_frame, queue_size=1).start()
+    shown = {"result": None}
+    closed = {"done": False}
+
+    def finish():
+        # runs in the Stop handler itself: win.destroy() also drops the
+        # pending after() callback, so update() never gets another turn
+        if closed["done"]:
+            return
+        closed["done"] = True
+
+        # lets captured frames finish inference + saving first
+        pipeline.stop()
+        print("[CAPTURE]", cap.stats())
+        print("[GATE]", gate.stats())
+        print("[ROI]", face_mesh.stats())
+        print("[VIDEO]", video_writer.stats())
+        cap.release()
+        video_writer.release()
+        frame_store.close()
+        vector_store.close()
+        result_log.close()
+
+    def stop():
+        stop_flag["stop"] = True
+        finish()
+        win.destroy()
+
+    tk.Button(win, text="Stop Session", command=stop).pack(pady=10)
+    win.protocol("WM_DELETE_WINDOW", stop)
+
+    def update():
+        if stop_flag["stop"]:
+            return
+        if not pipeline.running:
+            finish()  # camera gave out
+            return
 
         # UI Preview
-        img = ImageTk.PhotoImage(
-            Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-        )
-        label.config(image=img)
-        label.image = img
+        result = pipeline.latest()
+        if result is not None and result is not shown["result"]:
+            shown["result"] = result
+            img = ImageTk.PhotoImage(
+                Image.fromarray(cv2.cvtColor(result[1], cv2.COLOR_BGR2RGB))
+            )
+            label.config(image=img)
+            label.image = img
 
-        win.after(80, update)
+        win.after(30, update)
 
     update()
     win.mainloop()
@@ -188,10 +278,6 @@ def start_session(date):
 
     os.makedirs(session_folder, exist_ok=True)
 
-    # Engagement folders
-    for lvl in ["0", "1", "2", "3"]:
-        os.makedirs(os.path.join(session_folder, "engagement", lvl), exist_ok=True)
-
     csv_path = os.path.join(session_folder, "engagement_results.csv")
     with open(csv_path, "w", newline="") as f:
         csv.writer(f).writerow([
@@ -221,4 +307,7 @@ tk.Button(
     command=lambda: start_session(cal.get_date())
 ).pack(pady=20)
 
-root.mainloop()
\ No newline at end of file
+root.mainloop()
+
+# deliver whatever metadata is still queued before exiting
+ws_sender.close()
\ No newline at end of file
@@ -3,12 +3,12 @@
 # Receives metadata from Raspberry Pi
 # ============================================================
 
-import asyncio
-import websockets
-import json
 import os
-import csv
-from datetime import datetime
+import sys
+
+# shared helpers live in engagement_core/ at the repo root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from engagement_core.ws_server import IngestServer, METADATA_LAYOUT
 
 # ============================================================
 # CONFIG
@@ -19,83 +19,30 @@ PORT = 8000
 BASE_DIR = "data"
 SESSION_DIR = os.path.join(BASE_DIR, "sessions")
 
-os.makedirs(SESSION_DIR, exist_ok=True)
-
-# ============================================================
-# HELPER
-# ============================================================
-def ensure_session_csv(responden, sesi):
-    """
-    Ensure folder & CSV exist for a session
-    """
-    session_path = os.path.join(
-        SESSION_DIR,
-        f"responden_{responden}",
-        f"sesi_{sesi}"
-    )
-    os.makedirs(session_path, exist_ok=True)
-
-    csv_path = os.path.join(session_path, "engagement_metadata.csv")
-
-    if not os.path.exists(csv_path):
-        with open(csv_path, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                "server_timestamp",
-                "responden",
-                "sesi",
-                "frame_name",
-                "engagement_level",
-                "fps",
-                "response_time"
-            ])
-
-    return csv_path
-
-# ============================================================
-# WS HANDLER
-# ============================================================
-async def handler(websocket):
-    print("✅ Client connected")
-
-    try:
-        async for message in websocket:
-            data = json.loads(message)
-
-            responden = data["responden"]
-            sesi = data["sesi"]
-
-            csv_path = ensure_session_csv(responden, sesi)
-
-            server_ts = datetime.now().isoformat()
+# Session CSV handles stay open and are flushed every
+# WRITER_FLUSH_ROWS rows or WRITER_FLUSH_INTERVAL seconds
+WRITER_MAX_OPEN = 32
+WRITER_FLUSH_ROWS = 50
+WRITER_FLUSH_INTERVAL = 1.0
+WRITER_IDLE_TIMEOUT = 60.0
+# fsync on every flush: a power loss costs at most one flush window
+WRITER_FSYNC = False
 
-            with open(csv_path, "a", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    server_ts,
-                    responden,
-                    sesi,
-                    data["frame"],
-                    data["engagement_level"],
-                    data["fps"],
-                    data["response_time"]
-                ])
-
-            await websocket.send(json.dumps({"status": "ok"}))
-
-    except websockets.exceptions.ConnectionClosed:
-        print("❌ Client disconnected")
-
-    except Exception as e:
-        print("⚠️ Server error:", e)
+# All disk I/O runs on one writer thread; handlers wait only when more
+# than WRITER_MAX_PENDING messages are still waiting for the disk
+WRITER_MAX_PENDING = 1024
 
 # ============================================================
 # MAIN
 # ============================================================
-async def main():
-    print(f"🚀 WebSocket Server running on {HOST}:{PORT}")
-    async with websockets.serve(handler, HOST, PORT):
-        await asyncio.Future()  # run forever
-
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    IngestServer(
+        SESSION_DIR,
+        METADATA_LAYOUT,  # engagement_metadata.csv, responden/sesi per row
+        max_open=WRITER_MAX_OPEN,
+        flush_rows=WRITER_FLUSH_ROWS,
+        flush_interval=WRITER_FLUSH_INTERVAL,
+        idle_timeout=WRITER_IDLE_TIMEOUT,
+        fsync=WRITER_FSYNC,
+        max_pending=WRITER_MAX_PENDING
+    ).run(HOST, PORT)